@@ -3,39 +3,41 @@ git-flow - Manage version branches and tags
 
 Usage:
  git-flow status
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
-        [(-a|--all) | <object>]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
+        [-j N|--jobs=N] [--format=FORMAT] [(-a|--all) | <object>]
  git-flow (bump-major|bump-minor)
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
         [-d|--dry-run] [-y|--assume-yes] [<object>]
  git-flow (bump-patch|bump-prerelease-type|bump-prerelease|bump-to-release)
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
-        [-d|--dry-run] [-y|--assume-yes] [<object>]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
+        [-d|--dry-run] [-y|--assume-yes] [--all-active | <object> [<other-object>...]]
  git-flow bump-to
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
         [-d|--dry-run] [-y|--assume-yes] <version> [<object>]
  git-flow discontinue
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
         [-d|--dry-run] [-y|--assume-yes] [--reintegrate|--no-reintegrate] [<object>]
  git-flow start
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
         [-d|--dry-run] [-y|--assume-yes] (<supertype> <type> <name>|<work-branch>) [<base-object>]
  git-flow finish
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
         [-d|--dry-run] [-y|--assume-yes] [(<supertype> <type> <name>|<work-branch>) [<base-object>]]
  git-flow log
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
         [<object>] [-- <git-arg>...]
  git-flow (assemble|test|integration-test)
-        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty]
+        [--root=DIR] [--config=FILE] [-B|--batch] [-v|--verbose] [-p|--pretty] [--trace=FILE] [--stats]
         [-d|--dry-run] [--inplace| [<object>]]
  git-flow drop-cache
         [-B|--batch] [-v|--verbose] [-p|--pretty]
         [-d|--dry-run]
  git-flow convert-config <input-file> <output-file>
+ git-flow daemon
+        [-v|--verbose]
  git-flow (-h|--help)
  git-flow --version
- git-flow --hook=<hook-name> [<hook-args>...]
+ git-flow [--trace=FILE] [--stats] --hook=<hook-name> [<hook-args>...]
 
 Options:
  -h --help              Shows this screen.
@@ -43,6 +45,12 @@ Options:
 
 Selection Options:
  -a --all               Select all branches
+ --all-active           Select all release branches, that have not been discontinued.
+                        Multiple release branches are bumped together and pushed atomically.
+
+Performance Options:
+ -j N --jobs=N          The number of branches analyzed concurrently.
+                        Defaults to 4.
 
 Workspace Options:
  --root=DIR             The working copy root.
@@ -58,33 +66,33 @@ Execution Mode Options:
 Output Options:
  -v --verbose           Enables detailed output.
  -p --pretty            Enables formatted and colored output.
+ --format=FORMAT        The output format of status, text or json-lines.
+                        json-lines prints a JSON record per branch, as soon as it has been analyzed.
+                        Defaults to text.
+
+Diagnostic Options:
+ --trace=FILE           Writes the timings of git invocations, build steps and actions in the Chrome trace format.
+ --stats                Prints the number of forked processes, the time spent per git subcommand and the slowest
+                        calls to stderr.
 
 Hook Options:
 --hook=<hook-name>      Sets the hook type. For use in Git hooks only.
 
+Daemon:
+ The daemon keeps contexts of recently used working copies in memory and executes status queries, hooks and
+ dry run bumps on behalf of git-flow, as long as it is reachable.
+ The socket location is overridden with GITFLOW_DAEMON_SOCKET, forwarding is disabled with GITFLOW_NO_DAEMON=1.
+
 """
 
 import os
 import sys
+from typing import Callable
 
-import docopt
-
-import gitflow.procedures.begin
-import gitflow.procedures.build
-import gitflow.procedures.create_version
-import gitflow.procedures.discontinue_version
-import gitflow.procedures.end
-import gitflow.procedures.log
-import gitflow.procedures.status
-from gitflow import cli, repotools, _, hooks, filesystem
+# command modules and third party libraries are imported on demand to keep the startup time of hooks low
+from gitflow import cli, _, filesystem, daemon, tracing
 from gitflow import const
 from gitflow.common import GitFlowException, Result
-from gitflow.context import Context
-# project_env = os.path.normpath(os.path.join(os.path.dirname(__file__), '..'))
-# print('project_env: ' + project_env)
-# sys.path.insert(0, project_env)
-from gitflow.procedures.scheme import scheme_procedures
-from gitflow.properties import PropertyIO
 
 ENABLE_PROFILER = False
 
@@ -93,55 +101,75 @@ ENABLE_PROFILER = False
 # mapped by cmd_<name>
 
 def cmd_bump_major(context):
-    return gitflow.procedures.create_version.call(context, scheme_procedures.version_bump_major)
+    from gitflow.procedures import create_version
+    from gitflow.procedures.scheme import scheme_procedures
+    return create_version.call(context, scheme_procedures.version_bump_major)
 
 
 def cmd_bump_minor(context):
-    return gitflow.procedures.create_version.call(context, scheme_procedures.version_bump_minor)
+    from gitflow.procedures import create_version
+    from gitflow.procedures.scheme import scheme_procedures
+    return create_version.call(context, scheme_procedures.version_bump_minor)
 
 
 def cmd_bump_patch(context):
-    return gitflow.procedures.create_version.call(context, scheme_procedures.version_bump_patch)
+    from gitflow.procedures import create_version
+    from gitflow.procedures.scheme import scheme_procedures
+    return create_version.call(context, scheme_procedures.version_bump_patch)
 
 
 def cmd_bump_prerelease_type(context):
-    return gitflow.procedures.create_version.call(context, scheme_procedures.version_bump_qualifier)
+    from gitflow.procedures import create_version
+    from gitflow.procedures.scheme import scheme_procedures
+    return create_version.call(context, scheme_procedures.version_bump_qualifier)
 
 
 def cmd_bump_prerelease(context):
-    return gitflow.procedures.create_version.call(context, scheme_procedures.version_bump_prerelease)
+    from gitflow.procedures import create_version
+    from gitflow.procedures.scheme import scheme_procedures
+    return create_version.call(context, scheme_procedures.version_bump_prerelease)
 
 
 def cmd_bump_to_release(context):
-    return gitflow.procedures.create_version.call(context, scheme_procedures.version_bump_to_release)
+    from gitflow.procedures import create_version
+    from gitflow.procedures.scheme import scheme_procedures
+    return create_version.call(context, scheme_procedures.version_bump_to_release)
 
 
 def cmd_bump_to(context):
-    return gitflow.procedures.create_version.call(context, scheme_procedures.VersionSet(context.args['<version>']))
+    from gitflow.procedures import create_version
+    from gitflow.procedures.scheme import scheme_procedures
+    return create_version.call(context, scheme_procedures.VersionSet(context.args['<version>']))
 
 
 def cmd_discontinue(context):
-    return gitflow.procedures.discontinue_version.call(context)
+    from gitflow.procedures import discontinue_version
+    return discontinue_version.call(context)
 
 
 def cmd_start(context):
-    return gitflow.procedures.begin.call(context)
+    from gitflow.procedures import begin
+    return begin.call(context)
 
 
 def cmd_finish(context):
-    return gitflow.procedures.end.call(context)
+    from gitflow.procedures import end
+    return end.call(context)
 
 
 def cmd_log(context):
-    return gitflow.procedures.log.call(context)
+    from gitflow.procedures import log
+    return log.call(context)
 
 
 def cmd_status(context):
-    return gitflow.procedures.status.call(context)
+    from gitflow.procedures import status
+    return status.call(context)
 
 
 def cmd_build(context):
-    return gitflow.procedures.build.call(context)
+    from gitflow.procedures import build
+    return build.call(context)
 
 
 def cmd_drop_cache(context):
@@ -154,6 +182,8 @@ def cmd_drop_cache(context):
 
 
 def cmd_convert_config(context):
+    from gitflow.properties import PropertyIO
+
     result = Result()
 
     with open(context.args['<input-file>'], mode='r', encoding='utf-8') as in_file:
@@ -181,28 +211,24 @@ def cmd_convert_config(context):
 # mapped by hook_<name>
 
 def hook_pre_commit(context):
+    from gitflow import hooks
     return hooks.pre_commit(context)
 
 
 def hook_pre_push(context):
+    from gitflow import hooks
     return hooks.pre_push(context)
 
 
 # ========== entry point
 
-def main(argv: list = sys.argv) -> int:
-    if ENABLE_PROFILER:
-        import cProfile
-        profiler = cProfile.Profile()
-        profiler.enable()
-    else:
-        profiler = None
+def execute(args: dict, create_context: Callable[[dict, Result], 'Context']) -> int:
+    from gitflow import repotools
 
     result = Result()
 
-    args = docopt.docopt(argv=argv[1:], doc=__doc__, version=const.VERSION, help=True, options_first=False)
     try:
-        context = Context.create(args, result)
+        context = create_context(args, result)
     except GitFlowException as e:
         context = None
         pass  # errors are in result
@@ -303,6 +329,42 @@ def main(argv: list = sys.argv) -> int:
             else:
                 pass
 
+    return exit_code
+
+
+def main(argv: list = sys.argv) -> int:
+    if ENABLE_PROFILER:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = None
+
+    import docopt
+
+    args = docopt.docopt(argv=argv[1:], doc=__doc__, version=const.VERSION, help=True, options_first=False)
+
+    if args.get('--trace') is not None or args.get('--stats'):
+        tracing.enable()
+
+    if args['daemon']:
+        exit_code = daemon.serve(args, execute)
+    else:
+        exit_code = daemon.forward(args) if daemon.is_forwarded(args) else None
+        if exit_code is None:
+            from gitflow.context import Context
+            command_name = args['--hook'] or next((key for key, value in args.items()
+                                                   if value is True and not key.startswith('-')), None)
+            with tracing.span(command_name or 'git-flow', 'command'):
+                exit_code = execute(args, Context.create)
+
+    if args.get('--trace') is not None:
+        tracing.write_trace(args['--trace'])
+    if args.get('--stats'):
+        for line in tracing.get_summary():
+            cli.eprint(line)
+    tracing.disable()
+
     if profiler is not None:
         profiler.disable()
         # pr.dump_stats('profile.pstat')
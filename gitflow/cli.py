@@ -1,14 +1,25 @@
 import os
 import sys
 import types
-from typing import TextIO
-
-import colors
+from typing import TextIO, Callable
 
 from gitflow.common import GitFlowException, Result
 
-_ERROR_COLOR = colors.partial(colors.color, fg='red')
-_WARN_COLOR = colors.partial(colors.color, fg='orange')
+
+def _color(**style) -> Callable[[str], str]:
+    """
+    :returns a function, that applies the style to a message. The colors module is loaded on first use.
+    """
+
+    def apply(message: str) -> str:
+        import colors
+        return colors.color(message, **style)
+
+    return apply
+
+
+_ERROR_COLOR = _color(fg='red')
+_WARN_COLOR = _color(fg='orange')
 
 __enable_color = False
 
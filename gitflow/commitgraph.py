@@ -0,0 +1,241 @@
+import array
+import heapq
+import itertools
+import os
+import struct
+import typing
+from typing import Optional, List, Dict
+
+from gitflow import filesystem
+
+FILE_MAGIC = b'GFCG'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<4sIIIII')
+
+FLAG_PARENT1 = 1
+FLAG_PARENT2 = 2
+FLAG_STALE = 4
+
+
+class AncestorSet(object):
+    """
+    The ancestors of a commit, expanded on demand down to the generation of the queried commit.
+    """
+    graph: 'CommitGraph' = None
+    ancestors: set = None
+    frontier: list = None
+
+    def __init__(self, graph: 'CommitGraph', commit: int):
+        self.graph = graph
+        self.ancestors = {commit}
+        self.frontier = [(-graph.generations[commit], commit)]
+
+    def __contains__(self, commit: int) -> bool:
+        generation = self.graph.generations[commit]
+        while len(self.frontier) and -self.frontier[0][0] >= generation:
+            negative_generation, ancestor = heapq.heappop(self.frontier)
+            for parent in self.graph.get_parent_positions(ancestor):
+                if parent not in self.ancestors:
+                    self.ancestors.add(parent)
+                    heapq.heappush(self.frontier, (-self.graph.generations[parent], parent))
+        return commit in self.ancestors
+
+
+class CommitGraph(object):
+    """
+    Parent links, generation numbers and commit timestamps of all commits reachable from a set of heads.
+    Commits are stored in topological order, parents are kept in flat arrays indexed by commit position.
+    """
+    hash_size: int = None
+    hashes: List[str] = None
+    positions: Dict[str, int] = None
+    parent_offsets: array.array = None
+    parent_positions: array.array = None
+    generations: array.array = None
+    timestamps: array.array = None
+    heads: set = None
+    """positions of the commits without children, the graph contains all of their ancestors"""
+    modified = False
+
+    def __init__(self, hash_size: int = 20):
+        self.hash_size = hash_size
+        self.hashes = list()
+        self.positions = dict()
+        self.parent_offsets = array.array('i', [0])
+        self.parent_positions = array.array('i')
+        self.generations = array.array('i')
+        self.timestamps = array.array('q')
+        self.heads = set()
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, commit: str):
+        return commit in self.positions
+
+    def add(self, commit: str, timestamp: int, parents: List[str]):
+        """
+        Adds a commit, whose parents have already been added.
+        """
+        if commit in self.positions:
+            return
+
+        position = len(self.hashes)
+        generation = 0
+        for parent in parents:
+            parent_position = self.positions.get(parent)
+            # parents beyond a shallow boundary are unknown
+            if parent_position is not None:
+                self.parent_positions.append(parent_position)
+                generation = max(generation, self.generations[parent_position])
+                self.heads.discard(parent_position)
+
+        self.hashes.append(commit)
+        self.positions[commit] = position
+        self.parent_offsets.append(len(self.parent_positions))
+        self.generations.append(generation + 1)
+        self.timestamps.append(timestamp)
+        self.heads.add(position)
+        self.modified = True
+
+    def get_parent_positions(self, position: int) -> array.array:
+        return self.parent_positions[self.parent_offsets[position]:self.parent_offsets[position + 1]]
+
+    def get_parents(self, commit: str) -> List[str]:
+        return [self.hashes[parent] for parent in self.get_parent_positions(self.positions[commit])]
+
+    def get_head_hashes(self) -> List[str]:
+        return [self.hashes[position] for position in sorted(self.heads)]
+
+    def first_parent_chain(self, tip: str) -> typing.Generator[str, None, None]:
+        position = self.positions[tip]
+        while True:
+            yield self.hashes[position]
+            start = self.parent_offsets[position]
+            if start == self.parent_offsets[position + 1]:
+                break
+            position = self.parent_positions[start]
+
+    def walk(self, tip: str, excluded: Optional[str] = None, first_parent: bool = False) \
+            -> typing.Generator[typing.Tuple[str, List[str]], None, None]:
+        """
+        Lists commits in the default order of git rev-list [--first-parent] [excluded..]tip, which is
+        descending commit time, ties in the order of discovery.
+        :returns (commit, parents) tuples
+        """
+        uninteresting = AncestorSet(self, self.positions[excluded]) if excluded is not None else None
+
+        tip_position = self.positions[tip]
+        sequence = itertools.count()
+        queue = [(-self.timestamps[tip_position], next(sequence), tip_position)]
+        seen = {tip_position}
+
+        while len(queue):
+            negative_timestamp, index, position = heapq.heappop(queue)
+            if uninteresting is not None and position in uninteresting:
+                continue
+
+            parents = self.get_parent_positions(position)
+            if first_parent:
+                parents = parents[:1]
+            yield self.hashes[position], [self.hashes[parent] for parent in parents]
+
+            for parent in parents:
+                if parent not in seen:
+                    seen.add(parent)
+                    heapq.heappush(queue, (-self.timestamps[parent], next(sequence), parent))
+
+    def merge_bases(self, commit_a: str, commit_b: str) -> List[str]:
+        """
+        :returns all best common ancestors, the most recent first
+        """
+        position_a = self.positions[commit_a]
+        position_b = self.positions[commit_b]
+        if position_a == position_b:
+            return [commit_a]
+
+        flags = {position_a: FLAG_PARENT1, position_b: FLAG_PARENT2}
+        # commits are visited by descending generation, hence all children of a commit precede it
+        queue = [(-self.generations[position_a], position_a), (-self.generations[position_b], position_b)]
+        heapq.heapify(queue)
+        active = 2
+
+        results = list()
+        while active > 0:
+            negative_generation, position = heapq.heappop(queue)
+            commit_flags = flags[position]
+            if not commit_flags & FLAG_STALE:
+                active -= 1
+                if commit_flags & (FLAG_PARENT1 | FLAG_PARENT2) == (FLAG_PARENT1 | FLAG_PARENT2):
+                    results.append(position)
+                    commit_flags |= FLAG_STALE
+
+            for parent in self.get_parent_positions(position):
+                parent_flags = flags.get(parent)
+                if parent_flags is None:
+                    flags[parent] = commit_flags
+                    heapq.heappush(queue, (-self.generations[parent], parent))
+                    if not commit_flags & FLAG_STALE:
+                        active += 1
+                elif parent_flags | commit_flags != parent_flags:
+                    flags[parent] = parent_flags | commit_flags
+                    if not parent_flags & FLAG_STALE and commit_flags & FLAG_STALE:
+                        active -= 1
+
+        results.sort(key=lambda result: (self.timestamps[result], self.generations[result]), reverse=True)
+        return [self.hashes[result] for result in results]
+
+    def write(self, path: str):
+        temp_path = path + '.' + str(os.getpid()) + '.tmp'
+        heads = array.array('i', sorted(self.heads))
+        with open(temp_path, 'wb') as graph_file:
+            graph_file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, self.hash_size,
+                                              len(self.hashes), len(self.parent_positions), len(heads)))
+            graph_file.write(b''.join(bytes.fromhex(commit) for commit in self.hashes))
+            for values in [self.parent_offsets, self.parent_positions, self.generations, self.timestamps, heads]:
+                graph_file.write(values.tobytes())
+        filesystem.replace_file(temp_path, path)
+        self.modified = False
+
+    @classmethod
+    def read(cls, path: str) -> Optional['CommitGraph']:
+        """
+        :returns the graph stored in a file or None, if the file is missing or invalid
+        """
+        try:
+            with open(path, 'rb') as graph_file:
+                data = graph_file.read()
+        except FileNotFoundError:
+            return None
+
+        if len(data) < FILE_HEADER.size:
+            return None
+        magic, version, hash_size, commit_count, parent_count, head_count = FILE_HEADER.unpack_from(data)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            return None
+
+        graph = CommitGraph(hash_size)
+        offset = FILE_HEADER.size
+
+        def read_array(type_code: str, count: int) -> array.array:
+            nonlocal offset
+            values = array.array(type_code)
+            end = offset + count * values.itemsize
+            values.frombytes(data[offset:end])
+            offset = end
+            return values
+
+        hashes_end = offset + commit_count * hash_size
+        graph.hashes = [data[pos:pos + hash_size].hex() for pos in range(offset, hashes_end, hash_size)]
+        offset = hashes_end
+        graph.parent_offsets = read_array('i', commit_count + 1)
+        graph.parent_positions = read_array('i', parent_count)
+        graph.generations = read_array('i', commit_count)
+        graph.timestamps = read_array('q', commit_count)
+        graph.heads = set(read_array('i', head_count))
+
+        if offset != len(data) or len(graph.hashes) != commit_count:
+            return None
+
+        graph.positions = dict(zip(graph.hashes, range(commit_count)))
+        return graph
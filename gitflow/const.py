@@ -50,6 +50,8 @@ CONFIG_DISCONTINUATION_TAG_PATTERN = 'discontinuationTagPattern'
 
 CONFIG_INITIAL_VERSION = 'initialVersion'
 
+CONFIG_WORKSPACE = 'workspace'
+
 # config defaults
 
 DEFAULT_CONFIG_FILE_EXTENSIONS = ['yml', 'json']
@@ -85,6 +87,13 @@ DEFAULT_DISCONTINUATION_TAG_PATTERN = r'(?P<major>\d+)\.(?P<minor>\d+)(?:\.(?P<p
 
 DEFAULT_PROPERTY_ENCODING = 'UTF-8'
 
+# temporary workspaces for version changes
+WORKSPACE_CLONE = 'clone'
+WORKSPACE_WORKTREE = 'worktree'
+WORKSPACE_TYPES = [WORKSPACE_CLONE, WORKSPACE_WORKTREE]
+
+DEFAULT_WORKSPACE = WORKSPACE_CLONE
+
 TEXT_VERSION_STRING_FORMAT = "<major:uint>.<minor:uint>.<patch:uint>" \
                              "[-<prerelease_type:(a-zA-Z)(a-zA-Z0-9)*>.<prerelease_version:uint>]" \
                              "[+<build_info:(a-zA-Z0-9)+>]"
@@ -157,5 +166,25 @@ OS_IS_POSIX = os.name == 'posix'
 EX_ABORTED = 2
 EX_ABORTED_BY_USER = 3
 
+# status output formats
+STATUS_FORMAT_TEXT = 'text'
+STATUS_FORMAT_JSON_LINES = 'json-lines'
+STATUS_FORMATS = [STATUS_FORMAT_TEXT, STATUS_FORMAT_JSON_LINES]
+
+# the default number of branches analyzed concurrently
+DEFAULT_JOB_COUNT = 4
+# the default number of git processes run concurrently by asynchronous queries
+DEFAULT_GIT_CONCURRENCY = 8
+
 # ['--first-parent'] to ignore merged tags
 BRANCH_COMMIT_SCAN_OPTIONS = []
+
+# overrides the socket path of the daemon
+DAEMON_SOCKET_ENV = 'GITFLOW_DAEMON_SOCKET'
+# disables forwarding commands to a running daemon, if set to a non-empty value
+NO_DAEMON_ENV = 'GITFLOW_NO_DAEMON'
+
+# selects the implementation of git operations, if available
+GIT_BACKEND_ENV = 'GITFLOW_GIT_BACKEND'
+GIT_BACKEND_SUBPROCESS = 'subprocess'
+GIT_BACKEND_DULWICH = 'dulwich'
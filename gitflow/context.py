@@ -1,13 +1,16 @@
 import atexit
+import copy
+import hashlib
+import json
 import os
 import re
 import shutil
 from enum import Enum
-from typing import List, Optional
+from typing import List, Optional, Dict
 
 import collections
 
-from gitflow import cli, const, repotools, _, utils
+from gitflow import cli, const, repotools, _, utils, filesystem
 from gitflow.common import Result
 from gitflow.const import VersioningScheme
 from gitflow.properties import PropertyIO
@@ -15,6 +18,77 @@ from gitflow.repotools import RepoContext
 from gitflow.version import VersionMatcher, VersionConfig
 
 
+# parsed config files by content hash
+__parsed_configs: Dict[str, dict] = dict()
+# the maximum number of parsed configs in the cache directory, the least recently used ones are deleted
+MAX_CACHED_CONFIG_COUNT = 256
+
+
+def get_config_hash(file_name: str, data: bytes) -> str:
+    extension = os.path.splitext(file_name)[1]
+    return hashlib.sha1(extension.encode('utf-8') + b'\0' + data).hexdigest()
+
+
+def parse_config(file_name: str, data: bytes) -> dict:
+    """
+    Parses the contents of a config file.
+    Parsed configs are cached in memory and as JSON in the cache directory, keyed by content hash.
+    The cache directory keeps the most recently used configs only.
+    The returned dict is shared and must not be modified.
+    """
+    config_hash = get_config_hash(file_name, data)
+    config = __parsed_configs.get(config_hash)
+    if config is not None:
+        return config
+
+    cache_file_path = os.path.join(filesystem.get_cache_dir('config'), config_hash + '.json')
+    try:
+        with open(cache_file_path, 'r', encoding='utf-8') as cache_file:
+            config = json.load(cache_file)
+        # the modification time records the last use
+        os.utime(cache_file_path)
+    except (FileNotFoundError, ValueError):
+        config = None
+
+    if config is None:
+        config = PropertyIO.get_instance_by_filename(file_name).from_bytes(data, const.DEFAULT_PROPERTY_ENCODING)
+
+        try:
+            serialized_config = json.dumps(config, separators=(',', ':'))
+        except (TypeError, ValueError):
+            serialized_config = None
+        # configs, that do not survive a round trip, such as YAML with non-string keys, are parsed on each run
+        if serialized_config is not None and json.loads(serialized_config) == config:
+            temp_file_path = cache_file_path + '.' + str(os.getpid()) + '.tmp'
+            with open(temp_file_path, 'w', encoding='utf-8') as cache_file:
+                cache_file.write(serialized_config)
+            filesystem.replace_file(temp_file_path, cache_file_path)
+            prune_config_cache(os.path.dirname(cache_file_path))
+
+    __parsed_configs[config_hash] = config
+    return config
+
+
+def prune_config_cache(cache_dir: str):
+    """
+    Deletes the least recently used parsed configs, that exceed MAX_CACHED_CONFIG_COUNT.
+    """
+    cache_files = list()
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.json'):
+            try:
+                cache_files.append((entry.stat().st_mtime_ns, entry.path))
+            except FileNotFoundError:
+                pass
+    cache_files.sort(reverse=True)
+    for mtime, path in cache_files[MAX_CACHED_CONFIG_COUNT:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # deleted concurrently
+            pass
+
+
 class BuildStepType(Enum):
     ASSEMBLE = 'assemble',
 
@@ -65,6 +139,9 @@ class Config(object):
 
     release_branch_base = None
 
+    workspace: str = None
+    """the type of temporary workspace to create version increment commits in"""
+
     dev_branch_types = ['feature', 'integration',
                         'fix', 'chore', 'doc', 'issue']
 
@@ -147,6 +224,8 @@ class Context(AbstractContext):
     args = None
 
     root = None
+    config_file: str = None
+    config_hash: str = None
     batch = False
     assume_yes = False
     dry_run = False
@@ -161,9 +240,16 @@ class Context(AbstractContext):
     version_tag_matcher: VersionMatcher = None
     discontinuation_tag_matcher: VersionMatcher = None
 
+    # indices
+    version_tag_index: 'VersionTagIndex' = None
+    sequence_index: 'SequenceIndex' = None
+
     # resources
     temp_dirs: list = None
     clones: list = None
+    locks: list = None
+    # whether cleanup closes the repo context, which is not the case for derived contexts
+    owns_repo = True
 
     # misc
     git_version: str = None
@@ -172,25 +258,31 @@ class Context(AbstractContext):
         super().__init__()
         atexit.register(self.cleanup)
 
-    @staticmethod
-    def create(args: dict, result_out: Result) -> 'Context':
-        context = Context()
-        context.config: Config = Config()
-
+    def set_args(self, args: Optional[dict]):
         if args is not None:
-            context.args = args
+            self.args = args
 
-            context.batch = context.args['--batch']
-            context.assume_yes = context.args.get('--assume-yes')
-            context.dry_run = context.args.get('--dry-run')
+            self.batch = self.args['--batch']
+            self.assume_yes = self.args.get('--assume-yes')
+            self.dry_run = self.args.get('--dry-run')
             # TODO remove this workaround
-            context.verbose = (context.args['--verbose'] + 1) // 2
-            context.pretty = context.args['--pretty']
+            self.verbose = (self.args['--verbose'] + 1) // 2
+            self.pretty = self.args['--pretty']
         else:
-            context.args = dict()
+            self.args = dict()
 
         # configure CLI
-        cli.set_allow_color(not context.batch)
+        cli.set_allow_color(not self.batch)
+
+    @staticmethod
+    def create(args: dict, result_out: Result, parent: 'Context' = None) -> 'Context':
+        """
+        :param parent: the context of the enclosing run, its compiled config is reused if the config file contents match
+        """
+        context = Context()
+        context.config: Config = Config()
+
+        context.set_args(args)
 
         # initialize repo context and attempt to load the config file
         if '--root' in context.args and context.args['--root'] is not None:
@@ -248,11 +340,36 @@ class Context(AbstractContext):
             if context.verbose >= const.TRACE_VERBOSITY:
                 cli.print("gitflow_config_file: " + gitflow_config_file)
 
-            with open(gitflow_config_file) as json_file:
-                config = PropertyIO.get_instance_by_filename(gitflow_config_file).from_stream(json_file)
+            context.config_file = gitflow_config_file
+            with open(gitflow_config_file, 'rb') as config_file:
+                config_data = config_file.read()
+            context.config_hash = get_config_hash(gitflow_config_file, config_data)
+            config = parse_config(gitflow_config_file, config_data)
         else:
             config = object()
 
+        if parent is not None and parent.config_hash is not None and parent.config_hash == context.config_hash:
+            Context.__share_config(context, parent, config)
+        else:
+            Context.__configure(context, config, result_out)
+
+        return context
+
+    @staticmethod
+    def __share_config(context: 'Context', parent: 'Context', config: dict):
+        """
+        Adopts the compiled config and the matchers of a context with the same config file contents.
+        """
+        context.config = copy.copy(parent.config)
+        # relative to the working copy root
+        context.config.property_file = config.get(const.CONFIG_PROJECT_PROPERTY_FILE)
+        if context.config.property_file is not None:
+            context.config.property_file = os.path.join(context.root, context.config.property_file)
+
+        context.__share_matchers(parent)
+
+    @staticmethod
+    def __configure(context: 'Context', config: dict, result_out: Result):
         build_config_json = config.get(const.CONFIG_BUILD)
 
         context.config.version_change_actions = config.get(const.CONFIG_ON_VERSION_CHANGE, [])
@@ -329,12 +446,7 @@ class Context(AbstractContext):
                         )
                     context.config.build_stages.append(stage)
 
-        context.config.build_stages.sort(key=utils.cmp_to_key(lambda stage_a, stage_b:
-                                                              const.BUILD_STAGE_TYPES.index(stage_a.type)
-                                                              - const.BUILD_STAGE_TYPES.index(stage_b.type)
-                                                              ),
-                                         reverse=False
-                                         )
+        context.config.build_stages.sort(key=lambda stage: const.BUILD_STAGE_TYPES.index(stage.type))
 
         # project properties config
 
@@ -396,6 +508,12 @@ class Context(AbstractContext):
         context.config.release_branch_base = config.get(const.CONFIG_RELEASE_BRANCH_BASE,
                                                         const.DEFAULT_RELEASE_BRANCH_BASE)
 
+        context.config.workspace = config.get(const.CONFIG_WORKSPACE, const.DEFAULT_WORKSPACE)
+        if context.config.workspace not in const.WORKSPACE_TYPES:
+            result_out.fail(os.EX_DATAERR, _("Configuration failed."),
+                            _("The workspace type {workspace} is invalid.").format(
+                                workspace=utils.quote(context.config.workspace, '\'')))
+
         remote_prefix = repotools.create_ref_name(const.REMOTES_PREFIX, context.config.remote_name)
 
         context.release_base_branch_matcher = VersionMatcher(
@@ -448,8 +566,36 @@ class Context(AbstractContext):
             None
         )
 
+    def derive(self, args: dict) -> 'Context':
+        """
+        Creates a context for another command on the same working copy and config.
+        The parsed config, the matchers and the repo context including its caches are shared.
+        """
+        context = Context()
+        context.set_args(args)
+
+        context.config = self.config
+        context.root = self.root
+        context.config_file = self.config_file
+        context.config_hash = self.config_hash
+        context.git_version = self.git_version
+
+        context.repo = self.repo
+        context.owns_repo = False
+        if context.repo is not None:
+            context.repo.verbose = context.verbose
+
+        context.__share_matchers(self)
+
         return context
 
+    def __share_matchers(self, other: 'Context'):
+        self.release_base_branch_matcher = other.release_base_branch_matcher
+        self.release_branch_matcher = other.release_branch_matcher
+        self.work_branch_matcher = other.work_branch_matcher
+        self.version_tag_matcher = other.version_tag_matcher
+        self.discontinuation_tag_matcher = other.discontinuation_tag_matcher
+
     def add_temp_dir(self, dir):
         if self.temp_dirs is None:
             self.temp_dirs = list()
@@ -466,7 +612,7 @@ class Context(AbstractContext):
         ))
         release_branches.sort(
             reverse=reverse,
-            key=self.release_branch_matcher.key_func
+            key=lambda branch_ref: self.release_branch_matcher.key(branch_ref.name)
         )
         return release_branches
 
@@ -482,6 +628,12 @@ class Context(AbstractContext):
             for clone in self.clones:
                 clone.cleanup()
             self.clones.clear()
+        if self.repo is not None and self.owns_repo:
+            self.repo.close()
+        if self.locks is not None:
+            for lock in self.locks:
+                lock.close()
+            self.locks.clear()
 
     def __del__(self):
         self.cleanup()
@@ -0,0 +1,298 @@
+"""
+A long-running server, that keeps contexts of recently used working copies warm and executes read-only commands
+on behalf of the git-flow command line client.
+Requests are served one at a time over a Unix socket.
+The client side is imported on every start, hence the server side loads its dependencies on demand.
+"""
+import collections
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import time
+import typing
+from io import StringIO
+from typing import Optional
+
+from gitflow import _, cli, const, filesystem
+from gitflow.common import Result
+
+# the maximum number of working copies kept warm
+MAX_REPO_COUNT = 16
+
+# commands, that are forwarded to a daemon in dry run mode only
+DRY_RUN_COMMANDS = [
+    'bump-major',
+    'bump-minor',
+    'bump-patch',
+    'bump-prerelease-type',
+    'bump-prerelease',
+    'bump-to-release',
+    'bump-to',
+]
+
+# the granularity of directory modification times, within which ref stamps are not trusted, in nanoseconds
+RACY_STAMP_INTERVAL = 2 * 10 ** 9
+
+# environment variables, that are passed from the client to the daemon
+FORWARDED_ENV_PREFIX = 'GIT_'
+
+
+def get_socket_path() -> str:
+    socket_path = os.environ.get(const.DAEMON_SOCKET_ENV)
+    if not socket_path:
+        socket_path = os.path.join(filesystem.get_cache_root_dir(), 'daemon', 'socket')
+    return socket_path
+
+
+def get_ref_stamp(git_dir: str, common_dir: str) -> Optional[tuple]:
+    """
+    Loose refs are not stamped one by one, as git replaces them through lock files,
+    which modifies their directories.
+    :returns the stamps of all files and directories, which are changed along with refs or the repository config,
+    or None, if a directory has been modified too recently to tell subsequent modifications apart
+    """
+    racy_time = time.time_ns() - RACY_STAMP_INTERVAL
+    ref_dir_stamp = filesystem.get_dir_tree_stamp(os.path.join(common_dir, 'refs'))
+    if any(stamp is not None and stamp[2] >= racy_time for dir_path, stamp in ref_dir_stamp):
+        return None
+    return (filesystem.get_file_stamp(os.path.join(git_dir, 'HEAD')),
+            filesystem.get_file_stamp(os.path.join(common_dir, 'packed-refs')),
+            filesystem.get_file_stamp(os.path.join(common_dir, 'config'))) \
+        + ref_dir_stamp
+
+
+def is_forwarded(args: dict) -> bool:
+    """
+    :returns True, if the command is executed by a daemon, if one is reachable
+    """
+    if os.environ.get(const.NO_DAEMON_ENV):
+        return False
+    if args.get('--trace') is not None or args.get('--stats'):
+        # timings are recorded in this process
+        return False
+    if args['--hook'] is not None or args['status']:
+        return True
+    if not args['--dry-run'] or not any(args[command] for command in DRY_RUN_COMMANDS):
+        return False
+    # the daemon can not prompt for confirmation, as it has neither a terminal nor the input of the client
+    return bool(args['--batch'] or args.get('--assume-yes'))
+
+
+def forward(args: dict) -> Optional[int]:
+    """
+    Executes a command in a running daemon and prints its output.
+    :returns the exit code or None, if no daemon is reachable
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            client.connect(get_socket_path())
+        except OSError:
+            return None
+
+        request = {
+            'args': args,
+            'cwd': os.getcwd(),
+            'env': {key: value for key, value in os.environ.items() if key.startswith(FORWARDED_ENV_PREFIX)},
+            # ref updates are passed on stdin
+            'stdin': sys.stdin.read() if args['--hook'] == 'pre-push' else None,
+        }
+        client.sendall(json.dumps(request).encode('utf-8'))
+        client.shutdown(socket.SHUT_WR)
+
+        with client.makefile('rb') as response_file:
+            response_data = response_file.read()
+    finally:
+        client.close()
+
+    if not len(response_data):
+        # the daemon terminated during the request
+        return None
+
+    response = json.loads(response_data.decode('utf-8'))
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['exit_code']
+
+
+class RepoState(object):
+    """
+    A context, that is reused for subsequent commands on the same working copy, along with the state of the files,
+    it has been loaded from.
+    """
+    context: 'Context' = None
+    config_stamp: tuple = None
+
+    git_dir: str = None
+    common_dir: str = None
+    # None, if the refs have been modified too recently for a reliable stamp
+    ref_stamp: Optional[tuple] = None
+
+    def __init__(self, context: 'Context'):
+        from gitflow import repotools
+
+        self.context = context
+        self.config_stamp = filesystem.get_file_stamp(context.config_file)
+
+        if context.repo is not None:
+            self.git_dir = repotools.git_get_git_dir(context.repo)
+            self.common_dir = repotools.git_get_common_dir(context.repo)
+        if self.git_dir is not None and self.common_dir is not None:
+            self.ref_stamp = get_ref_stamp(self.git_dir, self.common_dir)
+
+    def is_config_modified(self) -> bool:
+        return filesystem.get_file_stamp(self.context.config_file) != self.config_stamp
+
+    def refresh_refs(self):
+        """
+        Drops the ref snapshot, if any ref has been modified since it was loaded.
+        Caches keyed by commit stay valid.
+        """
+        from gitflow import repotools
+
+        if self.git_dir is not None and self.common_dir is not None:
+            ref_stamp = get_ref_stamp(self.git_dir, self.common_dir)
+            if self.ref_stamp is None or ref_stamp != self.ref_stamp:
+                repotools.invalidate_refs(self.context.repo)
+                self.ref_stamp = ref_stamp
+
+    def close(self):
+        self.context.cleanup()
+
+
+class Daemon(socketserver.UnixStreamServer):
+    execute: typing.Callable[[dict, typing.Callable[[dict, Result], 'Context']], int] = None
+    verbose = const.ERROR_VERBOSITY
+
+    # warm contexts by working copy, least recently used first
+    repos: 'collections.OrderedDict[tuple, RepoState]' = None
+
+    def __init__(self, socket_path: str, execute, verbose: int):
+        self.execute = execute
+        self.verbose = verbose
+        self.repos = collections.OrderedDict()
+        super().__init__(socket_path, DaemonRequestHandler)
+
+    def get_context(self, args: dict, result_out: Result) -> 'Context':
+        from gitflow.context import Context
+
+        key = (os.path.abspath(args['--root']), args['--config'], os.environ.get('GIT_DIR'))
+
+        repo_state = self.repos.pop(key, None)
+        if repo_state is not None and repo_state.is_config_modified():
+            repo_state.close()
+            repo_state = None
+
+        if repo_state is None:
+            repo_state = RepoState(Context.create(args, result_out))
+        else:
+            repo_state.refresh_refs()
+
+        self.repos[key] = repo_state
+        while len(self.repos) > MAX_REPO_COUNT:
+            self.repos.popitem(last=False)[1].close()
+
+        return repo_state.context.derive(args)
+
+    def execute_request(self, request: dict) -> dict:
+        prev_cwd = os.getcwd()
+        prev_env = dict(os.environ)
+        prev_streams = sys.stdin, sys.stdout, sys.stderr
+
+        stdout = StringIO()
+        stderr = StringIO()
+
+        try:
+            os.chdir(request['cwd'])
+            for key in [key for key in os.environ.keys() if key.startswith(FORWARDED_ENV_PREFIX)]:
+                del os.environ[key]
+            os.environ.update(request['env'])
+
+            sys.stdin = StringIO(request['stdin'] or '')
+            sys.stdout = stdout
+            sys.stderr = stderr
+
+            try:
+                exit_code = self.execute(request['args'], self.get_context)
+            except Exception:
+                import traceback
+                traceback.print_exc()
+                exit_code = os.EX_SOFTWARE
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = prev_streams
+            os.environ.clear()
+            os.environ.update(prev_env)
+            os.chdir(prev_cwd)
+
+        if self.verbose >= const.INFO_VERBOSITY:
+            cli.print("{cwd}: {command} => {exit_code}".format(
+                cwd=request['cwd'],
+                command=' '.join(key for key, value in request['args'].items() if value is True),
+                exit_code=exit_code))
+
+        return {
+            'exit_code': exit_code,
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+        }
+
+    def server_close(self):
+        super().server_close()
+        for repo_state in self.repos.values():
+            repo_state.close()
+        self.repos.clear()
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.read().decode('utf-8'))
+        response = self.server.execute_request(request)
+        self.wfile.write(json.dumps(response).encode('utf-8'))
+
+
+def __terminate(signum, frame):
+    sys.exit(os.EX_OK)
+
+
+def serve(args: dict, execute) -> int:
+    """
+    Serves commands until the daemon is terminated.
+    :param execute: executes the docopt arguments of a command with a given context factory
+    """
+    verbose = (args['--verbose'] + 1) // 2
+    socket_path = get_socket_path()
+
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), 0o700, exist_ok=True)
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            cli.eprint(_("A daemon is already listening on {path}.").format(path=repr(socket_path)))
+            return os.EX_UNAVAILABLE
+        except OSError:
+            # stale socket of a terminated daemon
+            os.remove(socket_path)
+        finally:
+            probe.close()
+
+    daemon = Daemon(socket_path, execute, verbose)
+    signal.signal(signal.SIGTERM, __terminate)
+
+    cli.print(_("Listening on {path}.").format(path=repr(socket_path)))
+    sys.stdout.flush()
+
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server_close()
+        try:
+            os.remove(socket_path)
+        except FileNotFoundError:
+            pass
+
+    return os.EX_OK
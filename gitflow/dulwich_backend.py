@@ -0,0 +1,182 @@
+"""
+An in-process git backend on top of dulwich, selected with GITFLOW_GIT_BACKEND=dulwich, if dulwich is installed.
+Operations, that dulwich does not cover, such as pushes and revision expressions, are left to git subprocesses.
+"""
+import os
+import re
+import threading
+import typing
+from typing import Optional, List
+
+from dulwich.errors import MissingCommitError, NotGitRepository, NotTreeError
+from dulwich.graph import find_merge_base
+from dulwich.object_store import tree_lookup_path
+from dulwich.objects import Blob, Commit, Tag, Tree
+from dulwich.refs import check_ref_format
+from dulwich.repo import Repo
+from dulwich.walk import ORDER_TOPO
+
+from gitflow import const
+from gitflow.repotools import RepoContext, SubprocessBackend, ObjectInfo, create_ref_name
+
+# the suffixes of revision expressions, that peel an object, by the type peeled to
+PEEL_SUFFIXES = {
+    '^{}': None,
+    '^{commit}': Commit,
+    '^{tree}': Tree,
+}
+
+
+class DulwichBackend(SubprocessBackend):
+    repo: Repo = None
+    lock: threading.Lock = None
+    """dulwich repositories are not safe for concurrent use"""
+
+    def __init__(self, context: RepoContext, repo: Repo):
+        super().__init__(context)
+        self.repo = repo
+        self.lock = threading.Lock()
+
+    def __resolve_revision(self, revision: str) -> Optional[bytes]:
+        if re.fullmatch(r'[0-9a-f]{40}|[0-9a-f]{64}', revision):
+            return revision.encode('ascii')
+        if not re.fullmatch(r'[\w./-]+', revision):
+            # revision operators
+            return None
+
+        # lookup order of git rev-parse
+        for ref_name in [revision,
+                         create_ref_name('refs', revision),
+                         create_ref_name(const.LOCAL_TAG_PREFIX, revision),
+                         create_ref_name(const.LOCAL_BRANCH_PREFIX, revision),
+                         create_ref_name(const.REMOTES_PREFIX, revision)]:
+            ref_name = ref_name.encode('utf-8')
+            if ref_name in self.repo.refs:
+                return self.repo.refs[ref_name]
+        return None
+
+    def __lookup(self, object_name: str):
+        """
+        :param object_name: an object hash or ref name, optionally followed by a peel suffix or :<path>
+        :returns the object or None, if the name is not supported, in which case git resolves it
+        :raises KeyError: if the object does not exist
+        """
+        revision, separator, path = object_name.partition(':')
+
+        peel = len(separator) > 0
+        peel_type = Tree if peel else None
+        for suffix, suffix_type in PEEL_SUFFIXES.items():
+            if revision.endswith(suffix):
+                revision = revision[:-len(suffix)]
+                peel = True
+                peel_type = peel_type or suffix_type
+                break
+
+        obj_id = self.__resolve_revision(revision)
+        if obj_id is None:
+            return None
+        obj = self.repo.object_store[obj_id]
+
+        if peel:
+            while isinstance(obj, Tag):
+                obj = self.repo.object_store[obj.object[1]]
+            if peel_type is Tree and isinstance(obj, Commit):
+                obj = self.repo.object_store[obj.tree]
+            if peel_type is not None and not isinstance(obj, peel_type):
+                raise KeyError(object_name)
+
+        if len(path):
+            mode, obj_id = tree_lookup_path(self.repo.object_store.__getitem__, obj.id, path.encode('utf-8'))
+            obj = self.repo.object_store[obj_id]
+        return obj
+
+    def get_git_dirs(self) -> typing.Tuple[Optional[str], Optional[str]]:
+        return os.path.abspath(self.repo.controldir()), os.path.realpath(self.repo.commondir())
+
+    def list_history(self, commits: List[str], excluded_commits: List[str]) \
+            -> Optional[List[typing.Tuple[str, int, List[str]]]]:
+        with self.lock:
+            try:
+                walker = self.repo.get_walker(include=[commit.encode('ascii') for commit in commits],
+                                              exclude=[commit.encode('ascii') for commit in excluded_commits],
+                                              order=ORDER_TOPO, reverse=True)
+                return [(entry.commit.id.decode('ascii'),
+                         entry.commit.commit_time,
+                         [parent.decode('ascii') for parent in entry.commit.parents])
+                        for entry in walker]
+            except (KeyError, MissingCommitError):
+                return None
+
+    def merge_base(self, base: str, ref: str) -> Optional[str]:
+        with self.lock:
+            try:
+                base_commit = self.__lookup(base + '^{commit}')
+                ref_commit = self.__lookup(ref + '^{commit}')
+                if base_commit is not None and ref_commit is not None:
+                    merge_bases = find_merge_base(self.repo, [base_commit.id, ref_commit.id])
+                    if len(merge_bases) <= 1:
+                        return merge_bases[0].decode('ascii') if len(merge_bases) else None
+                    # criss-cross merges, git picks the best one of the merge bases
+            except (KeyError, MissingCommitError):
+                return None
+        return super().merge_base(base, ref)
+
+    def read_object(self, object_name: str) -> Optional[typing.Tuple[ObjectInfo, bytes]]:
+        with self.lock:
+            try:
+                obj = self.__lookup(object_name)
+            except (KeyError, NotTreeError):
+                return None
+            if obj is not None:
+                contents = obj.as_raw_string()
+                info = ObjectInfo()
+                info.obj_name = obj.id.decode('ascii')
+                info.obj_type = obj.type_name.decode('ascii')
+                info.obj_size = len(contents)
+                return info, contents
+        return super().read_object(object_name)
+
+    def get_object_info(self, object_name: str) -> Optional[ObjectInfo]:
+        object_contents = self.read_object(object_name)
+        return object_contents[0] if object_contents is not None else None
+
+    def hash_object(self, contents: bytes) -> Optional[str]:
+        blob = Blob.from_string(contents)
+        with self.lock:
+            self.repo.object_store.add_object(blob)
+        return blob.id.decode('ascii')
+
+    def mktree(self, entries: typing.List[typing.Tuple[str, str, str]]) -> Optional[str]:
+        tree = Tree()
+        for mode, name, obj_hash in entries:
+            tree.add(name.encode('utf-8', 'surrogateescape'), int(mode, 8), obj_hash.encode('ascii'))
+        with self.lock:
+            self.repo.object_store.add_object(tree)
+        return tree.id.decode('ascii')
+
+    def tag(self, tag_name: str, object_name: str) -> bool:
+        ref_name = create_ref_name(const.LOCAL_TAG_PREFIX, tag_name).encode('utf-8')
+        if not check_ref_format(ref_name):
+            return False
+        with self.lock:
+            try:
+                obj = self.__lookup(object_name)
+            except KeyError:
+                return False
+            if obj is not None:
+                return self.repo.refs.add_if_new(ref_name, obj.id)
+        return super().tag(tag_name, object_name)
+
+    def close(self):
+        self.repo.close()
+
+
+def create_backend(context: RepoContext) -> Optional[DulwichBackend]:
+    """
+    :returns the backend or None, if the repository can not be opened by dulwich
+    """
+    try:
+        repo = Repo.discover(context.dir)
+    except NotGitRepository:
+        return None
+    return DulwichBackend(context, repo)
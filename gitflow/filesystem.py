@@ -1,7 +1,6 @@
 import os
 import shutil
-
-import appdirs
+from typing import Optional
 
 from gitflow import const
 
@@ -40,6 +39,8 @@ def __get_or_create_dir(parent: str, name: str, mode: int = 0o700) -> str:
 
 
 def get_cache_root_dir() -> str:
+    import appdirs
+
     cache_parent_dir = appdirs.user_cache_dir(appname=const.NAME, appauthor=const.AUTHOR, version=const.VERSION)
     return cache_parent_dir
 
@@ -55,4 +56,37 @@ def get_cache_dir(name: str):
     return __get_or_create_dir(cache_parent_dir, name, 0o700)
 
 
-build_tools_cache_dir = get_cache_dir('build-tools')
+def get_file_stamp(path: str) -> Optional[tuple]:
+    """
+    :returns a tuple, that changes whenever the file is replaced or modified, or None, if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def get_tree_stamp(path: str) -> tuple:
+    """
+    :returns the stamps of a directory and all files below it
+    """
+    stamp = list()
+    for dir_path, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        stamp.append((dir_path, get_file_stamp(dir_path)))
+        for file_name in sorted(file_names):
+            stamp.append((file_name, get_file_stamp(os.path.join(dir_path, file_name))))
+    return tuple(stamp)
+
+
+def get_dir_tree_stamp(path: str) -> tuple:
+    """
+    :returns the stamps of a directory and all directories below it, which change, whenever files are created,
+    renamed or deleted in them, but not when files are modified in place
+    """
+    stamp = list()
+    for dir_path, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        stamp.append((dir_path, get_file_stamp(dir_path)))
+    return tuple(stamp)
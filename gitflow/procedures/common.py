@@ -7,6 +7,10 @@
 #   - version gaps
 #   - potentially undesired effects
 #   - operations involving a push
+import fcntl
+import hashlib
+import itertools
+import json
 import os
 import re
 import shlex
@@ -14,16 +18,17 @@ import shutil
 import subprocess
 import sys
 import tempfile
-from typing import Union
+import typing
+from typing import Union, Dict, Tuple, List, Optional
 
 import semver
 
-from gitflow import cli, _, filesystem, utils
+from gitflow import cli, _, filesystem, utils, tracing
 from gitflow import const
 from gitflow import repotools
 from gitflow import version
 from gitflow.common import Result
-from gitflow.context import Context
+from gitflow.context import Context, parse_config
 from gitflow.properties import PropertyIO
 from gitflow.repotools import BranchSelection, git_get_current_branch, RepoContext
 
@@ -32,11 +37,14 @@ class CommitInfo(object):
     message_parts: list = None
     parents: list = None
     files: list = None
+    blobs: dict = None
+    """blobs to be committed without a working tree, by path"""
 
     def __init__(self):
         self.message_parts = list()
         self.parents = list()
         self.files = list()
+        self.blobs = dict()
 
     def add_parent(self, parent: str):
         self.parents.append(parent)
@@ -48,6 +56,9 @@ class CommitInfo(object):
         if file not in self.files:
             self.files.append(file)
 
+    def add_blob(self, path: str, blob: str):
+        self.blobs[path] = blob
+
     @property
     def message(self) -> str:
         return '\n'.join(self.message_parts) + ('\n' if len(self.message_parts) else '')
@@ -291,7 +302,11 @@ def update_project_property_file(context: Context,
                                  prev_properties: dict,
                                  new_version: str,
                                  new_sequential_version: int,
-                                 commit_out: CommitInfo):
+                                 commit_out: CommitInfo,
+                                 write_blob: bool = False):
+    """
+    :param write_blob: write the property file to the object database instead of the working tree
+    """
     result = Result()
     result.value = False
 
@@ -309,8 +324,18 @@ def update_project_property_file(context: Context,
 
         properties = update_project_properties(context, prev_properties, new_version, new_sequential_version)
 
-        property_reader.write_file(context.config.property_file, properties)
-        commit_out.add_file(context.config.property_file)
+        if write_blob:
+            blob = repotools.git_hash_object(context.repo,
+                                             property_reader.to_bytes(properties, const.DEFAULT_PROPERTY_ENCODING))
+            if blob is None:
+                result.fail(os.EX_DATAERR,
+                            _("Failed to write the property file."),
+                            None)
+            path = os.path.relpath(context.config.property_file, context.root).replace(os.sep, '/')
+            commit_out.add_blob(path, blob)
+        else:
+            property_reader.write_file(context.config.property_file, properties)
+            commit_out.add_file(context.config.property_file)
         result.value = True
     else:
         properties = None
@@ -347,12 +372,18 @@ def execute_version_change_actions(context: Context, old_version: str, new_versi
 
         command = [expand_vars(token, variables) for token in command]
 
-        proc = subprocess.Popen(args=command,
-                                # stdin=subprocess.PIPE,
-                                # stdout=subprocess.PIPE,
-                                cwd=context.repo.dir,
-                                env=None)
-        proc.wait()
+        with tracing.span('version change action', 'action', command=command):
+            tracing.count_fork()
+            proc = subprocess.Popen(args=command,
+                                    # stdin=subprocess.PIPE,
+                                    # stdout=subprocess.PIPE,
+                                    cwd=context.repo.dir,
+                                    env=None)
+            proc.wait()
+
+        # actions may update refs
+        repotools.invalidate_refs(context.repo)
+
         if proc.returncode != os.EX_OK:
             context.fail(os.EX_DATAERR,
                          _("version change action failed."),
@@ -381,25 +412,199 @@ def get_discontinuation_tag_name_for_version(context, version: Union[semver.Vers
         context, version)
 
 
+class VersionTag(object):
+    ref: repotools.Ref = None
+    version: str = None
+    version_info: semver.VersionInfo = None
+
+    def __init__(self, ref: repotools.Ref, version: str, version_info: semver.VersionInfo):
+        self.ref = ref
+        self.version = version
+        self.version_info = version_info
+
+
+class VersionTagIndex(object):
+    """
+    Parsed version tags, grouped by major.minor version and tagged commit.
+    """
+
+    tag_map: dict = None
+    """the tag map this index was built from"""
+    branch_tags: Dict[Tuple[int, int], Dict[str, List[VersionTag]]] = None
+    """(major, minor) => commit => version tags in descending order"""
+
+    def __init__(self, context: Context, tag_map: dict):
+        self.tag_map = tag_map
+        self.branch_tags = dict()
+
+        commit_tag_refs = [(commit, tag_ref) for commit, tag_refs in tag_map.items() for tag_ref in tag_refs]
+        columns = context.version_tag_matcher.parse_many(tag_ref.name for commit, tag_ref in commit_tag_refs)
+
+        for index, (commit, tag_ref) in enumerate(commit_tag_refs):
+            version = columns.versions[index]
+            if version is None:
+                continue
+            version_info = semver.parse_version_info(version)
+            commit_tags = self.branch_tags.setdefault((version_info.major, version_info.minor), dict())
+            commit_tags.setdefault(commit, list()).append(VersionTag(tag_ref, version, version_info))
+
+        for commit_tags in self.branch_tags.values():
+            for version_tags in commit_tags.values():
+                version_tags.sort(key=lambda version_tag: version_tag.version_info, reverse=True)
+
+    def get_commit_tags(self, major: int, minor: int) -> Dict[str, List[VersionTag]]:
+        """
+        :returns a dictionary of all commits with version tags for major.minor
+        """
+        return self.branch_tags.get((major, minor), dict())
+
+
+def get_version_tag_index(context: Context) -> VersionTagIndex:
+    tag_map = repotools.git_get_tag_map(context.repo)
+    if context.version_tag_index is None or context.version_tag_index.tag_map is not tag_map:
+        context.version_tag_index = VersionTagIndex(context, tag_map)
+    return context.version_tag_index
+
+
+# the format version of persisted sequence indices
+SEQUENCE_INDEX_FILE_VERSION = 1
+
+
+class SequenceIndex(object):
+    """
+    The unique codes of all sequential version tags.
+    The index is updated incrementally with the tags added or deleted since the recorded state of the tag files.
+    """
+
+    pattern: str = None
+    """the pattern of the version tag matcher, the codes were extracted with"""
+    stamp: Optional[list] = None
+    """the state of the tag files this index reflects"""
+    tag_map: dict = None
+    """the tag map this index was built from, for repositories without a stamp"""
+    codes: Dict[str, Optional[int]] = None
+    """the unique codes by tag name, None for tags, that are not sequential version tags"""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.codes = dict()
+
+    @staticmethod
+    def read(path: str, pattern: str) -> Optional['SequenceIndex']:
+        try:
+            with open(path, 'r', encoding='utf-8') as index_file:
+                data = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if not isinstance(data, dict) \
+                or data.get('version') != SEQUENCE_INDEX_FILE_VERSION \
+                or data.get('pattern') != pattern:
+            return None
+
+        index = SequenceIndex(pattern)
+        index.stamp = data['stamp']
+        index.codes = data['codes']
+        return index
+
+    def write(self, path: str):
+        temp_path = path + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as index_file:
+            json.dump({
+                'version': SEQUENCE_INDEX_FILE_VERSION,
+                'pattern': self.pattern,
+                'stamp': self.stamp,
+                'codes': self.codes,
+            }, index_file, separators=(',', ':'))
+        filesystem.replace_file(temp_path, path)
+
+    def update(self, matcher: version.VersionMatcher, tag_names: List[str]) -> bool:
+        """
+        Matches the tags, that are not yet indexed, and drops deleted tags.
+        :returns True, if the index has been modified
+        """
+        codes = {tag_name: self.codes[tag_name] for tag_name in tag_names if tag_name in self.codes}
+
+        columns = matcher.parse_many(tag_name for tag_name in tag_names if tag_name not in codes)
+        codes.update(zip(columns.names, columns.unique_code))
+
+        modified = codes != self.codes
+        self.codes = codes
+        return modified
+
+    def get_max_code(self) -> Optional[int]:
+        return max((code for code in self.codes.values() if code is not None), default=None)
+
+    def get_duplicate_codes(self) -> Dict[int, List[str]]:
+        """
+        :returns the names of the tags by code for all codes, that are used by more than one tag
+        """
+        tag_names_by_code = dict()
+        for tag_name, code in self.codes.items():
+            if code is not None:
+                tag_names_by_code.setdefault(code, list()).append(tag_name)
+        return {code: sorted(tag_names) for code, tag_names in tag_names_by_code.items() if len(tag_names) > 1}
+
+    def get_gaps(self) -> List[int]:
+        """
+        :returns the codes missing between the lowest and the highest code
+        """
+        codes = set(code for code in self.codes.values() if code is not None)
+        if not len(codes):
+            return []
+        return [code for code in range(min(codes), max(codes)) if code not in codes]
+
+
+def get_sequence_index(context: Context) -> SequenceIndex:
+    matcher = context.version_tag_matcher
+    pattern = matcher.pattern.pattern
+
+    stamp = repotools.get_tag_stamp(context.repo)
+    if stamp is not None:
+        # in the form read back from the index file
+        stamp = json.loads(json.dumps(stamp))
+
+    index = context.sequence_index
+    if index is not None and stamp is not None and index.stamp == stamp:
+        return index
+
+    cache_file_path = None
+    if stamp is not None and context.repo.persistent_cache:
+        cache_file_path = os.path.join(repotools.get_repo_cache_dir(context.repo, 'sequence'),
+                                       hashlib.sha1(pattern.encode('utf-8')).hexdigest() + '.json')
+        if index is None:
+            index = SequenceIndex.read(cache_file_path, pattern)
+    if index is None:
+        index = SequenceIndex(pattern)
+
+    if stamp is not None and index.stamp == stamp:
+        context.sequence_index = index
+        return index
+
+    tag_map = repotools.git_get_tag_map(context.repo)
+    if stamp is None and index.tag_map is tag_map:
+        return index
+
+    # the stamp is taken before listing, so that concurrent tag updates are picked up by the next update
+    tag_names = [tag_ref.name for tag_ref in repotools.git_list_refs(context.repo,
+                                                                     repotools.create_ref_name(
+                                                                         const.LOCAL_TAG_PREFIX,
+                                                                         matcher.ref_name_infix or ''))]
+    modified = index.update(matcher, tag_names)
+    modified = modified or index.stamp != stamp
+    index.stamp = stamp
+    index.tag_map = tag_map
+
+    if cache_file_path is not None and modified:
+        index.write(cache_file_path)
+
+    context.sequence_index = index
+    return index
+
+
 def get_global_sequence_number(context: Context) -> Union[int, None]:
     if context.version_tag_matcher.group_unique_code:
-        tags = repotools.git_list_refs(context.repo,
-                                       repotools.create_ref_name(
-                                           const.LOCAL_TAG_PREFIX,
-                                           context.version_tag_matcher.ref_name_infix or '')
-                                       )
-        seq = None
-
-        for tag in tags:
-            match = context.version_tag_matcher.fullmatch(tag.name)
-            if match is not None:
-                version_code = int(match.group(context.version_tag_matcher.group_unique_code))
-                if seq is None:
-                    seq = version_code
-                else:
-                    seq = max(seq, version_code)
-
-        return seq
+        return get_sequence_index(context).get_max_code()
     else:
         return None
 
@@ -419,7 +624,7 @@ def get_discontinuation_tags(context, version_branch: Union[repotools.Ref, str])
     discontinuation_tag = repotools.create_ref_name(const.LOCAL_TAG_PREFIX, discontinuation_tag_name)
 
     discontinuation_tags = [discontinuation_tag] \
-        if repotools.git_rev_parse(context.repo, '--verify', discontinuation_tag) is not None \
+        if repotools.get_ref_snapshot(context.repo).get(discontinuation_tag) is not None \
         else []
 
     return discontinuation_tags, discontinuation_tag_name
@@ -535,7 +740,99 @@ def clone_repository(context: Context, branch: str) -> Result:
     return result
 
 
-def create_temp_context(context: Context, result: Result, directory: str) -> Context:
+def checkout_worktree(context: Context, result: Result, commit: str) -> Tuple[RepoContext, typing.IO]:
+    """
+    Checks out a commit detached in one of the reusable worktrees kept in the cache directory.
+    :returns the worktree and its lock file, which must be kept open while the worktree is in use
+    """
+    pool_dir = repotools.get_repo_cache_dir(context.repo, 'worktrees')
+
+    worktree_path = None
+    lock_file = None
+    for index in itertools.count():
+        worktree_path = os.path.join(pool_dir, str(index))
+        lock_file = open(worktree_path + '.lock', 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except BlockingIOError:
+            lock_file.close()
+
+    worktree = RepoContext()
+    worktree.git = context.repo.git
+    worktree.dir = worktree_path
+    worktree.verbose = context.repo.verbose
+
+    reused = False
+    if os.path.isfile(os.path.join(worktree_path, '.git')):
+        returncode, out, err = repotools.git(worktree, 'checkout', '--force', '--detach', commit)
+        if returncode == os.EX_OK:
+            returncode, out, err = repotools.git(worktree, 'clean', '-ffdxq')
+            reused = returncode == os.EX_OK
+
+    if not reused:
+        if os.path.exists(worktree_path):
+            shutil.rmtree(path=worktree_path)
+        repotools.git(context.repo, 'worktree', 'prune')
+        returncode, out, err = repotools.git(context.repo, 'worktree', 'add', '--force', '--detach',
+                                             worktree_path, commit)
+        if returncode != os.EX_OK:
+            lock_file.close()
+            result.fail(os.EX_DATAERR,
+                        _("Failed to create a worktree."),
+                        _("An unexpected error occurred.")
+                        )
+
+    return worktree, lock_file
+
+
+def requires_workspace(context: Context, new_version: Union[str, None]):
+    """
+    :returns True, if a version change requires a checkout to run actions in
+    """
+    return new_version is not None and len(context.config.version_change_actions) > 0
+
+
+def create_workspace(context: Context, result: Result, commit: str) -> Context:
+    """
+    Creates a temporary context with a detached checkout of a commit.
+    Depending on the configuration, this is either a fresh clone or a reusable worktree sharing
+    refs and objects with the repository.
+    """
+    if context.config.workspace == const.WORKSPACE_WORKTREE:
+        worktree, lock_file = checkout_worktree(context, result, commit)
+
+        workspace_context = __create_sub_context(context, result, worktree.dir)
+        if workspace_context.locks is None:
+            workspace_context.locks = list()
+        workspace_context.locks.append(lock_file)
+        workspace_context.config.remote_name = context.config.remote_name
+    else:
+        clone_result = clone_repository(context, context.config.release_branch_base)
+        git_or_fail(clone_result.value, result, ['checkout', '--force', '--detach', commit],
+                    _("Failed to check out release branch."))
+
+        workspace_context = create_temp_context(context, result, clone_result.value.dir)
+        workspace_context.config.remote_name = 'origin'
+    return workspace_context
+
+
+def reuse_workspace(context: Context, result: Result, workspace_context: Context, commit: str) -> Context:
+    """
+    Checks out another commit in a workspace created by create_workspace(), discarding all changes.
+    :returns a new context on the workspace with the configuration of that commit
+    """
+    git_or_fail(workspace_context.repo, result, ['checkout', '--force', '--detach', commit],
+                _("Failed to check out release branch."))
+    git_or_fail(workspace_context.repo, result, ['clean', '-ffdxq'])
+
+    reused_context = __create_sub_context(context, result, workspace_context.repo.dir)
+    reused_context.repo.persistent_cache = workspace_context.repo.persistent_cache
+    reused_context.config.remote_name = workspace_context.config.remote_name
+    return reused_context
+
+
+def __create_sub_context(context: Context, result: Result, directory: str) -> Context:
     clone_context = Context.create({
         '--root': directory,
 
@@ -546,16 +843,22 @@ def create_temp_context(context: Context, result: Result, directory: str) -> Con
 
         '--verbose': context.verbose,
         '--pretty': context.pretty,
-    }, result)
-    if clone_context.temp_dirs is None:
-        clone_context.temp_dirs = list()
-    clone_context.temp_dirs.append(directory)
+    }, result, context)
     if context.clones is None:
         context.clones = list()
     context.clones.append(clone_context)
     return clone_context
 
 
+def create_temp_context(context: Context, result: Result, directory: str) -> Context:
+    clone_context = __create_sub_context(context, result, directory)
+    clone_context.repo.persistent_cache = False
+    if clone_context.temp_dirs is None:
+        clone_context.temp_dirs = list()
+    clone_context.temp_dirs.append(directory)
+    return clone_context
+
+
 def prompt_for_confirmation(context: Context, fail_title: str, message: str, prompt: str):
     result = Result()
 
@@ -652,9 +955,7 @@ def get_command_context(context, object_arg: str) -> CommandContext:
         affected_main_branches = list(
             filter(lambda ref:
                    (ref.name not in command_context.downstreams
-                    and commit in [reachable_commit.obj_name for reachable_commit in
-                                   repotools.git_list_commits(context=context.repo, start=None, end=ref,
-                                                              options=['--first-parent'])]),
+                    and commit in repotools.git_get_first_parent_set(context.repo, ref)),
                    repotools.git_list_refs(context.repo,
                                            '--contains', commit,
                                            repotools.create_ref_name(const.REMOTES_PREFIX,
@@ -706,13 +1007,26 @@ def get_command_context(context, object_arg: str) -> CommandContext:
     return command_context
 
 
-def create_commit(context: Context, result, commit_info: CommitInfo):
-    add_command = ['update-index', '--add', '--']
-    add_command.extend(commit_info.files)
-    git_or_fail(context.repo, result, add_command)
+def create_commit(context: Context, result, commit_info: CommitInfo, tree: str = None):
+    """
+    :param tree: the tree to apply the blobs of commit_info to or None to commit the index of the workspace
+    """
+    if tree is None:
+        add_command = ['update-index', '--add', '--']
+        add_command.extend(commit_info.files)
+        git_or_fail(context.repo, result, add_command)
 
-    write_tree_command = ['write-tree']
-    new_tree = git_for_line_or_fail(context.repo, result, write_tree_command)
+        write_tree_command = ['write-tree']
+        new_tree = git_for_line_or_fail(context.repo, result, write_tree_command)
+    else:
+        new_tree = tree
+        for path, blob in commit_info.blobs.items():
+            new_tree = repotools.git_update_tree(context.repo, new_tree, path, blob)
+            if new_tree is None:
+                result.fail(os.EX_DATAERR,
+                            _("Failed to write tree."),
+                            _("An unexpected error occurred.")
+                            )
 
     commit_command = ['commit-tree']
     for parent in commit_info.parents:
@@ -821,13 +1135,19 @@ def read_config_in_commit(repo: RepoContext, commit: str, config_file_path: str
     if config_file_path is None:
         config_str = None
         for config_filename in const.DEFAULT_CONFIGURATION_FILE_NAMES:
-            config_str = repotools.get_file_contents(
-                repo,
-                commit,
-                config_filename
-            )
-            if config_filename is not None:
+            try:
+                config_str = repotools.get_file_contents(
+                    repo,
+                    commit,
+                    config_filename
+                )
+            except FileNotFoundError:
+                continue
+            if config_str is not None:
+                config_file_path = config_filename
                 break
+        if config_str is None:
+            raise FileNotFoundError("Not such file: " + ', '.join(const.DEFAULT_CONFIGURATION_FILE_NAMES))
     else:
         config_str = repotools.get_file_contents(
             repo,
@@ -836,8 +1156,7 @@ def read_config_in_commit(repo: RepoContext, commit: str, config_file_path: str
         )
 
     if config_str is not None:
-        config = PropertyIO.get_instance_by_filename(config_file_path).from_bytes(config_str,
-                                                                                  const.DEFAULT_PROPERTY_ENCODING)
+        config = parse_config(config_file_path, config_str)
     else:
         config = None
     return config
@@ -985,10 +1304,12 @@ def execute_build_steps(command_context: CommandContext, types: list = None):
 
                 if not command_context.context.dry_run:
                     try:
-                        proc = subprocess.Popen(args=command,
-                                                stdin=subprocess.PIPE,
-                                                cwd=command_context.context.root)
-                        proc.wait()
+                        with tracing.span(stage.name + ':' + step.name, 'build', command=command):
+                            tracing.count_fork()
+                            proc = subprocess.Popen(args=command,
+                                                    stdin=subprocess.PIPE,
+                                                    cwd=command_context.context.root)
+                            proc.wait()
                         if proc.returncode != os.EX_OK:
                             command_context.fail(os.EX_DATAERR,
                                                  _("{stage}:{step} failed.")
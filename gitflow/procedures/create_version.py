@@ -1,10 +1,11 @@
 import json
 import os
-from typing import Callable, Optional
+import re
+from typing import Callable, Optional, List, Dict
 
 import semver
 
-from gitflow import utils, _, version, repotools, cli, const
+from gitflow import _, version, repotools, cli, const
 from gitflow.common import Result
 from gitflow.const import BranchClass
 from gitflow.context import Context
@@ -14,14 +15,34 @@ from gitflow.procedures.common import get_command_context, check_requirements, g
     git_or_fail, get_tag_name_for_version, \
     CommitInfo, update_project_property_file, create_commit, prompt_for_confirmation, \
     check_in_repo, read_properties_in_commit, read_config_in_commit, get_global_sequence_number, \
-    execute_version_change_actions, create_temp_context, clone_repository
+    execute_version_change_actions, get_version_tag_index, get_discontinuation_tags, requires_workspace, \
+    create_workspace, reuse_workspace
 from gitflow.procedures.scheme import scheme_procedures
-from gitflow.repotools import BranchSelection, RepoContext
+from gitflow.repotools import BranchSelection
 from gitflow.version import VersionConfig
 
 
-def create_version_tag(command_context: CommandContext,
-                       operation: Callable[[VersionConfig, Optional[str], Optional[int]], Result]) -> Result:
+class VersionTagChange(object):
+    """
+    A planned version increment on a release branch, committed but not yet pushed.
+    """
+    command_context: CommandContext = None
+    workspace_context: Context = None
+    """the workspace, the version increment has been committed in, or None"""
+    tag_name: str = None
+    new_version: str = None
+    refspecs: List[str] = None
+    leases: Dict[str, str] = None
+
+
+def plan_version_tag(command_context: CommandContext,
+                     operation: Callable[[VersionConfig, Optional[str], Optional[int]], Result],
+                     workspace_context: Context = None) -> Result:
+    """
+    Determines the new version for the selected release branch and commits the version increment.
+    :param workspace_context: a workspace of a preceding change to reuse, if one is required
+    :returns the VersionTagChange to be pushed with push_version_tags()
+    """
     result = Result()
     context: Context = command_context.context
 
@@ -61,6 +82,8 @@ def create_version_tag(command_context: CommandContext,
     before_commit = False
     before_selected_branch = False
 
+    version_tag_index = get_version_tag_index(context)
+
     for release_branch in release_branches:
         # fork_point = repotools.git_merge_base(context.repo, context.config.release_branch_base,
         #                                       command_context.selected_commit)
@@ -80,6 +103,11 @@ def create_version_tag(command_context: CommandContext,
 
         on_selected_branch = not before_selected_branch and release_branch.name == selected_branch.name
 
+        # version tags matching the branch version
+        branch_commit_tags = version_tag_index.get_commit_tags(branch_base_version_info.major,
+                                                               branch_base_version_info.minor)
+        unvisited_tagged_commits = set(branch_commit_tags.keys())
+
         for history_commit in repotools.git_list_commits(
                 context=context.repo,
                 start=fork_point,
@@ -87,42 +115,15 @@ def create_version_tag(command_context: CommandContext,
                 options=const.BRANCH_COMMIT_SCAN_OPTIONS):
             at_commit = not before_commit and on_selected_branch and history_commit.obj_name == command_context.selected_commit
 
-            version_tag_refs = None
-
             assert not at_commit if before_commit else not before_commit
 
-            for tag_ref in repotools.git_get_tags_by_referred_object(context.repo, history_commit.obj_name):
-                version_info = context.version_tag_matcher.to_version_info(tag_ref.name)
-                if version_info is not None:
-                    tag_matches = version_info.major == branch_base_version_info.major \
-                                  and version_info.minor == branch_base_version_info.minor
-
-                    if tag_matches:
-                        if version_tag_refs is None:
-                            version_tag_refs = list()
-                        version_tag_refs.append(tag_ref)
-                    else:
-                        if fork_point is not None:
-                            # fail stray tags on exclusive branch commits
-                            result.fail(os.EX_DATAERR,
-                                        _("Cannot bump version."),
-                                        _("Found stray version tag: {version}.")
-                                        .format(version=repr(version.format_version_info(version_info)))
-                                        )
-                        else:
-                            # when no merge base is used, abort at the first mismatching tag
-                            break
-
-            if not abort_version_scan and version_tag_refs is not None and len(version_tag_refs):
-                version_tag_refs.sort(
-                    reverse=True,
-                    key=utils.cmp_to_key(
-                        lambda tag_ref_a, tag_ref_b: semver.compare(
-                            context.version_tag_matcher.format(tag_ref_a.name),
-                            context.version_tag_matcher.format(tag_ref_b.name)
-                        )
-                    )
-                )
+            version_tags = branch_commit_tags.get(history_commit.obj_name)
+            if version_tags is not None:
+                unvisited_tagged_commits.discard(history_commit.obj_name)
+
+            if not abort_version_scan and version_tags is not None and len(version_tags):
+                version_tag_refs = [version_tag.ref for version_tag in version_tags]
+
                 if latest_version_tag is None:
                     latest_version_tag = version_tag_refs[0]
                 if at_commit:
@@ -132,11 +133,12 @@ def create_version_tag(command_context: CommandContext,
                         preceding_version_tag = version_tag_refs[0]
                     if on_selected_branch and preceding_branch_version_tag is None:
                         preceding_branch_version_tag = version_tag_refs[0]
-                else:
+                elif on_selected_branch:
+                    # versions on later release branches do not conflict, their major.minor differs
                     subsequent_version_tags.extend(version_tag_refs)
 
-                for tag_ref in version_tag_refs:
-                    enclosing_versions.add(context.version_tag_matcher.format(tag_ref.name))
+                for version_tag in version_tags:
+                    enclosing_versions.add(version_tag.version)
 
                 if before_commit:
                     abort_version_scan = True
@@ -144,6 +146,11 @@ def create_version_tag(command_context: CommandContext,
             if at_commit:
                 before_commit = True
 
+            # the remaining history does not contribute any further tags
+            if abort_version_scan \
+                    or (not len(unvisited_tagged_commits) and (before_commit or not on_selected_branch)):
+                break
+
         if on_selected_branch:
             before_commit = True
             before_selected_branch = True
@@ -318,50 +325,30 @@ def create_version_tag(command_context: CommandContext,
                         _("The new version is lower than or equal to the current version.")
                         )
 
-        if context.config.push_to_local \
-                and command_context.current_branch.short_name == command_context.selected_ref.short_name:
-            if context.verbose:
-                cli.print(
-                    _('Checking out {base_branch} in order to avoid failing the push to a checked-out release branch')
-                        .format(base_branch=repr(context.config.release_branch_base)))
-
-            git_or_fail(context.repo, result, ['checkout', context.config.release_branch_base])
-            original_current_branch = command_context.current_branch
-        else:
-            original_current_branch = None
-
         branch_name = get_branch_name_for_version(context, new_version_info)
         tag_name = get_tag_name_for_version(context, new_version_info)
 
-        clone_result = clone_repository(context, context.config.release_branch_base)
-        cloned_repo = clone_result.value
-
         commit_info = CommitInfo()
         commit_info.add_message("#version: " + cli.if_none(new_version))
 
-        # run version change hooks on release branch
-        checkout_command = ['checkout', '--force', '--track', '-b', branch_name,
-                            repotools.create_ref_name(const.REMOTES_PREFIX,
-                                                      context.config.remote_name,
-                                                      branch_name)]
-        returncode, out, err = repotools.git(cloned_repo, *checkout_command)
-        if returncode != os.EX_OK:
-            result.fail(os.EX_DATAERR,
-                        _("Failed to check out release branch."),
-                        _("An unexpected error occurred.")
-                        )
-
-        clone_context: Context = create_temp_context(context, result, cloned_repo.dir)
-        clone_context.config.remote_name = 'origin'
+        # run version change hooks on the release branch, other changes do not need a checkout
+        if not requires_workspace(context, new_version):
+            workspace_context = None
+        elif workspace_context is None:
+            workspace_context = create_workspace(context, result, command_context.selected_commit)
+        else:
+            workspace_context = reuse_workspace(context, result, workspace_context, command_context.selected_commit)
 
         if (context.config.commit_version_property and new_version is not None) \
                 or (context.config.commit_sequential_version_property and new_sequential_version is not None):
 
-            update_result = update_project_property_file(clone_context,
+            update_result = update_project_property_file(workspace_context
+                                                         if workspace_context is not None else context,
                                                          properties_in_selected_commit,
                                                          new_version,
                                                          new_sequential_version,
-                                                         commit_info)
+                                                         commit_info,
+                                                         write_blob=workspace_context is None)
             result.add_subresult(update_result)
             if result.has_errors():
                 result.fail(os.EX_DATAERR,
@@ -369,8 +356,8 @@ def create_version_tag(command_context: CommandContext,
                             _("An unexpected error occurred.")
                             )
 
-        if new_version is not None:
-            execute_version_change_actions(clone_context, latest_branch_version, new_version)
+        if workspace_context is not None and new_version is not None:
+            execute_version_change_actions(workspace_context, latest_branch_version, new_version)
 
         if commit_info is not None:
             if command_context.selected_commit != command_context.selected_ref.target.obj_name:
@@ -383,7 +370,11 @@ def create_version_tag(command_context: CommandContext,
 
             # commit changes
             commit_info.add_parent(command_context.selected_commit)
-            object_to_tag = create_commit(clone_context, result, commit_info)
+            if workspace_context is not None:
+                object_to_tag = create_commit(workspace_context, result, commit_info)
+            else:
+                object_to_tag = create_commit(context, result, commit_info,
+                                              command_context.selected_commit + '^{tree}')
             new_branch_ref_object = object_to_tag
         else:
             object_to_tag = command_context.selected_commit
@@ -393,7 +384,7 @@ def create_version_tag(command_context: CommandContext,
         #                                                                   '--contains', object_to_tag,
         #                                                                   command_context.selected_branch.ref):
 
-        # show info and prompt for confirmation
+        # show info
         cli.print("ref                 : " + cli.if_none(command_context.selected_ref.name))
         cli.print("ref_" + const.DEFAULT_VERSION_VAR_NAME + "         : " + cli.if_none(latest_branch_version))
         cli.print("new_tag             : " + cli.if_none(tag_name))
@@ -401,59 +392,117 @@ def create_version_tag(command_context: CommandContext,
         cli.print("selected object     : " + cli.if_none(command_context.selected_commit))
         cli.print("tagged object       : " + cli.if_none(object_to_tag))
 
-        prompt_result = prompt_for_confirmation(
-            context=context,
-            fail_title=_("Failed to create release tag based on {branch}.")
-                .format(branch=repr(command_context.selected_ref.name)),
-            message=_("The tags are about to be pushed."),
-            prompt=_("Continue?"),
-        )
-        result.add_subresult(prompt_result)
-        if result.has_errors() or not prompt_result.value:
-            return result
-
-        # push atomically
-        push_command = ['push', '--atomic']
-        if context.dry_run:
-            push_command.append('--dry-run')
-        if context.verbose:
-            push_command.append('--verbose')
-        push_command.append(context.config.remote_name)
+        change = VersionTagChange()
+        change.command_context = command_context
+        change.workspace_context = workspace_context
+        change.tag_name = tag_name
+        change.new_version = new_version
+        change.refspecs = list()
+        change.leases = dict()
 
         # push the release branch commit or its version increment commit
         if new_branch_ref_object is not None:
-            push_command.append(
+            change.refspecs.append(
                 new_branch_ref_object + ':' + repotools.create_ref_name(const.LOCAL_BRANCH_PREFIX, branch_name))
 
         # check, if preceding tags exist on remote
         if preceding_version_tag is not None:
-            push_command.append('--force-with-lease='
-                                + preceding_version_tag.name + ':'
-                                + preceding_version_tag.name)
+            change.leases[preceding_version_tag.name] = preceding_version_tag.name
 
         # push the new version tag or fail if it exists
-        push_command.extend(['--force-with-lease=' + repotools.create_ref_name(const.LOCAL_TAG_PREFIX, tag_name) + ':',
-                             repotools.ref_target(object_to_tag) + ':' + repotools.create_ref_name(
-                                 const.LOCAL_TAG_PREFIX, tag_name)])
+        change.leases[repotools.create_ref_name(const.LOCAL_TAG_PREFIX, tag_name)] = ''
+        change.refspecs.append(repotools.ref_target(object_to_tag) + ':' + repotools.create_ref_name(
+            const.LOCAL_TAG_PREFIX, tag_name))
 
-        returncode, out, err = repotools.git(clone_context.repo, *push_command)
-        if returncode != os.EX_OK:
-            result.fail(os.EX_DATAERR,
-                        _("Failed to push."),
-                        _("git push exited with " + str(returncode))
-                        )
+        result.value = change
+
+    return result
 
-        if original_current_branch is not None:
-            if context.verbose:
-                cli.print(
-                    _('Switching back to {original_branch} ')
-                        .format(original_branch=repr(original_current_branch.name)))
 
-            git_or_fail(context.repo, result, ['checkout', original_current_branch.short_name])
+def push_version_tags(context: Context, changes: List[VersionTagChange]) -> Result:
+    """
+    Prompts for confirmation once and pushes the branches and tags of all planned changes in a single atomic push.
+    """
+    result = Result()
+
+    prompt_result = prompt_for_confirmation(
+        context=context,
+        fail_title=_("Failed to create release tag based on {branch}.")
+            .format(branch=', '.join(repr(change.command_context.selected_ref.name) for change in changes)),
+        message=_("The tags are about to be pushed."),
+        prompt=_("Continue?"),
+    )
+    result.add_subresult(prompt_result)
+    if result.has_errors() or not prompt_result.value:
+        return result
+
+    original_current_branch = None
+    if context.config.push_to_local:
+        for change in changes:
+            command_context = change.command_context
+            if command_context.current_branch.short_name == command_context.selected_ref.short_name:
+                if context.verbose:
+                    cli.print(
+                        _('Checking out {base_branch} in order to avoid failing the push to a checked-out release branch')
+                            .format(base_branch=repr(context.config.release_branch_base)))
+
+                git_or_fail(context.repo, result, ['checkout', context.config.release_branch_base])
+                original_current_branch = command_context.current_branch
+                break
+
+    # push atomically, changes requiring a workspace share the one of the last change
+    push_context = changes[-1].workspace_context if changes[-1].workspace_context is not None else context
+    refspecs = list()
+    leases = dict()
+    for change in changes:
+        refspecs.extend(change.refspecs)
+        leases.update(change.leases)
+
+    returncode = repotools.git_push(push_context.repo, push_context.config.remote_name, refspecs, leases,
+                                    atomic=True, dry_run=context.dry_run, verbose=bool(context.verbose))
+    if returncode != os.EX_OK:
+        result.fail(os.EX_DATAERR,
+                    _("Failed to push."),
+                    _("git push exited with " + str(returncode))
+                    )
+
+    if original_current_branch is not None:
+        if context.verbose:
+            cli.print(
+                _('Switching back to {original_branch} ')
+                    .format(original_branch=repr(original_current_branch.name)))
+
+        git_or_fail(context.repo, result, ['checkout', original_current_branch.short_name])
 
     return result
 
 
+def create_version_tags(command_contexts: List[CommandContext],
+                        operation: Callable[[VersionConfig, Optional[str], Optional[int]], Result]) -> Result:
+    """
+    Bumps the versions of several release branches, reusing one workspace and pushing once.
+    """
+    result = Result()
+
+    changes = list()
+    workspace_context = None
+    for command_context in command_contexts:
+        plan_result = plan_version_tag(command_context, operation, workspace_context)
+        result.add_subresult(plan_result)
+        changes.append(plan_result.value)
+        workspace_context = plan_result.value.workspace_context
+
+    push_result = push_version_tags(command_contexts[0].context, changes)
+    result.add_subresult(push_result)
+
+    return result
+
+
+def create_version_tag(command_context: CommandContext,
+                       operation: Callable[[VersionConfig, Optional[str], Optional[int]], Result]) -> Result:
+    return create_version_tags([command_context], operation)
+
+
 def create_version_branch(command_context: CommandContext,
                           operation: Callable[[VersionConfig, Optional[str], Optional[int]], Result]) -> Result:
     result = Result()
@@ -476,9 +525,12 @@ def create_version_branch(command_context: CommandContext,
         context.config.remote_name,
         'release'])))
 
+    release_branches = context.get_release_branches()
+    merge_bases = repotools.git_merge_bases(context.repo, [(context.config.release_branch_base, release_branch)
+                                                           for release_branch in release_branches])
+
     release_branch_merge_bases = dict()
-    for release_branch in context.get_release_branches():
-        merge_base = repotools.git_merge_base(context.repo, context.config.release_branch_base, release_branch)
+    for release_branch, merge_base in zip(release_branches, merge_bases):
         if merge_base is None:
             result.fail(os.EX_DATAERR,
                         "Failed to resolve merge base.",
@@ -507,12 +559,7 @@ def create_version_branch(command_context: CommandContext,
 
             branch_refs.sort(
                 reverse=True,
-                key=utils.cmp_to_key(
-                    lambda tag_ref_a, tag_ref_b: semver.compare(
-                        context.release_branch_matcher.format(tag_ref_a.name),
-                        context.release_branch_matcher.format(tag_ref_b.name)
-                    )
-                )
+                key=lambda tag_ref: context.release_branch_matcher.key(tag_ref.name)
             )
             if latest_branch is None:
                 latest_branch = branch_refs[0]
@@ -535,12 +582,7 @@ def create_version_branch(command_context: CommandContext,
 
             branch_refs.sort(
                 reverse=True,
-                key=utils.cmp_to_key(
-                    lambda tag_ref_a, tag_ref_b: semver.compare(
-                        context.release_branch_matcher.format(tag_ref_a.name),
-                        context.release_branch_matcher.format(tag_ref_b.name)
-                    )
-                )
+                key=lambda tag_ref: context.release_branch_matcher.key(tag_ref.name)
             )
             # for tag_ref in tag_refs:
             #     print('>>' + tag_ref.name)
@@ -645,17 +687,11 @@ def create_version_branch(command_context: CommandContext,
         branch_name = get_branch_name_for_version(context, new_version_info)
         tag_name = get_tag_name_for_version(context, new_version_info)
 
-        clone_result = clone_repository(context, context.config.release_branch_base)
-        cloned_repo: RepoContext = clone_result.value
-
-        # run version change hooks on new release branch
-        git_or_fail(cloned_repo, result, ['checkout', '--force',
-                                          '-b', branch_name,
-                                          command_context.selected_commit],
-                    _("Failed to check out release branch."))
-
-        clone_context: Context = create_temp_context(context, result, cloned_repo.dir)
-        clone_context.config.remote_name = 'origin'
+        # run version change hooks on new release branch, other changes do not need a checkout
+        if requires_workspace(context, new_version):
+            workspace_context: Context = create_workspace(context, result, command_context.selected_commit)
+        else:
+            workspace_context = None
 
         commit_info = CommitInfo()
         commit_info.add_message("#version: " + cli.if_none(new_version))
@@ -663,11 +699,13 @@ def create_version_branch(command_context: CommandContext,
         if (context.config.commit_version_property and new_version is not None) \
                 or (context.config.commit_sequential_version_property and new_sequential_version is not None):
 
-            update_result = update_project_property_file(clone_context,
+            update_result = update_project_property_file(workspace_context
+                                                         if workspace_context is not None else context,
                                                          properties_in_selected_commit,
                                                          new_version,
                                                          new_sequential_version,
-                                                         commit_info)
+                                                         commit_info,
+                                                         write_blob=workspace_context is None)
             result.add_subresult(update_result)
             if result.has_errors():
                 result.fail(os.EX_DATAERR,
@@ -675,8 +713,8 @@ def create_version_branch(command_context: CommandContext,
                             _("An unexpected error occurred.")
                             )
 
-        if new_version is not None:
-            execute_version_change_actions(clone_context, latest_branch_version, new_version)
+        if workspace_context is not None and new_version is not None:
+            execute_version_change_actions(workspace_context, latest_branch_version, new_version)
 
         if commit_info is not None:
             if command_context.selected_commit != command_context.selected_ref.target.obj_name:
@@ -689,7 +727,11 @@ def create_version_branch(command_context: CommandContext,
 
             # commit changes
             commit_info.add_parent(command_context.selected_commit)
-            object_to_tag = create_commit(clone_context, result, commit_info)
+            if workspace_context is not None:
+                object_to_tag = create_commit(workspace_context, result, commit_info)
+            else:
+                object_to_tag = create_commit(context, result, commit_info,
+                                              command_context.selected_commit + '^{tree}')
         else:
             object_to_tag = command_context.selected_commit
 
@@ -713,35 +755,62 @@ def create_version_branch(command_context: CommandContext,
             return result
 
         # push atomically
-        push_command = ['push', '--atomic']
-        if context.dry_run:
-            push_command.append('--dry-run')
-        if context.verbose:
-            push_command.append('--verbose')
-        push_command.append(context.config.remote_name)
+        push_context = workspace_context if workspace_context is not None else context
+        refspecs = list()
+        leases = dict()
 
         # push the base branch commit
-        # push_command.append(commit + ':' + const.LOCAL_BRANCH_PREFIX + selected_ref.local_branch_name)
+        # refspecs.append(commit + ':' + const.LOCAL_BRANCH_PREFIX + selected_ref.local_branch_name)
 
         # push the new branch or fail if it exists
-        push_command.extend(
-            ['--force-with-lease=' + repotools.create_ref_name(const.LOCAL_BRANCH_PREFIX, branch_name) + ':',
-             repotools.ref_target(object_to_tag) + ':' + repotools.create_ref_name(const.LOCAL_BRANCH_PREFIX,
-                                                                                   branch_name)])
+        leases[repotools.create_ref_name(const.LOCAL_BRANCH_PREFIX, branch_name)] = ''
+        refspecs.append(repotools.ref_target(object_to_tag) + ':' + repotools.create_ref_name(
+            const.LOCAL_BRANCH_PREFIX, branch_name))
         # push the new version tag or fail if it exists
-        push_command.extend(['--force-with-lease=' + repotools.create_ref_name(const.LOCAL_TAG_PREFIX, tag_name) + ':',
-                             repotools.ref_target(object_to_tag) + ':' + repotools.create_ref_name(
-                                 const.LOCAL_TAG_PREFIX, tag_name)])
+        leases[repotools.create_ref_name(const.LOCAL_TAG_PREFIX, tag_name)] = ''
+        refspecs.append(repotools.ref_target(object_to_tag) + ':' + repotools.create_ref_name(
+            const.LOCAL_TAG_PREFIX, tag_name))
 
-        git_or_fail(cloned_repo, result, push_command, _("Failed to push."))
+        returncode = repotools.git_push(push_context.repo, push_context.config.remote_name, refspecs, leases,
+                                        atomic=True, dry_run=context.dry_run, verbose=bool(context.verbose))
+        if returncode != os.EX_OK:
+            result.fail(os.EX_DATAERR, _("Failed to push."), None)
 
     return result
 
 
+def get_active_release_branch_names(context: Context) -> List[str]:
+    """
+    :returns the names of the release branches on the remote, that have not been discontinued, in version order
+    """
+    branch_names = list()
+    for release_branch in context.get_release_branches(reverse=False):
+        if release_branch.remote == context.config.remote_name \
+                and not len(get_discontinuation_tags(context, release_branch)[0]):
+            branch_names.append(re.fullmatch(const.BRANCH_PATTERN, release_branch.name).group('name'))
+    return branch_names
+
+
+def get_object_args(context: Context) -> List[Optional[str]]:
+    """
+    :returns the objects to bump, [None] selects the current branch
+    """
+    if context.args.get('--all-active'):
+        object_args = get_active_release_branch_names(context)
+        if not len(object_args):
+            context.fail(os.EX_USAGE,
+                         _("Version creation failed."),
+                         _("There are no active release branches."))
+        return object_args
+    return [context.args['<object>']] + (context.args.get('<other-object>') or [])
+
+
 def call(context: Context, operation: Callable[[VersionConfig, Optional[str], Optional[int]], Result]) -> Result:
+    object_args = get_object_args(context)
+
     command_context = get_command_context(
         context=context,
-        object_arg=context.args['<object>']
+        object_arg=object_args[0]
     )
 
     check_in_repo(command_context)
@@ -767,16 +836,36 @@ def call(context: Context, operation: Callable[[VersionConfig, Optional[str], Op
             or operation == scheme_procedures.version_bump_prerelease \
             or operation == scheme_procedures.version_bump_to_release:
 
-        check_requirements(command_context=command_context,
-                           ref=command_context.selected_ref,
-                           branch_classes=[BranchClass.RELEASE],
-                           modifiable=True,
-                           with_upstream=True,  # not context.config.push_to_local
-                           in_sync_with_upstream=True,
-                           fail_message=_("Version creation failed.")
-                           )
-
-        tag_result = create_version_tag(command_context, operation)
+        if len(object_args) > 1 and context.config.tie_sequential_version_to_semantic_version:
+            command_context.fail(os.EX_USAGE,
+                                 _("Version creation failed."),
+                                 _("Sequential versions are only incremented on the latest release branch,"
+                                   " bump one branch at a time."))
+
+        # plan all version increments up front, so that they can be pushed together
+        command_contexts = [command_context]
+        for object_arg in object_args[1:]:
+            command_contexts.append(get_command_context(context=context, object_arg=object_arg))
+
+        selected_branch_names = set()
+        for branch_command_context in command_contexts:
+            check_requirements(command_context=branch_command_context,
+                               ref=branch_command_context.selected_ref,
+                               branch_classes=[BranchClass.RELEASE],
+                               modifiable=True,
+                               with_upstream=True,  # not context.config.push_to_local
+                               in_sync_with_upstream=True,
+                               fail_message=_("Version creation failed.")
+                               )
+            branch_name = re.fullmatch(const.BRANCH_PATTERN, branch_command_context.selected_ref.name).group('name')
+            if branch_name in selected_branch_names:
+                command_context.fail(os.EX_USAGE,
+                                     _("Version creation failed."),
+                                     _("{branch} has been selected more than once.")
+                                     .format(branch=repr(branch_command_context.selected_ref.name)))
+            selected_branch_names.add(branch_name)
+
+        tag_result = create_version_tags(command_contexts, operation)
         command_context.add_subresult(tag_result)
 
     elif isinstance(operation, scheme_procedures.VersionSet):
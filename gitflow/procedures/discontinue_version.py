@@ -5,8 +5,8 @@ from gitflow.common import Result
 from gitflow.const import BranchClass
 from gitflow.context import Context
 from gitflow.procedures.common import get_command_context, get_branch_info, check_requirements, \
-    get_discontinuation_tags, prompt_for_confirmation, clone_repository, git_or_fail, fetch_all_and_ff, \
-    check_in_repo, prompt, create_temp_context
+    get_discontinuation_tags, prompt_for_confirmation, git_or_fail, fetch_all_and_ff, \
+    check_in_repo, prompt, create_workspace
 from gitflow.repotools import BranchSelection
 
 
@@ -86,22 +86,19 @@ def call(context: Context) -> Result:
         reintegrate = prompt_result.value
 
     if not command_context.has_errors():
-        # run merge on local clone
-
-        clone_result = clone_repository(context, context.config.release_branch_base)
-        clone_context: Context = create_temp_context(context, result, clone_result.value.dir)
-        clone_context.config.remote_name = 'origin'
-
+        workspace_context = None
         changes = list()
 
         if reintegrate:
-            git_or_fail(clone_context.repo, command_context.result,
-                        ['checkout', base_branch_ref.short_name],
-                        _("Failed to checkout branch {branch_name}.")
-                        .format(branch_name=repr(base_branch_ref.short_name))
-                        )
+            # run merge in a temporary workspace
+            base_branch_info = get_branch_info(command_context, base_branch_ref)
+            base_branch_upstream = base_branch_info.upstream \
+                if base_branch_info is not None and base_branch_info.upstream is not None \
+                else base_branch_ref
+
+            workspace_context: Context = create_workspace(context, result, base_branch_upstream.target.obj_name)
 
-            git_or_fail(clone_context.repo, command_context.result,
+            git_or_fail(workspace_context.repo, command_context.result,
                         ['merge', '--no-ff', release_branch_info.upstream.name],
                         _("Failed to merge work branch.\n"
                           "Rebase {work_branch} on {base_branch} and try again")
@@ -123,22 +120,25 @@ def call(context: Context) -> Result:
         if command_context.has_errors() or not prompt_result.value:
             return context.result
 
-        push_command = ['push', '--atomic']
-        if context.dry_run:
-            push_command.append('--dry-run')
-        if context.verbose:
-            push_command.append('--verbose')
-        push_command.append(context.config.remote_name)
-
-        push_command.append(base_branch_ref.name + ':' + repotools.create_ref_name(const.LOCAL_BRANCH_PREFIX,
-                                                                                   base_branch_ref.short_name))
-        push_command.append(
-            '--force-with-lease=' + repotools.create_ref_name(const.LOCAL_TAG_PREFIX, discontinuation_tag_name) + ':')
-        push_command.append(
+        push_context = workspace_context if workspace_context is not None else context
+        refspecs = list()
+
+        if reintegrate:
+            refspecs.append('HEAD:' + repotools.create_ref_name(const.LOCAL_BRANCH_PREFIX,
+                                                                base_branch_ref.short_name))
+        refspecs.append(
             repotools.ref_target(release_branch) + ':' + repotools.create_ref_name(const.LOCAL_TAG_PREFIX,
                                                                                    discontinuation_tag_name))
-
-        git_or_fail(clone_context.repo, command_context.result, push_command)
+        leases = {repotools.create_ref_name(const.LOCAL_TAG_PREFIX, discontinuation_tag_name): ''}
+
+        returncode = repotools.git_push(push_context.repo, push_context.config.remote_name, refspecs, leases,
+                                        atomic=True, dry_run=context.dry_run, verbose=bool(context.verbose))
+        if returncode != os.EX_OK:
+            command_context.result.fail(os.EX_DATAERR,
+                                        _("git {sub_command} failed.")
+                                        .format(sub_command=repr('push')),
+                                        None
+                                        )
 
         fetch_all_and_ff(context.repo, command_context.result, context.config.remote_name)
 
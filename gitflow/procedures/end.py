@@ -1,8 +1,6 @@
 import os
 
-import semver
-
-from gitflow import utils, _, const, repotools, cli
+from gitflow import _, const, repotools, cli
 from gitflow.common import Result
 from gitflow.const import BranchClass
 from gitflow.context import Context
@@ -91,10 +89,8 @@ def call(context: Context) -> Result:
                                                                                  context.config.remote_name,
                                                                                  'release'))
             release_branches = list(release_branches)
-            release_branches.sort(reverse=True, key=utils.cmp_to_key(lambda ref_a, ref_b: semver.compare(
-                context.release_branch_matcher.format(ref_a.name),
-                context.release_branch_matcher.format(ref_b.name)
-            )))
+            release_branches.sort(reverse=True,
+                                  key=lambda ref: context.release_branch_matcher.key(ref.name))
             for release_branch_ref in release_branches:
                 merge_base = repotools.git_merge_base(context.repo, base_branch_ref, work_branch_ref.name)
                 if merge_base is not None:
@@ -1,13 +1,211 @@
+import concurrent.futures
+import json
 import os
 import sys
+from typing import List
 
 import colors
 import semver
 
-from gitflow import repotools, const, cli, _, utils, version
-from gitflow.common import Result
+from gitflow import repotools, const, cli, _, version
+from gitflow.common import Result, Error
+from gitflow.context import Context
 from gitflow.procedures.common import get_branch_version_component_for_version, get_discontinuation_tags, \
-    update_branch_info, get_command_context, check_in_repo
+    update_branch_info, get_command_context, check_in_repo, get_sequence_index, BranchInfo, CommandContext
+
+
+class VersionTagStatus(object):
+    tag: repotools.Ref = None
+    commit: str = None
+    version: str = None
+    code: str = None
+    """the unique code of a sequential version tag"""
+    valid = True
+
+
+class BranchStatus(object):
+    """
+    The analysis of a release branch, which is rendered by the status command.
+    """
+    ref: repotools.Ref = None
+    version: 'version.Version' = None
+    version_string: str = None
+    branch_info: BranchInfo = None
+    discontinued = False
+    version_tags: List[VersionTagStatus] = None
+    """the version tags along the branch, the most recent first"""
+    errors: List[Error] = None
+
+
+def analyze_branch(context: Context, upstreams: dict, branch_ref: repotools.Ref) -> BranchStatus:
+    """
+    Collects the status of a release branch. Safe to be called concurrently for different branches.
+    """
+    branch_status = BranchStatus()
+    branch_status.ref = branch_ref
+    branch_status.version = context.release_branch_matcher.to_version(branch_ref.name)
+    branch_status.version_string = get_branch_version_component_for_version(context, branch_status.version)
+    branch_status.version_tags = list()
+    branch_status.errors = list()
+
+    discontinuation_tags, discontinuation_tag_name = get_discontinuation_tags(context, branch_ref)
+    branch_status.discontinued = len(discontinuation_tags) > 0
+
+    branch_info = branch_status.branch_info = update_branch_info(context, dict(), upstreams, branch_ref)
+
+    if branch_info.local is not None and branch_info.upstream is not None:
+        for local in branch_info.local:
+            if not branch_info.upstream.short_name.endswith('/' + local.short_name):
+                branch_status.errors.append(Error(os.EX_DATAERR,
+                                                  _("Local and upstream branch have a mismatching short name."),
+                                                  None))
+
+    commit_tags = repotools.git_get_branch_tags(context=context.repo,
+                                                base_branch=context.config.release_branch_base,
+                                                branch=branch_ref.name,
+                                                tag_filter=None,
+                                                commit_tag_comparator=None
+                                                )
+
+    commit_tag_refs = [(commit, tag) for commit, tags in commit_tags for tag in tags]
+    columns = context.version_tag_matcher.parse_many(tag.name for commit, tag in commit_tag_refs)
+
+    for index, (commit, tag) in enumerate(commit_tag_refs):
+        version_tag = VersionTagStatus()
+        version_tag.tag = tag
+        version_tag.commit = commit.obj_name
+
+        version_tag.code = columns.unique_code_strings[index]
+
+        version_tag.version = columns.versions[index] or None
+        if version_tag.version is not None:
+            version_info = semver.parse_version_info(version_tag.version)
+            if version_info.major != branch_status.version.major \
+                    or version_info.minor != branch_status.version.minor:
+                version_tag.valid = False
+                branch_status.errors.append(Error(os.EX_DATAERR,
+                                                  _("Invalid version tag {tag}.")
+                                                  .format(tag=repr(tag.name)),
+                                                  _("The major.minor part of the new version {new_version}"
+                                                    " does not match the branch version {branch_version}.")
+                                                  .format(new_version=repr(version_tag.version),
+                                                          branch_version=repr(branch_status.version_string))
+                                                  ))
+
+        if version_tag.code is not None or version_tag.version is not None:
+            branch_status.version_tags.append(version_tag)
+
+    return branch_status
+
+
+def check_unique_codes(branch_status: BranchStatus, unique_codes: set, unique_version_codes: set):
+    """
+    Checks the sequential version tags of a branch against those of the previously checked branches.
+    """
+    for version_tag in branch_status.version_tags:
+        if version_tag.code is not None:
+            unique_version_codes.add(int(version_tag.code))
+
+            if version_tag.code in unique_codes:
+                branch_status.errors.append(Error(os.EX_DATAERR,
+                                                  _("Invalid sequential version tag {tag}.")
+                                                  .format(tag=version_tag.tag.name),
+                                                  _("The code element of version {version_string} is not unique.")
+                                                  .format(version_string=version_tag.code)
+                                                  ))
+            else:
+                unique_codes.add(version_tag.code)
+
+
+def print_branch_status(context: Context, branch_status: BranchStatus):
+    branch_info = branch_status.branch_info
+
+    if branch_status.discontinued:
+        status_color = colors.partial(colors.color, fg='gray')
+        status_error_color = colors.partial(colors.color, fg='red')
+        status_local_color = colors.partial(colors.color, fg='blue')
+        status_remote_color = colors.partial(colors.color, fg='green')
+    else:
+        status_color = colors.partial(colors.color, fg='white', style='bold')
+        status_error_color = colors.partial(colors.color, fg='red', style='bold')
+        status_local_color = colors.partial(colors.color, fg='blue', style='bold')
+        status_remote_color = colors.partial(colors.color, fg='green', style='bold')
+
+    error_color = colors.partial(colors.color, fg='white', bg='red', style='bold')
+
+    cli.fcwrite(sys.stdout, status_color, "version: " + branch_status.version_string + ' [')
+    if branch_info.local is not None:
+        i = 0
+        for local in branch_info.local:
+            local_branch_color = status_local_color
+            if branch_info.upstream is not None \
+                    and not branch_info.upstream.short_name.endswith('/' + local.short_name):
+                local_branch_color = error_color
+            if i:
+                cli.fcwrite(sys.stdout, status_color, ', ')
+            if context.verbose:
+                cli.fcwrite(sys.stdout, local_branch_color, local.name)
+            else:
+                cli.fcwrite(sys.stdout, local_branch_color, local.short_name)
+            i += 1
+    if branch_info.upstream is not None:
+        if branch_info.local is not None and len(branch_info.local):
+            cli.fcwrite(sys.stdout, status_color, ' => ')
+        if context.verbose:
+            cli.fcwrite(sys.stdout, status_remote_color, branch_info.upstream.name)
+        else:
+            cli.fcwrite(sys.stdout, status_remote_color, branch_info.upstream.short_name)
+    cli.fcwrite(sys.stdout, status_color, "]")
+    if branch_status.discontinued:
+        cli.fcwrite(sys.stdout, status_color, ' (' + _('discontinued') + ')')
+
+    cli.fcwriteln(sys.stdout, status_color)
+
+    for version_tag in branch_status.version_tags:
+        if version_tag.code is not None:
+            cli.fcwriteln(sys.stdout, status_color, "  code: " + version_tag.code)
+        if version_tag.version is not None:
+            cli.fcwriteln(sys.stdout, status_color if version_tag.valid else status_error_color,
+                          "    " + version_tag.version)
+
+
+def get_error_records(errors: List[Error]) -> list:
+    return [{'message': error.message, 'reason': error.reason} for error in errors]
+
+
+def print_branch_record(branch_status: BranchStatus):
+    branch_info = branch_status.branch_info
+
+    record = {
+        'type': 'branch',
+        'branch': branch_status.ref.name,
+        'version': branch_status.version_string,
+        'local': [local.name for local in branch_info.local] if branch_info.local is not None else [],
+        'upstream': branch_info.upstream.name if branch_info.upstream is not None else None,
+        'discontinued': branch_status.discontinued,
+        'version_tags': [{
+            'tag': version_tag.tag.name,
+            'commit': version_tag.commit,
+            'version': version_tag.version,
+            'code': version_tag.code,
+            'valid': version_tag.valid,
+        } for version_tag in branch_status.version_tags],
+        'errors': get_error_records(branch_status.errors),
+    }
+    sys.stdout.write(json.dumps(record) + '\n')
+    # flushed per record for incremental consumption
+    sys.stdout.flush()
+
+
+def get_job_count(command_context: CommandContext) -> int:
+    jobs = command_context.context.args.get('--jobs')
+    if jobs is None:
+        return const.DEFAULT_JOB_COUNT
+    if not jobs.isdigit() or int(jobs) < 1:
+        command_context.fail(os.EX_USAGE,
+                             _("Invalid job count {jobs}.").format(jobs=repr(jobs)),
+                             _("A positive number is required."))
+    return int(jobs)
 
 
 def call(context) -> Result:
@@ -18,11 +216,18 @@ def call(context) -> Result:
 
     check_in_repo(command_context)
 
+    output_format = context.args.get('--format') or const.STATUS_FORMAT_TEXT
+    if output_format not in const.STATUS_FORMATS:
+        command_context.fail(os.EX_USAGE,
+                             _("Invalid output format {format}.").format(format=repr(output_format)),
+                             _("Supported formats are: {formats}").format(formats=', '.join(const.STATUS_FORMATS)))
+
     unique_codes = set()
-    unique_version_codes = list()
+    unique_version_codes = set()
+
+    job_count = get_job_count(command_context)
 
     upstreams = repotools.git_get_upstreams(context.repo)
-    branch_info_dict = dict()
 
     if context.args['--all'] > 0:
         selected_refs = repotools.git_list_refs(context.repo, repotools.create_ref_name(const.REMOTES_PREFIX,
@@ -30,120 +235,56 @@ def call(context) -> Result:
     else:
         selected_refs = [command_context.selected_ref or command_context.current_branch]
 
-    for branch_ref in selected_refs:
-        branch_match = context.release_branch_matcher.fullmatch(branch_ref.name)
-        if branch_match:
-            branch_version = context.release_branch_matcher.to_version(branch_ref.name)
-
-            branch_version_string = get_branch_version_component_for_version(context, branch_version)
+    release_branch_refs = [branch_ref for branch_ref in selected_refs
+                           if context.release_branch_matcher.fullmatch(branch_ref.name)]
 
-            discontinuation_tags, discontinuation_tag_name = get_discontinuation_tags(context, branch_ref)
+    if len(release_branch_refs) > 1:
+        # load the shared state up front in a single pass, the workers read it only
+        repotools.git_get_tag_map(context.repo)
+        repotools.git_get_first_parent_set(context.repo, context.config.release_branch_base)
+        repotools.get_commit_graph(context.repo, *[repotools.ref_target(branch_ref)
+                                                   for branch_ref in release_branch_refs])
 
-            update_branch_info(context, branch_info_dict, upstreams, branch_ref)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=job_count) as executor:
+        # printed in selection order, as soon as the respective analysis is complete
+        for branch_status in executor.map(lambda branch_ref: analyze_branch(context, upstreams, branch_ref),
+                                          release_branch_refs):
+            check_unique_codes(branch_status, unique_codes, unique_version_codes)
 
-            branch_info = branch_info_dict.get(branch_ref.name)
-            discontinued = len(discontinuation_tags)
+            for error in branch_status.errors:
+                command_context.error(error.exit_code, error.message, error.reason)
 
-            if discontinued:
-                status_color = colors.partial(colors.color, fg='gray')
-                status_error_color = colors.partial(colors.color, fg='red')
-                status_local_color = colors.partial(colors.color, fg='blue')
-                status_remote_color = colors.partial(colors.color, fg='green')
+            if output_format == const.STATUS_FORMAT_JSON_LINES:
+                print_branch_record(branch_status)
             else:
-                status_color = colors.partial(colors.color, fg='white', style='bold')
-                status_error_color = colors.partial(colors.color, fg='red', style='bold')
-                status_local_color = colors.partial(colors.color, fg='blue', style='bold')
-                status_remote_color = colors.partial(colors.color, fg='green', style='bold')
-
-            error_color = colors.partial(colors.color, fg='white', bg='red', style='bold')
-
-            cli.fcwrite(sys.stdout, status_color, "version: " + branch_version_string + ' [')
-            if branch_info.local is not None:
-                i = 0
-                for local in branch_info.local:
-                    local_branch_color = status_local_color
-                    if not branch_info.upstream.short_name.endswith('/' + local.short_name):
-                        command_context.error(os.EX_DATAERR,
-                                              _("Local and upstream branch have a mismatching short name."),
-                                              None)
-                        local_branch_color = error_color
-                    if i:
-                        cli.fcwrite(sys.stdout, status_color, ', ')
-                    if context.verbose:
-                        cli.fcwrite(sys.stdout, local_branch_color, local.name)
-                    else:
-                        cli.fcwrite(sys.stdout, local_branch_color, local.short_name)
-                    i += 1
-            if branch_info.upstream is not None:
-                if branch_info.local is not None and len(branch_info.local):
-                    cli.fcwrite(sys.stdout, status_color, ' => ')
-                if context.verbose:
-                    cli.fcwrite(sys.stdout, status_remote_color, branch_info.upstream.name)
-                else:
-                    cli.fcwrite(sys.stdout, status_remote_color, branch_info.upstream.short_name)
-            cli.fcwrite(sys.stdout, status_color, "]")
-            if discontinued:
-                cli.fcwrite(sys.stdout, status_color, ' (' + _('discontinued') + ')')
-
-            cli.fcwriteln(sys.stdout, status_color)
-
-            commit_tags = repotools.git_get_branch_tags(context=context.repo,
-                                                        base_branch=context.config.release_branch_base,
-                                                        branch=branch_ref.name,
-                                                        tag_filter=None,
-                                                        commit_tag_comparator=None
-                                                        )
-
-            for commit, tags in commit_tags:
-                for tag in tags:
-                    if context.version_tag_matcher.group_unique_code is not None:
-                        tag_match = context.version_tag_matcher.fullmatch(tag.name)
-                        if tag_match is not None:
-                            unique_code = tag_match.group(
-                                context.version_tag_matcher.group_unique_code)
-                            version_string = unique_code
-
-                            unique_version_codes.append(int(unique_code))
-
-                            if unique_code in unique_codes:
-                                command_context.error(os.EX_DATAERR,
-                                                      _("Invalid sequential version tag {tag}.")
-                                                      .format(tag=tag.name),
-                                                      _("The code element of version {version_string} is not unique.")
-                                                      .format(version_string=version_string)
-                                                      )
-                            else:
-                                unique_codes.add(unique_code)
-
-                            cli.fcwriteln(sys.stdout, status_color, "  code: " + version_string)
-
-                    # print the version tag
-                    version_string = context.version_tag_matcher.format(tag.name)
-                    if version_string:
-                        version_info = semver.parse_version_info(version_string)
-                        if version_info.major == branch_version.major and version_info.minor == branch_version.minor:
-                            cli.fcwriteln(sys.stdout, status_color, "    " + version_string)
-                        else:
-                            command_context.error(os.EX_DATAERR,
-                                                  _("Invalid version tag {tag}.")
-                                                  .format(tag=repr(tag.name)),
-                                                  _("The major.minor part of the new version {new_version}"
-                                                    " does not match the branch version {branch_version}.")
-                                                  .format(new_version=repr(version_string),
-                                                          branch_version=repr(branch_version_string))
-                                                  )
-                            cli.fcwriteln(sys.stdout, status_error_color, "    " + version_string)
-
-    unique_version_codes.sort(key=utils.cmp_to_key(lambda a, b: version.cmp_alnum_token(a, b)))
-
-    last_unique_code = None
-    for unique_code in unique_version_codes:
-        if not (last_unique_code is None or unique_code > last_unique_code):
-            command_context.error(os.EX_DATAERR,
-                                  _("Version {version} breaks the sequence.")
-                                  .format(version=unique_code),
-                                  None
-                                  )
-        last_unique_code = unique_code
+                print_branch_status(context, branch_status)
+
+    sequence_errors = list()
+    sequence_gaps = list()
+    if len(unique_version_codes):
+        sequence_index = get_sequence_index(context)
+
+        for unique_code, tag_names in sorted(sequence_index.get_duplicate_codes().items()):
+            if unique_code in unique_version_codes:
+                sequence_errors.append(Error(os.EX_DATAERR,
+                                             _("Version {version} breaks the sequence.")
+                                             .format(version=unique_code),
+                                             None
+                                             ))
+
+        sequence_gaps = [unique_code for unique_code in sequence_index.get_gaps()
+                         if min(unique_version_codes) < unique_code < max(unique_version_codes)]
+
+    for error in sequence_errors:
+        command_context.error(error.exit_code, error.message, error.reason)
+    for unique_code in sequence_gaps:
+        command_context.warn(_("Version {version} is missing in the sequence.").format(version=unique_code), None)
+
+    if output_format == const.STATUS_FORMAT_JSON_LINES:
+        sys.stdout.write(json.dumps({
+            'type': 'summary',
+            'errors': get_error_records(sequence_errors),
+            'gaps': sequence_gaps,
+        }) + '\n')
 
     return context.result
@@ -5,8 +5,6 @@ from abc import abstractmethod, ABC
 from configparser import ConfigParser
 from typing import IO
 
-import yaml
-
 from gitflow.java_properties import JavaProperties
 
 
@@ -86,9 +84,11 @@ class JavaPropertyIO(PropertyIO):
 
 class YAMLPropertyIO(PropertyIO):
     def from_stream(self, stream: io.TextIOBase) -> dict:
+        import yaml
         return yaml.safe_load(stream) or dict()
 
     def to_stream(self, stream: io.TextIOBase, properties: dict):
+        import yaml
         yaml.safe_dump(properties, stream, default_flow_style=False)
 
 
@@ -1,13 +1,23 @@
+import bisect
+import collections
+import functools
+import hashlib
 import itertools
+import mmap
 import os
 import re
 import shlex
+import shutil
 import subprocess
+import sys
+import threading
 import typing
+from abc import ABC, abstractmethod
 from enum import Enum
 from typing import Optional, Union, Callable, List
 
-from gitflow import utils, cli, const
+from gitflow import utils, cli, const, filesystem, tracing
+from gitflow.commitgraph import CommitGraph
 
 
 class RepoContext(object):
@@ -17,6 +27,55 @@ class RepoContext(object):
     verbose = const.ERROR_VERBOSITY  # TODO use parent context
     use_root_dir_arg = False
 
+    # all refs, loaded on demand and invalidated by ref updates
+    ref_snapshot: 'RefSnapshot' = None
+
+    # first parent chains by tip commit
+    first_parent_sets: typing.Dict[str, typing.FrozenSet[str]] = None
+    # whether first parent chains and the commit graph are persisted in the cache directory
+    persistent_cache = True
+    git_dir: str = None
+    common_dir: str = None
+    # whether refs are read from the files of the repository instead of git for-each-ref, where supported
+    use_native_refs = True
+
+    # topology of all known commits, loaded on demand
+    commit_graph: CommitGraph = None
+    use_commit_graph = True
+    # guards the commit graph and the first parent chains against concurrent loads
+    commit_graph_lock: 'threading.RLock' = None
+
+    # memoized merge bases by (base commit, ref commit, fork point flag), least recently used first
+    merge_bases: 'collections.OrderedDict' = None
+    merge_base_lock: 'threading.Lock' = None
+
+    # the maximum number of git processes run concurrently by the asynchronous functions
+    git_concurrency = const.DEFAULT_GIT_CONCURRENCY
+    # (event loop, semaphore), as a semaphore is bound to the loop, that first waits on it
+    git_semaphore: tuple = None
+
+    # the name of the git backend, defaults to the environment variable or the subprocess backend
+    backend_name: str = None
+    backend: 'GitBackend' = None
+
+    # cat-file co-processes of the subprocess backend, started on demand
+    object_info_reader: 'BatchObjectReader' = None
+    object_reader: 'BatchObjectReader' = None
+
+    def __init__(self):
+        self.commit_graph_lock = threading.RLock()
+        self.merge_base_lock = threading.Lock()
+
+    def close(self):
+        if self.backend is not None:
+            self.backend.close()
+        self.backend = None
+        for reader in [self.object_info_reader, self.object_reader]:
+            if reader is not None:
+                reader.close()
+        self.object_info_reader = None
+        self.object_reader = None
+
 
 class Remote(object):
     name = None
@@ -24,8 +83,12 @@ class Remote(object):
 
 
 class Object(object):
-    obj_type = None
-    obj_name = None
+    # objects are created per listed ref and commit, hence kept free of instance dicts
+    __slots__ = ('obj_type', 'obj_name')
+
+    def __init__(self, obj_type: str = None, obj_name: str = None):
+        self.obj_type = obj_type
+        self.obj_name = obj_name
 
     def __eq__(self, other):
         if isinstance(other, Object):
@@ -55,19 +118,21 @@ class Object(object):
 
 
 class Commit(Object):
-    parents = []
+    __slots__ = ('parents',)
 
     def __init__(self, obj_name, parents: List[str]) -> None:
-        super().__init__()
-        self.obj_type = 'commit'
-        self.obj_name = obj_name
+        super().__init__('commit', obj_name)
         self.parents = parents
 
 
 class Ref(Object):
-    name = None
-    dest = None
-    upstream_name = None
+    __slots__ = ('name', 'dest', 'upstream_name')
+
+    def __init__(self):
+        super().__init__()
+        self.name = None
+        self.dest = None
+        self.upstream_name = None
 
     @property
     def target(self):
@@ -160,7 +225,7 @@ def create_ref_name(*strings: str):
     return utils.split_join('/', False, False, *strings)
 
 
-def git_raw(git: str, args: list, verbose: int, dir: str = None) -> typing.Tuple[int, bytes, bytes]:
+def __git_command(git: str, args: list, verbose: int, dir: str = None) -> list:
     command = [git]
     if dir is not None:
         command.extend(['-C', dir])
@@ -173,36 +238,156 @@ def git_raw(git: str, args: list, verbose: int, dir: str = None) -> typing.Tuple
 
     if verbose >= const.TRACE_VERBOSITY:
         cli.print(utils.command_to_str(command))
+    return command
+
 
+def __git_env() -> dict:
     env = os.environ.copy()
     env["LANGUAGE"] = "C"
     env["LC_ALL"] = "C"
+    return env
+
+
+def __print_failure(verbose: int, command: list, returncode: int, err: Optional[bytes]):
     if verbose >= const.TRACE_VERBOSITY:
-        proc = subprocess.Popen(args=command,
-                                stdin=subprocess.PIPE,
-                                stdout=subprocess.PIPE,
-                                cwd=dir,
-                                env=env)
-    else:
-        proc = subprocess.Popen(args=command,
-                                stdin=subprocess.PIPE,
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                cwd=dir,
-                                env=env)
-
-    out, err = proc.communicate()
+        cli.eprint("command failed: " + utils.command_to_str(command))
+        cli.eprint("child process returned " + str(returncode))
+        if err is not None:
+            cli.eprint(err.decode("utf-8"))
+
+
+def git_raw_popen(git: str, args: list, verbose: int, dir: str = None, **popen_args) -> subprocess.Popen:
+    command = __git_command(git, args, verbose, dir)
+    env = __git_env()
+
+    popen_args.setdefault('stdin', subprocess.PIPE)
+    popen_args.setdefault('stdout', subprocess.PIPE)
+    if verbose < const.TRACE_VERBOSITY:
+        popen_args.setdefault('stderr', subprocess.PIPE)
+
+    tracing.count_fork()
+    return subprocess.Popen(args=command,
+                            cwd=dir,
+                            env=env,
+                            **popen_args)
+
+
+def git_raw(git: str, args: list, verbose: int, dir: str = None,
+            input: bytes = None) -> typing.Tuple[int, bytes, bytes]:
+    with tracing.span('git ' + tracing.get_sub_command(args), 'git', command=args):
+        proc = git_raw_popen(git=git, args=args, verbose=verbose, dir=dir)
+
+        out, err = proc.communicate(input=input)
     if proc.returncode != os.EX_OK:
-        if verbose >= const.TRACE_VERBOSITY:
-            cli.eprint("command failed: " + utils.command_to_str(command))
-            cli.eprint("child process returned " + str(proc.returncode))
-            if err is not None:
-                cli.eprint(err.decode("utf-8"))
+        __print_failure(verbose, proc.args, proc.returncode, err)
     return proc.returncode, out, err
 
 
+async def git_raw_async(git: str, args: list, verbose: int, dir: str = None,
+                        input: bytes = None, semaphore: 'asyncio.Semaphore' = None,
+                        procedure: str = None) \
+        -> typing.Tuple[int, bytes, bytes]:
+    """
+    The asynchronous counterpart of git_raw.
+    :param semaphore: bounds the number of concurrently running git processes
+    :param procedure: the procedure to attribute the call to in traces
+    """
+    import asyncio
+
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(const.DEFAULT_GIT_CONCURRENCY)
+
+    async with semaphore:
+        with tracing.async_span('git ' + tracing.get_sub_command(args), 'git', procedure, command=args):
+            command = __git_command(git, args, verbose, dir)
+            tracing.count_fork()
+            proc = await asyncio.create_subprocess_exec(*command,
+                                                        cwd=dir,
+                                                        env=__git_env(),
+                                                        stdin=subprocess.PIPE,
+                                                        stdout=subprocess.PIPE,
+                                                        stderr=subprocess.PIPE
+                                                        if verbose < const.TRACE_VERBOSITY else None)
+            out, err = await proc.communicate(input=input)
+    if proc.returncode != os.EX_OK:
+        __print_failure(verbose, command, proc.returncode, err)
+    return proc.returncode, out, err
+
+
+# the maximum number of memoized merge bases per repo
+MERGE_BASE_CACHE_SIZE = 1024
+
+# git sub commands, that potentially create, update or delete refs
+REF_UPDATING_COMMANDS = {
+    'branch',
+    'checkout',
+    'commit',
+    'fetch',
+    'merge',
+    'pull',
+    'push',
+    'rebase',
+    'reset',
+    'symbolic-ref',
+    'tag',
+    'update-ref',
+    'worktree',
+}
+
+
+def __invalidate_updated_refs(context: RepoContext, args: tuple):
+    sub_command = next((arg for arg in args if not isinstance(arg, str) or not arg.startswith('-')), None)
+    if sub_command in REF_UPDATING_COMMANDS:
+        invalidate_refs(context)
+
+
 def git(context: RepoContext, *args) -> typing.Tuple[int, bytes, bytes]:
-    return git_raw(git=context.git, args=list(args), dir=context.dir, verbose=context.verbose)
+    result = git_raw(git=context.git, args=list(args), dir=context.dir, verbose=context.verbose)
+    __invalidate_updated_refs(context, args)
+    return result
+
+
+def get_git_semaphore(context: RepoContext) -> 'asyncio.Semaphore':
+    """
+    :returns the semaphore bounding the git processes of the context in the running event loop
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    if context.git_semaphore is None or context.git_semaphore[0] is not loop:
+        context.git_semaphore = loop, asyncio.Semaphore(context.git_concurrency)
+    return context.git_semaphore[1]
+
+
+async def git_async(context: RepoContext, *args) -> typing.Tuple[int, bytes, bytes]:
+    procedure = tracing.get_procedure(1) if tracing.is_enabled() else None
+    result = await git_raw_async(git=context.git, args=list(args), dir=context.dir, verbose=context.verbose,
+                                 semaphore=get_git_semaphore(context), procedure=procedure)
+    __invalidate_updated_refs(context, args)
+    return result
+
+
+def run_concurrently(*awaitables: typing.Awaitable) -> list:
+    """
+    Runs independent queries, such as git_async(), concurrently in a new event loop.
+    Must not be called from a running event loop.
+    :returns the results in the order of the awaitables
+    """
+    import asyncio
+
+    procedure = tracing.get_procedure(1) if tracing.is_enabled() else None
+
+    async def gather():
+        # inherited by the tasks of the awaitables
+        tracing.set_loop_procedure(procedure)
+        return await asyncio.gather(*awaitables)
+
+    return asyncio.run(gather())
+
+
+def git_with_input(context: RepoContext, input: bytes, *args) -> typing.Tuple[int, bytes, bytes]:
+    """executes git with the specified bytes on stdin"""
+    return git_raw(git=context.git, args=list(args), dir=context.dir, verbose=context.verbose, input=input)
 
 
 def git_in_cwd(context: RepoContext, *args) -> typing.Tuple[int, bytes, bytes]:
@@ -223,6 +408,7 @@ def git_interactive(context: RepoContext, *args) -> subprocess.Popen:
     if context.verbose >= const.TRACE_VERBOSITY:
         cli.print(' '.join(shlex.quote(token) for token in command))
 
+    tracing.count_fork()
     return subprocess.Popen(args=command,
                             cwd=context.dir if not context.use_root_dir_arg else None)
 
@@ -296,6 +482,22 @@ def git_for_line(context: RepoContext, *args):
     return None
 
 
+async def git_for_lines_async(context: RepoContext, *args) -> Union[List[str], None]:
+    returncode, out, err = await git_async(context, *args)
+
+    if returncode == os.EX_OK:
+        return __extract_lines(context, out)
+    return None
+
+
+async def git_for_line_async(context: RepoContext, *args):
+    returncode, out, err = await git_async(context, *args)
+
+    if returncode == os.EX_OK:
+        return __extract_line(context, out)
+    return None
+
+
 def __extract_lines(context, out):
     return out.decode("utf-8").splitlines()
 
@@ -348,7 +550,7 @@ class BranchSelection(Enum):
 def get_branch_by_name(context: RepoContext, remotes: typing.Set[str], branch_name: str,
                        search_mode: BranchSelection) -> Ref:
     candidate = None
-    for branch in git_list_refs(context, *const.LOCAL_AND_REMOTE_BRANCH_PREFIXES):
+    for branch in get_ref_snapshot(context).by_branch_name.get(branch_name, []):
         match = re.fullmatch(const.BRANCH_PATTERN, branch.name)
 
         name = match.group('name')
@@ -388,15 +590,177 @@ def git_get_current_branch(context: RepoContext) -> Ref:
     return ref if ref.name is not None else None
 
 
-def git_list_refs(context: RepoContext, *args):
+class RefSnapshot(object):
     """
-    :rtype: list of Ref
+    All refs of a repository, loaded at once and indexed for lookups.
     """
 
-    returncode, out, err = git(context, 'for-each-ref', '--format',
-                               '%(refname);%(objecttype);%(objectname);%(*objecttype);%(*objectname);%(upstream)',
-                               *args)
+    refs: List['Ref'] = None
+    """all refs, sorted by name"""
+    names: List[str] = None
+    by_name: typing.Dict[str, 'Ref'] = None
+    by_short_name: typing.Dict[str, List['Ref']] = None
+    by_branch_name: typing.Dict[str, List['Ref']] = None
+    by_target: typing.Dict[str, List['Ref']] = None
+
+    def __init__(self, refs: typing.Iterable['Ref']):
+        self.refs = sorted(refs, key=lambda ref: ref.name)
+        self.names = [ref.name for ref in self.refs]
+        self.by_name = dict()
+        self.by_short_name = dict()
+        self.by_branch_name = dict()
+        self.by_target = dict()
+
+        branch_pattern = re.compile(const.BRANCH_PATTERN)
+
+        for ref in self.refs:
+            self.by_name[ref.name] = ref
+
+            short_name = ref.short_name
+            if short_name is not None:
+                self.by_short_name.setdefault(short_name, list()).append(ref)
+
+            match = branch_pattern.fullmatch(ref.name)
+            if match is not None:
+                self.by_branch_name.setdefault(match.group('name'), list()).append(ref)
+
+            target = ref.target
+            if target is not None and target.obj_name is not None:
+                self.by_target.setdefault(target.obj_name, list()).append(ref)
+
+    def get(self, name: str) -> Optional['Ref']:
+        return self.by_name.get(name)
+
+    def __prefix_indices(self, prefix: str) -> typing.Generator[int, None, None]:
+        index = bisect.bisect_left(self.names, prefix)
+        while index < len(self.names) and self.names[index].startswith(prefix):
+            name = self.names[index]
+            # match complete path elements only
+            if len(name) == len(prefix) or prefix.endswith('/') or name[len(prefix)] == '/':
+                yield index
+            index += 1
+
+    def list(self, *patterns: str) -> List['Ref']:
+        """
+        :param patterns: for-each-ref patterns, either literal prefixes or glob patterns
+        :returns refs matching any of the patterns, sorted by name
+        """
+        if not len(patterns):
+            return list(self.refs)
+
+        selected_indices = set()
+        for pattern in patterns:
+            selected_indices.update(self.__prefix_indices(pattern))
+            if any(char in pattern for char in '*?[\\'):
+                regex = compile_ref_pattern(pattern)
+                if regex is not None:
+                    selected_indices.update(index for index, name in enumerate(self.names)
+                                            if regex.fullmatch(name))
+        return [self.refs[index] for index in sorted(selected_indices)]
+
+
+# the character classes of wildmatch by name
+REF_PATTERN_CHAR_CLASSES = {
+    'alnum': 'a-zA-Z0-9',
+    'alpha': 'a-zA-Z',
+    'blank': ' \\t',
+    'cntrl': '\\x00-\\x1f\\x7f',
+    'digit': '0-9',
+    'graph': '!-~',
+    'lower': 'a-z',
+    'print': ' -~',
+    'punct': '!-/:-@\\[-`{-~',
+    'space': ' \\t\\n\\r\\f\\v',
+    'upper': 'A-Z',
+    'xdigit': '0-9a-fA-F',
+}
+
+
+@functools.lru_cache(maxsize=256)
+def compile_ref_pattern(pattern: str) -> Optional['re.Pattern']:
+    """
+    Translates a glob pattern of git for-each-ref to a regular expression.
+    The pattern is matched like by wildmatch() with WM_PATHNAME: '*', '?' and bracket expressions do not match '/',
+    while '**' matches across path elements, if it is a complete path element.
+    :returns the regular expression or None, if a bracket expression is malformed, which matches no ref in git
+    """
+    regex = list()
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '*':
+            end = index
+            while end < len(pattern) and pattern[end] == '*':
+                end += 1
+            if end - index > 1 and (index == 0 or pattern[index - 1] == '/') \
+                    and (end == len(pattern) or pattern[end] == '/'):
+                if end == len(pattern):
+                    regex.append('.*')
+                else:
+                    # zero or more leading path elements
+                    regex.append('(?:.*/)?')
+                    end += 1
+            else:
+                regex.append('[^/]*')
+            index = end
+        elif char == '?':
+            regex.append('[^/]')
+            index += 1
+        elif char == '[':
+            index += 1
+            negated = index < len(pattern) and pattern[index] in '!^'
+            if negated:
+                index += 1
+            chars = list()
+            first = True
+            while True:
+                if index == len(pattern):
+                    return None
+                char = pattern[index]
+                if char == ']' and not first:
+                    index += 1
+                    break
+                first = False
+                if char == '[' and pattern.startswith('[:', index):
+                    end = pattern.find(':]', index + 2)
+                    char_class = REF_PATTERN_CHAR_CLASSES.get(pattern[index + 2:end]) if end >= 0 else None
+                    if char_class is None:
+                        return None
+                    chars.append(char_class)
+                    index = end + 2
+                    continue
+                if char == '\\' and index + 1 < len(pattern):
+                    index += 1
+                    char = pattern[index]
+                if index + 2 < len(pattern) and pattern[index + 1] == '-' and pattern[index + 2] != ']':
+                    end_char = pattern[index + 2]
+                    if end_char == '\\' and index + 3 < len(pattern):
+                        index += 1
+                        end_char = pattern[index + 2]
+                    chars.append(re.escape(char) + '-' + re.escape(end_char))
+                    index += 3
+                else:
+                    chars.append(re.escape(char))
+                    index += 1
+            # bracket expressions never match '/'
+            regex.append('(?!/)[' + ('^' if negated else '') + ''.join(chars) + ']')
+        elif char == '\\' and index + 1 < len(pattern):
+            regex.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            regex.append(re.escape(char))
+            index += 1
+    return re.compile(''.join(regex), re.DOTALL)
 
+
+# the format of the refs listed by git for-each-ref
+REF_FORMAT = '%(refname);%(objecttype);%(objectname);%(*objecttype);%(*objectname);%(upstream)'
+
+
+def parse_refs(returncode: int, out: bytes) -> typing.Generator['Ref', None, None]:
+    """
+    :returns the refs listed by git for-each-ref --format REF_FORMAT
+    """
     if returncode == os.EX_OK:
         for ref_element in out.decode("utf-8").splitlines():
             ref_element = ref_element.split(';')
@@ -404,16 +768,407 @@ def git_list_refs(context: RepoContext, *args):
             ref = Ref()
             ref.name = ref_element[0]
             ref.obj_type = ref_element[1]
-            ref.obj_name = ref_element[2]
+            # hashes are shared with the commits and tag maps referring to them
+            ref.obj_name = sys.intern(ref_element[2])
             if len(ref_element[4]):
-                ref.dest = Object()
-                ref.dest.obj_type = ref_element[3] if len(ref_element[3]) else None
-                ref.dest.obj_name = ref_element[4] if len(ref_element[4]) else None
+                ref.dest = Object(ref_element[3] if len(ref_element[3]) else None,
+                                  sys.intern(ref_element[4]))
             if len(ref_element[5]):
                 ref.upstream_name = ref_element[5]
             yield ref
 
 
+# packed-refs files of at least this size are mapped into memory rather than read
+PACKED_REFS_MMAP_SIZE = 1 << 20
+
+# refs stored in the git directory of each worktree rather than the common directory
+PER_WORKTREE_REF_PREFIXES = ('refs/bisect/', 'refs/worktree/', 'refs/rewritten/')
+
+# the maximum depth of symbolic refs, as in git
+MAX_SYMREF_DEPTH = 5
+
+CONFIG_ESCAPES = {'n': '\n', 't': '\t', 'b': '\b', '"': '"', '\\': '\\'}
+
+
+def __parse_config_value(value: str, lines: typing.Iterator[str]) -> str:
+    chars = list()
+    pending_spaces = 0
+    quoted = False
+    index = 0
+    while index < len(value):
+        char = value[index]
+        index += 1
+        if char == '\\':
+            if index == len(value):
+                # continued on the next line
+                value = next(lines, '')
+                index = 0
+                continue
+            char = CONFIG_ESCAPES.get(value[index])
+            if char is None:
+                raise ValueError("invalid escape sequence in config value")
+            index += 1
+        elif char == '"':
+            quoted = not quoted
+            continue
+        elif not quoted and char in '#;':
+            break
+        elif not quoted and char.isspace():
+            # leading and trailing whitespace is dropped
+            if len(chars):
+                pending_spaces += 1
+            continue
+        chars.append(' ' * pending_spaces + char)
+        pending_spaces = 0
+    if quoted:
+        raise ValueError("unterminated quote in config value")
+    return ''.join(chars)
+
+
+def parse_config(data: str) -> typing.Generator[typing.Tuple[str, Optional[str], str, Optional[str]], None, None]:
+    """
+    Parses a git config file.
+    :returns (section, subsection, key, value) tuples with the section and key in lower case
+    and a value of None for keys without one
+    :raises ValueError: if the file is malformed
+    """
+    section = None
+    subsection = None
+    lines = iter(data.splitlines())
+    for line in lines:
+        header = re.match(r'\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]', line)
+        if header is not None:
+            section = header.group(1).lower()
+            subsection = header.group(2)
+            if subsection is not None:
+                subsection = re.sub(r'\\(.)', r'\1', subsection)
+            elif '.' in section:
+                # deprecated [section.subsection] syntax
+                section, subsection = section.split('.', 1)
+            line = line[header.end():]
+
+        entry = re.match(r'\s*([A-Za-z][A-Za-z0-9-]*)\s*(=?)', line)
+        if entry is None or entry.group(2) != '=':
+            remainder = line[entry.end():] if entry is not None else line
+            if remainder.strip()[:1] not in {'', '#', ';'}:
+                raise ValueError("invalid config line: " + repr(line))
+            if entry is None:
+                continue
+            key, value = entry.group(1), None
+        else:
+            key, value = entry.group(1), __parse_config_value(line[entry.end():], lines)
+        if section is None:
+            raise ValueError("config key outside of a section: " + repr(key))
+        yield section, subsection, key.lower(), value
+
+
+def map_refspec(refspec: str, ref_name: str) -> Optional[str]:
+    """
+    :returns the destination of a ref according to a fetch refspec or None, if the refspec does not match
+    """
+    if refspec.startswith('+'):
+        refspec = refspec[1:]
+    source, separator, destination = refspec.partition(':')
+    if not len(separator) or not len(destination):
+        return None
+    if '*' in source:
+        prefix, suffix = source.split('*', 1)
+        if len(ref_name) >= len(prefix) + len(suffix) and ref_name.startswith(prefix) \
+                and ref_name.endswith(suffix):
+            return destination.replace('*', ref_name[len(prefix):len(ref_name) - len(suffix)], 1)
+        return None
+    return destination if source == ref_name else None
+
+
+def __is_config_true(value: Optional[str]) -> bool:
+    return value is not None and value.lower() in {'true', 'yes', 'on', '1'}
+
+
+def __get_user_config_paths(git: str) -> Optional[typing.List[str]]:
+    """
+    :returns the system and global config files, that git reads before the repository config, in that order
+    or None, if config is passed through the environment, such as by git -c
+    """
+    if any(name in os.environ for name in ('GIT_CONFIG_PARAMETERS', 'GIT_CONFIG_COUNT', 'GIT_CONFIG')):
+        return None
+
+    config_paths = list()
+    if not __is_config_true(os.environ.get('GIT_CONFIG_NOSYSTEM')):
+        system_config_path = os.environ.get('GIT_CONFIG_SYSTEM')
+        if system_config_path is None:
+            git_path = shutil.which(git)
+            if git_path is None:
+                return None
+            # relative to the installation prefix of git, which is /usr for /etc/gitconfig
+            prefix = os.path.dirname(os.path.dirname(git_path))
+            system_config_path = os.path.join('/etc' if prefix in {'/', '/usr'} else os.path.join(prefix, 'etc'),
+                                              'gitconfig')
+        config_paths.append(system_config_path)
+
+    global_config_path = os.environ.get('GIT_CONFIG_GLOBAL')
+    if global_config_path is not None:
+        config_paths.append(global_config_path)
+    else:
+        home_dir = os.path.expanduser('~')
+        config_paths.append(os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.join(home_dir, '.config'),
+                                         'git', 'config'))
+        config_paths.append(os.path.join(home_dir, '.gitconfig'))
+    return config_paths
+
+
+def __read_upstreams(git: str, git_dir: str, common_dir: str) -> Optional[typing.Dict[str, str]]:
+    """
+    :returns the upstreams by local branch ref name, as configured in the system, global and repository config
+    or None, if the config uses features, that are not supported
+    """
+    branches = dict()
+    fetch_refspecs = dict()
+
+    config_paths = __get_user_config_paths(git)
+    if config_paths is None:
+        return None
+    repo_config_path = os.path.join(common_dir, 'config')
+    config_paths.append(repo_config_path)
+    for config_path in config_paths:
+        if not len(config_path):
+            continue
+        try:
+            with open(config_path, 'r', encoding='utf-8') as config_file:
+                data = config_file.read()
+        except FileNotFoundError:
+            continue
+        except (OSError, UnicodeDecodeError):
+            return None
+
+        try:
+            for section, subsection, key, value in parse_config(data):
+                if section in {'include', 'includeif'}:
+                    return None
+                elif section == 'extensions' and config_path == repo_config_path:
+                    if key == 'refstorage' and (value or '').lower() != 'files':
+                        return None
+                    if key == 'worktreeconfig' and (value is None or __is_config_true(value)):
+                        config_paths.append(os.path.join(git_dir, 'config.worktree'))
+                elif section == 'branch' and subsection is not None and key in {'remote', 'merge'}:
+                    branches.setdefault(subsection, dict())[key] = value
+                elif section == 'remote' and subsection is not None and key == 'fetch' and value is not None:
+                    if value.startswith('^'):
+                        # negative refspecs
+                        return None
+                    fetch_refspecs.setdefault(subsection, list()).append(value)
+        except ValueError:
+            return None
+
+    upstreams = dict()
+    for branch_name, branch_config in branches.items():
+        remote = branch_config.get('remote')
+        merge = branch_config.get('merge')
+        if remote is None or merge is None:
+            continue
+        if not merge.startswith('refs/'):
+            # abbreviated merge refs are resolved by git
+            return None
+        if remote == '.':
+            upstream = merge
+        else:
+            upstream = next((destination for destination in (map_refspec(refspec, merge)
+                                                              for refspec in fetch_refspecs.get(remote, []))
+                             if destination is not None), None)
+        if upstream is not None:
+            upstreams[create_ref_name(const.LOCAL_BRANCH_PREFIX, branch_name)] = upstream
+    return upstreams
+
+
+def __read_packed_refs(path: str) \
+        -> Optional[typing.Dict[str, typing.List[Optional[str]]]]:
+    """
+    :returns [object name, peeled object name] by ref name
+    or None, if the file does not record the peeled objects of all annotated tags
+    """
+    try:
+        packed_refs_file = open(path, 'rb')
+    except FileNotFoundError:
+        return dict()
+
+    with packed_refs_file:
+        if os.fstat(packed_refs_file.fileno()).st_size >= PACKED_REFS_MMAP_SIZE:
+            data = mmap.mmap(packed_refs_file.fileno(), 0, access=mmap.ACCESS_READ)
+            lines = iter(data.readline, b'')
+        else:
+            data = None
+            lines = iter(packed_refs_file.read().splitlines())
+
+        try:
+            refs = dict()
+            ref = None
+            for index, line in enumerate(lines):
+                line = line.rstrip(b'\n')
+                if line.startswith(b'#'):
+                    if index == 0 and line.startswith(b'# pack-refs with:') \
+                            and b'fully-peeled' in line.split()[3:]:
+                        continue
+                    return None
+                elif index == 0:
+                    # without traits, unpeeled tags are indistinguishable from commits
+                    return None
+                elif line.startswith(b'^'):
+                    if ref is None:
+                        return None
+                    ref[1] = sys.intern(line[1:].decode('utf-8'))
+                elif len(line):
+                    obj_name, ref_name = line.decode('utf-8').split(' ', 1)
+                    ref = refs[ref_name] = [sys.intern(obj_name), None]
+            return refs
+        finally:
+            if data is not None:
+                data.close()
+
+
+def __read_loose_refs(refs_dir: str, is_included: Callable[[str], bool], refs: typing.Dict[str, str]):
+    for dir_path, dir_names, file_names in os.walk(refs_dir):
+        prefix = create_ref_name('refs', os.path.relpath(dir_path, refs_dir).replace(os.sep, '/')) \
+            if dir_path != refs_dir else 'refs'
+        for file_name in file_names:
+            ref_name = prefix + '/' + file_name
+            if file_name.endswith('.lock') or not is_included(ref_name):
+                continue
+            try:
+                with open(os.path.join(dir_path, file_name), 'r', encoding='utf-8') as ref_file:
+                    refs[ref_name] = ref_file.readline().rstrip('\n')
+            except (OSError, UnicodeDecodeError):
+                # replaced concurrently or broken, skipped like by git
+                pass
+
+
+def __resolve_ref(context: RepoContext, ref: Ref) -> bool:
+    # tags and their targets are read in one query, as the objects are small
+    object_contents = get_backend(context).read_object(ref.obj_name)
+    if object_contents is None:
+        return False
+    info, contents = object_contents
+    ref.obj_type = info.obj_type
+    if ref.obj_type == 'tag':
+        header = re.match(rb'object ([0-9a-f]+)\ntype (\w+)\n', contents)
+        if header is None:
+            return False
+        ref.dest = Object(header.group(2).decode('utf-8'), sys.intern(header.group(1).decode('utf-8')))
+    return True
+
+
+def read_refs(context: RepoContext) -> Optional[List[Ref]]:
+    """
+    Reads all refs from packed-refs, loose ref files and the config files, as listed by git for-each-ref.
+    Object types are not looked up for branches and packed refs without a peeled object, which are commits.
+    Tags are looked up through the object reader, as they may be nested or point to trees and blobs.
+    :returns the refs or None, if the repository layout is not supported, such as reftable, config includes
+    or config in the environment
+    """
+    if not context.use_native_refs:
+        return None
+
+    git_dir = git_get_git_dir(context)
+    common_dir = git_get_common_dir(context)
+    if git_dir is None or common_dir is None or os.path.exists(os.path.join(common_dir, 'reftable')):
+        return None
+
+    upstreams = __read_upstreams(context.git, git_dir, common_dir)
+    if upstreams is None:
+        return None
+    packed_refs = __read_packed_refs(os.path.join(common_dir, 'packed-refs'))
+    if packed_refs is None:
+        return None
+
+    loose_refs = dict()
+    if os.path.realpath(git_dir) == common_dir:
+        __read_loose_refs(os.path.join(common_dir, 'refs'), lambda name: True, loose_refs)
+    else:
+        __read_loose_refs(os.path.join(common_dir, 'refs'),
+                          lambda name: not name.startswith(PER_WORKTREE_REF_PREFIXES), loose_refs)
+        __read_loose_refs(os.path.join(git_dir, 'refs'),
+                          lambda name: name.startswith(PER_WORKTREE_REF_PREFIXES), loose_refs)
+
+    refs = list()
+    for name in sorted(packed_refs.keys() | loose_refs.keys()):
+        target_name = name
+        for depth in range(MAX_SYMREF_DEPTH):
+            value = loose_refs.get(target_name)
+            if value is None or not value.startswith('ref: '):
+                break
+            target_name = value[len('ref: '):].strip()
+        else:
+            continue
+
+        ref = Ref()
+        ref.name = name
+        ref.upstream_name = upstreams.get(name)
+        if value is not None:
+            if not re.fullmatch(r'[0-9a-f]{40}|[0-9a-f]{64}', value):
+                # broken or dangling, skipped like by git
+                continue
+            ref.obj_name = sys.intern(value)
+            if target_name.startswith((const.LOCAL_BRANCH_PREFIX, const.REMOTES_PREFIX)):
+                ref.obj_type = 'commit'
+            elif not __resolve_ref(context, ref):
+                continue
+        elif target_name in packed_refs:
+            ref.obj_name, peeled_obj_name = packed_refs[target_name]
+            # the peel line names the innermost object, while git for-each-ref peels a single level
+            if peeled_obj_name is None:
+                ref.obj_type = 'commit'
+            elif not __resolve_ref(context, ref):
+                continue
+        else:
+            continue
+        refs.append(ref)
+    return refs
+
+
+def get_ref_snapshot(context: RepoContext) -> RefSnapshot:
+    snapshot = context.ref_snapshot
+    if snapshot is None:
+        with tracing.span('read refs', 'refs'):
+            refs = read_refs(context)
+        context.ref_snapshot = snapshot = RefSnapshot(refs if refs is not None
+                                                      else get_backend(context).list_refs())
+    return snapshot
+
+
+def invalidate_refs(context: RepoContext):
+    context.ref_snapshot = None
+    context.tags = None
+
+
+def git_list_refs(context: RepoContext, *args):
+    """
+    :rtype: list of Ref
+    """
+
+    if any(arg.startswith('-') for arg in args):
+        # filters, that require an object database lookup
+        return get_backend(context).list_refs(*args)
+    return get_ref_snapshot(context).list(*args)
+
+
+async def git_list_refs_async(context: RepoContext, *args):
+    """
+    The asynchronous counterpart of git_list_refs.
+    :rtype: list of Ref
+    """
+
+    if any(arg.startswith('-') for arg in args):
+        returncode, out, err = await git_async(context, 'for-each-ref', '--format', REF_FORMAT, *args)
+        return list(parse_refs(returncode, out))
+
+    snapshot = context.ref_snapshot
+    if snapshot is None:
+        refs = read_refs(context)
+        if refs is None:
+            returncode, out, err = await git_async(context, 'for-each-ref', '--format', REF_FORMAT)
+            refs = parse_refs(returncode, out)
+        context.ref_snapshot = snapshot = RefSnapshot(refs)
+    return snapshot.list(*args)
+
+
 def get_ref_by_name(context: RepoContext, ref_name):
     refs = list(git_list_refs(context, ref_name))
     if len(refs) == 1:
@@ -425,22 +1180,10 @@ def get_ref_by_name(context: RepoContext, ref_name):
 
 
 def git_get_upstreams(context: RepoContext, *args) -> Optional[dict]:
-    returncode, out, err = git(context, 'for-each-ref', '--format',
-                               '%(refname);%(upstream)',
-                               *args)
-
-    if returncode == os.EX_OK:
-        upstreams = dict()
-        for ref_elements in out.decode("utf-8").splitlines():
-            ref_elements = ref_elements.split(';')
-
-            assert len(ref_elements[0])
-
-            if ref_elements[0] in upstreams:
-                raise KeyError
-            upstreams[ref_elements[0]] = ref_elements[1] if len(ref_elements[1]) else None
-        return upstreams
-    return None
+    upstreams = dict()
+    for ref in git_list_refs(context, *args):
+        upstreams[ref.name] = ref.upstream_name
+    return upstreams
 
 
 def git_rev_parse(context: RepoContext, *args) -> Optional[str]:
@@ -456,6 +1199,16 @@ def git_rev_parse(context: RepoContext, *args) -> Optional[str]:
     return None
 
 
+async def git_rev_parse_async(context: RepoContext, *args) -> Optional[str]:
+    returncode, out, err = await git_async(context, 'rev-parse', *args)
+
+    lines = out.decode('utf-8').splitlines()
+
+    if returncode == os.EX_OK and len(lines) == 1:
+        return lines[0]
+    return None
+
+
 def git_list_remote_branches(context: RepoContext, remote: str) -> list:
     """
     :rtype: list of Ref
@@ -471,15 +1224,18 @@ def git_list_branches(context: RepoContext) -> list:
 
 
 def git_get_tag_map(context: RepoContext):
-    if context.tags is None:
-        context.tags = dict()
+    tags = context.tags
+    if tags is None:
+        # published when complete, for concurrent readers
+        tags = dict()
         for tag_ref in list(git_list_refs(context, const.LOCAL_TAG_PREFIX)):
             tagged_commit = tag_ref.target.obj_name
-            commit_tags = context.tags.get(tagged_commit)
+            commit_tags = tags.get(tagged_commit)
             if commit_tags is None:
-                context.tags[tagged_commit] = commit_tags = list()
+                tags[tagged_commit] = commit_tags = list()
             commit_tags.append(tag_ref)
-    return context.tags
+        context.tags = tags
+    return tags
 
 
 def git_list_tags(context: RepoContext):
@@ -496,8 +1252,77 @@ def git_get_tags_by_referred_object(context: RepoContext, obj_name: str) -> list
     return commit_tags if commit_tags is not None else []
 
 
+def __git_merge_base(context: RepoContext, base: Union[Object, str], ref: Optional[Union[Object, str]],
+                     base_commit: Optional[str], ref_commit: Optional[str],
+                     determine_fork_point: bool) -> Optional[str]:
+    if not determine_fork_point and base_commit is not None and ref_commit is not None:
+        commit_graph = get_commit_graph(context, base_commit, ref_commit)
+        if commit_graph is not None:
+            merge_bases = commit_graph.merge_bases(base_commit, ref_commit)
+            return merge_bases[0] if len(merge_bases) else None
+
+    if not determine_fork_point:
+        return get_backend(context).merge_base(ref_target(base), ref_target(ref))
+
+    # fork points depend on reflogs
+    returncode, out, err = git(context, 'merge-base', '--fork-point', ref_target(base), ref_target(ref))
+    return __parse_merge_base(returncode, out)
+
+
+def __parse_merge_base(returncode: int, out: bytes) -> Optional[str]:
+    if returncode == os.EX_OK:
+        lines = out.splitlines()
+        if len(lines) == 1:
+            return lines[0].decode('utf-8')
+    return None
+
+
 def git_merge_base(context: RepoContext, base: Union[Object, str], ref: Optional[Union[Object, str]],
                    determine_fork_point=False) -> Optional[str]:
+    """
+    Results are memoized by the commits of base and ref.
+    """
+    base_commit = resolve_commit(context, base)
+    ref_commit = resolve_commit(context, ref) if ref is not None else None
+    if base_commit is None or ref_commit is None:
+        return __git_merge_base(context, base, ref, base_commit, ref_commit, determine_fork_point)
+
+    key = (base_commit, ref_commit, determine_fork_point)
+    merge_base = __get_memoized_merge_base(context, key)
+    if merge_base is not context:
+        return merge_base
+
+    merge_base = __git_merge_base(context, base, ref, base_commit, ref_commit, determine_fork_point)
+    __memoize_merge_base(context, key, merge_base)
+    return merge_base
+
+
+def __get_memoized_merge_base(context: RepoContext, key: tuple):
+    """
+    :returns the memoized merge base, which may be None, or the context itself, if none has been memoized
+    """
+    with context.merge_base_lock:
+        if context.merge_bases is None:
+            context.merge_bases = collections.OrderedDict()
+        merge_base = context.merge_bases.get(key, context)
+        if merge_base is not context:
+            context.merge_bases.move_to_end(key)
+        return merge_base
+
+
+def __memoize_merge_base(context: RepoContext, key: tuple, merge_base: Optional[str]):
+    with context.merge_base_lock:
+        context.merge_bases[key] = merge_base
+        while len(context.merge_bases) > MERGE_BASE_CACHE_SIZE:
+            context.merge_bases.popitem(last=False)
+
+
+async def git_merge_base_async(context: RepoContext, base: Union[Object, str], ref: Union[Object, str],
+                               determine_fork_point=False) -> Optional[str]:
+    """
+    The asynchronous counterpart of git_merge_base, always determined by git merge-base.
+    Suited for many independent queries, whose history has not been loaded into the commit graph.
+    """
     command = ['merge-base']
     if determine_fork_point:
         command.append('--fork-point')
@@ -506,20 +1331,73 @@ def git_merge_base(context: RepoContext, base: Union[Object, str], ref: Optional
         ref_target(ref),
     ]
 
-    returncode, out, err = git(context, *command)
+    returncode, out, err = await git_async(context, *command)
+    return __parse_merge_base(returncode, out)
 
-    if returncode == os.EX_OK:
-        lines = out.splitlines()
-        if len(lines) == 1:
-            return lines[0].decode('utf-8')
-    return None
+
+def git_merge_bases(context: RepoContext,
+                    pairs: typing.Iterable[typing.Tuple[Union[Object, str], Union[Object, str]]]) \
+        -> List[Optional[str]]:
+    """
+    Resolves the merge bases of many (base, ref) pairs. The history of all pairs is loaded
+    into the commit graph at once, instead of one git invocation per pair.
+    Without a commit graph, the git invocations of the pairs run concurrently.
+    :returns the merge bases in the order of the pairs
+    """
+    pairs = list(pairs)
+    commits = set()
+    keys = list()
+    for base, ref in pairs:
+        base_commit = resolve_commit(context, base)
+        ref_commit = resolve_commit(context, ref)
+        commits.update(commit for commit in [base_commit, ref_commit] if commit is not None)
+        keys.append((base_commit, ref_commit, False)
+                    if base_commit is not None and ref_commit is not None else None)
+
+    if get_commit_graph(context, *sorted(commits)) is None \
+            and type(get_backend(context)) is SubprocessBackend:
+        # each pair requires a git merge-base invocation, run those of pairs not yet memoized concurrently
+        queried = [(key, base, ref) for key, (base, ref) in zip(keys, pairs)
+                   if key is not None and __get_memoized_merge_base(context, key) is context]
+        if len(queried) > 1:
+            merge_bases = run_concurrently(*[git_merge_base_async(context, key[0], key[1])
+                                             for key, base, ref in queried])
+            for (key, base, ref), merge_base in zip(queried, merge_bases):
+                __memoize_merge_base(context, key, merge_base)
+
+    return [git_merge_base(context, base, ref) for base, ref in pairs]
+
+
+def git_iter_lines(context: RepoContext, *args) -> typing.Generator[str, None, None]:
+    """
+    Streams the output of a git command line by line.
+    The child process is killed, when the generator is closed before reaching the end of the output.
+    """
+    popen_args = dict()
+    popen_args['stdin'] = subprocess.DEVNULL
+    if context.verbose < const.TRACE_VERBOSITY:
+        popen_args['stderr'] = subprocess.DEVNULL
+
+    args = list(args)
+    # spans the time until the output is consumed
+    with tracing.span('git ' + tracing.get_sub_command(args), 'git', command=args):
+        proc = git_raw_popen(git=context.git, args=args, verbose=context.verbose, dir=context.dir, **popen_args)
+        try:
+            for line in proc.stdout:
+                yield line.decode('utf-8').rstrip('\n')
+            proc.wait()
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
 
 
 def git_list_commits(context: RepoContext, start: Union[Object, str, None], end: Union[Object, str], reverse=False,
-                     options: list = None) -> typing.Iterable:
+                     options: list = None) -> typing.Generator[Commit, None, None]:
     """"
+    Lazily lists commits as rev-list emits them, stopping early does not wait for the remaining history.
     :returns branch commits in reverse chronological order
-    :rtype: list of str
     """
 
     args = ['rev-list']
@@ -530,23 +1408,287 @@ def git_list_commits(context: RepoContext, start: Union[Object, str, None], end:
         args.extend(options)
     args.append((ref_target(start) + '..' if start is not None else '') + ref_target(end))
 
-    returncode, out, err = git(context, *args)
+    if start is not None:
+        start_obj = Object("commit", ref_target(start))
+    else:
+        start_obj = None
 
-    def commit_line_to_object(line: str) -> Object:
-        hashes = line.split()
-        return Commit(hashes[0], hashes[1:] if len(hashes) > 1 else [])
+    if reverse and start_obj is not None:
+        yield start_obj
 
-    commits = [commit_line_to_object(line) for line in out.decode('utf-8').splitlines()]
-    if start is not None:
-        start_obj = Object()
-        start_obj.obj_type = "commit"
-        start_obj.obj_name = ref_target(start)
+    commit_graph = None
+    if all(option == '--first-parent' for option in options or []):
+        start_commit = resolve_commit(context, start) if start is not None else None
+        end_commit = resolve_commit(context, end)
+        if end_commit is not None and (start is None or start_commit is not None):
+            commit_graph = get_commit_graph(context, *filter(None, [start_commit, end_commit]))
+
+    if commit_graph is not None:
+        commits = commit_graph.walk(end_commit, start_commit, first_parent=options is not None and len(options) > 0)
         if reverse:
-            return itertools.chain([start_obj], commits)
+            commits = reversed(list(commits))
+        for commit, parents in commits:
+            yield Commit(commit, parents)
+    else:
+        for line in git_iter_lines(context, *args):
+            # a commit hash recurs as the parent of its children
+            hashes = [sys.intern(commit) for commit in line.split()]
+            yield Commit(hashes[0], hashes[1:])
+
+    if not reverse and start_obj is not None:
+        yield start_obj
+
+
+def resolve_commit(context: RepoContext, object: Union[Object, str]) -> Optional[str]:
+    """
+    :returns the commit hash of an object, a commit hash or a ref name
+    """
+    if isinstance(object, Object):
+        return ref_target(object)
+
+    if re.fullmatch(r'[0-9a-f]{40}|[0-9a-f]{64}', object):
+        return object
+
+    # lookup order of git rev-parse
+    snapshot = get_ref_snapshot(context)
+    for ref_name in [object,
+                     create_ref_name('refs', object),
+                     create_ref_name(const.LOCAL_TAG_PREFIX, object),
+                     create_ref_name(const.LOCAL_BRANCH_PREFIX, object),
+                     create_ref_name(const.REMOTES_PREFIX, object)]:
+        ref = snapshot.get(ref_name)
+        if ref is not None and ref.target.obj_type == 'commit':
+            return ref.target.obj_name
+
+    return git_rev_parse(context, '--verify', '--quiet', object + '^{commit}')
+
+
+def __load_git_dirs(context: RepoContext):
+    if context.git_dir is None or context.common_dir is None:
+        context.git_dir, context.common_dir = get_backend(context).get_git_dirs()
+
+
+def git_get_git_dir(context: RepoContext) -> str:
+    """
+    :returns the absolute path of the git directory of the worktree
+    """
+    __load_git_dirs(context)
+    return context.git_dir
+
+
+def git_get_common_dir(context: RepoContext) -> str:
+    """
+    :returns the absolute path of the git directory shared by all worktrees of the repository
+    """
+    __load_git_dirs(context)
+    return context.common_dir
+
+
+def get_tag_stamp(context: RepoContext) -> Optional[tuple]:
+    """
+    :returns a stamp of the files, that store the tags of the repository
+    or None, if tag updates are not reflected in the file system
+    """
+    common_dir = git_get_common_dir(context)
+    if common_dir is None or os.path.exists(os.path.join(common_dir, 'reftable')):
+        return None
+    return (filesystem.get_file_stamp(os.path.join(common_dir, 'packed-refs')),) \
+        + filesystem.get_tree_stamp(os.path.join(common_dir, 'refs', 'tags'))
+
+
+def get_repo_cache_dir(context: RepoContext, name: str) -> str:
+    """
+    :returns a cache directory, that is specific to the repository and shared by its worktrees
+    """
+    common_dir = git_get_common_dir(context)
+    repo_key = hashlib.sha1(common_dir.encode('utf-8')).hexdigest()
+
+    cache_dir = filesystem.get_cache_dir(os.path.join(name, repo_key))
+    repo_file_path = os.path.join(cache_dir, 'repo')
+    if not os.path.isfile(repo_file_path):
+        with open(repo_file_path, 'w') as repo_file:
+            repo_file.write(common_dir)
+        prune_repo_cache_dirs(name)
+    return cache_dir
+
+
+def prune_repo_cache_dirs(name: str):
+    """
+    Deletes the cache directories of repositories, that no longer exist.
+    """
+    cache_root_dir = filesystem.get_cache_dir(name)
+    for repo_key in os.listdir(cache_root_dir):
+        cache_dir = os.path.join(cache_root_dir, repo_key)
+        try:
+            with open(os.path.join(cache_dir, 'repo'), 'r') as repo_file:
+                common_dir = repo_file.read()
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        if not os.path.isdir(common_dir):
+            shutil.rmtree(path=cache_dir, ignore_errors=True)
+
+
+def __load_commit_graph(context: RepoContext, commit_graph: CommitGraph, commits: List[str]) -> bool:
+    """
+    Adds the history of commits to a commit graph.
+    :returns False, if the history could not be listed
+    """
+    history = get_backend(context).list_history(commits, commit_graph.get_head_hashes())
+    if history is None:
+        return False
+
+    for commit, timestamp, parents in history:
+        commit_graph.add(commit, timestamp, parents)
+    return True
+
+
+def get_commit_graph(context: RepoContext, *commits: str) -> Optional[CommitGraph]:
+    """
+    Loads the commit graph of the repository, extended by the history of commits, if not yet contained.
+    The graph is persisted in the cache directory.
+    :returns the commit graph or None, if it does not contain all commits
+    """
+    if not context.use_commit_graph:
+        return None
+
+    with context.commit_graph_lock:
+        return __get_commit_graph(context, *commits)
+
+
+def __get_commit_graph(context: RepoContext, *commits: str) -> Optional[CommitGraph]:
+    cache_file_path = os.path.join(get_repo_cache_dir(context, 'commit-graph'), 'graph') \
+        if context.persistent_cache else None
+
+    if context.commit_graph is None:
+        if cache_file_path is not None:
+            context.commit_graph = CommitGraph.read(cache_file_path)
+        if context.commit_graph is None:
+            context.commit_graph = CommitGraph(len(commits[0]) // 2 if len(commits) else 20)
+
+    missing_commits = [commit for commit in commits if commit not in context.commit_graph]
+    if len(missing_commits):
+        if not __load_commit_graph(context, context.commit_graph, missing_commits):
+            # the heads of the cached graph may no longer exist
+            context.commit_graph = CommitGraph(len(missing_commits[0]) // 2)
+            if not __load_commit_graph(context, context.commit_graph, missing_commits):
+                return None
+        if cache_file_path is not None and context.commit_graph.modified:
+            context.commit_graph.write(cache_file_path)
+
+    if any(commit not in context.commit_graph for commit in commits):
+        return None
+    return context.commit_graph
+
+
+def __read_first_parent_file(path: str) -> typing.Tuple[Optional[str], typing.FrozenSet[str]]:
+    """
+    :returns the tip and the first parent set stored in a first parent cache file
+    """
+    try:
+        with open(path, 'rb') as cache_file:
+            header = cache_file.readline().decode('utf-8').split()
+            data = cache_file.read()
+    except FileNotFoundError:
+        return None, frozenset()
+
+    if len(header) != 2 or header[0] != 'tip':
+        return None, frozenset()
+    tip = header[1]
+    hash_size = len(tip) // 2
+    if len(data) % hash_size:
+        return None, frozenset()
+    return tip, frozenset(data[pos:pos + hash_size].hex() for pos in range(0, len(data), hash_size))
+
+
+def __write_first_parent_file(path: str, tip: str, first_parent_set: typing.FrozenSet[str]):
+    temp_path = path + '.' + str(os.getpid()) + '.tmp'
+    with open(temp_path, 'wb') as cache_file:
+        cache_file.write(('tip ' + tip + '\n').encode('utf-8'))
+        cache_file.write(b''.join(bytes.fromhex(commit) for commit in first_parent_set))
+    filesystem.replace_file(temp_path, path)
+
+
+def __list_first_parents(context: RepoContext, start: Optional[str], end: str) \
+        -> Optional[typing.FrozenSet[str]]:
+    """
+    :returns the first parent chain of end down to start (inclusive) or None, if start is not on that chain
+    """
+    commit_graph = get_commit_graph(context, *filter(None, [start, end]))
+    if commit_graph is not None:
+        first_parents = set()
+        for commit in commit_graph.first_parent_chain(end):
+            first_parents.add(commit)
+            if commit == start:
+                break
         else:
-            return itertools.chain(commits, [start_obj])
+            if start is not None:
+                return None
+        return frozenset(first_parents)
+
+    first_parents = set()
+    last_commit = None
+    for commit in git_list_commits(context=context, start=None, end=(start + '..' if start is not None else '') + end,
+                                   options=['--first-parent']):
+        first_parents.add(commit.obj_name)
+        last_commit = commit
+
+    if start is not None:
+        if start != end and (last_commit is None or not len(last_commit.parents) or last_commit.parents[0] != start):
+            return None
+        first_parents.add(start)
+    return frozenset(first_parents)
+
+
+def git_get_first_parent_set(context: RepoContext, tip: Union[Object, str]) -> typing.FrozenSet[str]:
+    """
+    For named tips, the set is persisted in the cache directory and extended incrementally,
+    when the tip moves forward along its first parent chain.
+    :returns the hashes of all commits on the first parent chain of tip
+    """
+    tip_commit = resolve_commit(context, tip)
+    if tip_commit is None:
+        return frozenset()
+
+    with context.commit_graph_lock:
+        return __get_first_parent_set(context, tip, tip_commit)
+
+
+def __get_first_parent_set(context: RepoContext, tip: Union[Object, str], tip_commit: str) -> typing.FrozenSet[str]:
+    if context.first_parent_sets is None:
+        context.first_parent_sets = dict()
+
+    first_parent_set = context.first_parent_sets.get(tip_commit)
+    if first_parent_set is not None:
+        return first_parent_set
+
+    if isinstance(tip, Ref):
+        tip_name = tip.name
+    elif isinstance(tip, str) and tip != tip_commit:
+        tip_name = tip
+    else:
+        tip_name = None
+
+    if tip_name is not None and context.persistent_cache:
+        cache_file_path = os.path.join(get_repo_cache_dir(context, 'first-parent'),
+                                       hashlib.sha1(tip_name.encode('utf-8')).hexdigest())
+        cached_tip, cached_set = __read_first_parent_file(cache_file_path)
+
+        if cached_tip == tip_commit:
+            first_parent_set = cached_set
+        elif cached_tip is not None:
+            new_first_parents = __list_first_parents(context, cached_tip, tip_commit)
+            if new_first_parents is not None:
+                first_parent_set = cached_set | new_first_parents
+
+        if first_parent_set is None:
+            first_parent_set = __list_first_parents(context, None, tip_commit)
+        if cached_tip != tip_commit:
+            __write_first_parent_file(cache_file_path, tip_commit, first_parent_set)
     else:
-        return commits
+        first_parent_set = __list_first_parents(context, None, tip_commit)
+
+    context.first_parent_sets[tip_commit] = first_parent_set
+    return first_parent_set
 
 
 def git_get_branch_commits(context: RepoContext,
@@ -557,9 +1699,7 @@ def git_get_branch_commits(context: RepoContext,
     :rtype: list of str
     """
 
-    # TODO optimize
-    base_branch_commits = git_list_commits(context=context, start=None, end=base_branch, options=['--first-parent'])
-    base_branch_commits = set([commit.obj_name for commit in base_branch_commits])
+    base_branch_commits = git_get_first_parent_set(context, base_branch)
 
     commit_buffer = []
 
@@ -606,20 +1746,144 @@ def git_get_branch_tags(context: RepoContext,
 
 
 def git_tag(context: RepoContext, tag_name: str, obj: Union[Object, str]) -> bool:
-    returncode, out, err = git(context, 'tag', tag_name, ref_target(obj))
+    created = get_backend(context).tag(tag_name, ref_target(obj))
 
-    # invalidate cached tags
-    context.tags = None
+    # invalidate cached refs and tags
+    invalidate_refs(context)
 
-    return returncode == os.EX_OK
+    return created
+
+
+def git_push(context: RepoContext, remote: str, refspecs: List[str], leases: typing.Dict[str, str] = None,
+             atomic=False, dry_run=False, verbose=False) -> int:
+    """
+    :param leases: the expected values of remote refs by name, an empty value to expect the absence of a ref
+    :returns the exit code of git push
+    """
+    returncode = get_backend(context).push(remote, refspecs, leases or dict(), atomic, dry_run, verbose)
+
+    # remote tracking refs may have been updated
+    invalidate_refs(context)
+
+    return returncode
 
 
 def git_branch(context: RepoContext, tag_name: str, obj: Union[Object, str]) -> bool:
     returncode, out, err = git(context, 'branch', tag_name, ref_target(obj))
 
+    # invalidate cached refs
+    invalidate_refs(context)
+
     return returncode == os.EX_OK
 
 
+class ObjectInfo(object):
+    obj_name: str
+    obj_type: str
+    obj_size: int
+
+
+class BatchObjectReader(object):
+    """
+    A long-lived git cat-file process, which answers object queries through a pipe.
+    """
+
+    context: RepoContext = None
+    batch_option: str = None
+    proc: subprocess.Popen = None
+    lock: threading.Lock = None
+
+    def __init__(self, context: RepoContext, batch_option: str):
+        """
+        :param batch_option: '--batch-check' for object info only, '--batch' for object info and contents
+        """
+        self.context = context
+        self.batch_option = batch_option
+        self.lock = threading.Lock()
+
+    def __start(self):
+        if self.proc is None or self.proc.poll() is not None:
+            self.proc = git_raw_popen(git=self.context.git,
+                                      args=['cat-file', self.batch_option],
+                                      dir=self.context.dir,
+                                      verbose=self.context.verbose,
+                                      stderr=subprocess.DEVNULL)
+        return self.proc
+
+    def __query(self, object_name: str) -> Optional[ObjectInfo]:
+        if '\n' in object_name:
+            raise ValueError("invalid object name: " + repr(object_name))
+
+        proc = self.__start()
+        proc.stdin.write(object_name.encode('utf-8') + b'\n')
+        proc.stdin.flush()
+
+        header = proc.stdout.readline()
+        if not len(header):
+            self.close()
+            raise RuntimeError("git cat-file terminated unexpectedly")
+
+        header = header.decode('utf-8').rstrip('\n')
+        if header.rsplit(' ', 1)[-1] in ('missing', 'ambiguous'):
+            # <object> missing|ambiguous, where <object> may contain spaces
+            return None
+
+        header = header.split(' ')
+        info = ObjectInfo()
+        info.obj_name = header[0]
+        info.obj_type = header[1]
+        info.obj_size = int(header[2])
+        return info
+
+    def get_info(self, object_name: str) -> Optional[ObjectInfo]:
+        with self.lock:
+            return self.__query(object_name)
+
+    def get_contents(self, object_name: str) -> Optional[typing.Tuple[ObjectInfo, bytes]]:
+        with self.lock:
+            info = self.__query(object_name)
+            if info is None:
+                return None
+            contents = self.proc.stdout.read(info.obj_size)
+            # skip the trailing LF
+            self.proc.stdout.read(1)
+            return info, contents
+
+    def close(self):
+        if self.proc is not None:
+            proc = self.proc
+            self.proc = None
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            finally:
+                proc.stdout.close()
+
+
+def get_object_info_reader(context: RepoContext) -> BatchObjectReader:
+    if context.object_info_reader is None:
+        context.object_info_reader = BatchObjectReader(context, '--batch-check')
+    return context.object_info_reader
+
+
+def get_object_reader(context: RepoContext) -> BatchObjectReader:
+    if context.object_reader is None:
+        context.object_reader = BatchObjectReader(context, '--batch')
+    return context.object_reader
+
+
+def git_get_object_info(context: RepoContext, object_name: Union[Object, str]) -> Optional[ObjectInfo]:
+    return get_backend(context).get_object_info(ref_target(object_name))
+
+
+def git_read_object(context: RepoContext, object_name: Union[Object, str]) -> Optional[bytes]:
+    object_contents = get_backend(context).read_object(ref_target(object_name))
+    return object_contents[1] if object_contents is not None else None
+
+
 class TreeEntry(object):
     file_flags: str
     object_type: str
@@ -628,41 +1892,56 @@ class TreeEntry(object):
     file_path: str
 
 
-def get_file_entry(context: RepoContext, object: Object, path: str) -> TreeEntry:
-    files = git_for_lines(context, *['ls-tree', '-rlz', object, path])
+TREE_ENTRY_TYPES = {
+    '40000': 'tree',
+    '160000': 'commit',
+}
 
-    if files is None:
-        raise RuntimeError("File lookup failed")
 
-    if len(files) == 0:
-        raise FileNotFoundError("Not such file: " + path)
-    elif len(files) > 1:
-        raise FileNotFoundError("Not a unique regular file: " + path)
-    else:
-        entry = TreeEntry()
+def parse_tree(tree: bytes, hash_size: int) -> typing.Generator[typing.Tuple[str, str, str], None, None]:
+    """
+    :returns (mode, name, hash) triples of a raw tree object,
+    with bytes of names, that are not valid UTF-8, decoded as surrogates like by os.fsdecode()
+    """
+    pos = 0
+    while pos < len(tree):
+        name_end = tree.index(b'\0', pos)
+        mode, name = tree[pos:name_end].split(b' ', 1)
+        pos = name_end + 1 + hash_size
+        yield mode.decode('utf-8'), name.decode('utf-8', 'surrogateescape'), tree[name_end + 1:pos].hex()
 
-        parts = files[0].split('\t')
-        assert len(parts) == 2
 
-        attrs = parts[0].split()
-        assert len(attrs) == 4
+def get_file_entry(context: RepoContext, object: Union[Object, str], path: str) -> TreeEntry:
+    path = path.strip('/')
+    parent_path, file_name = os.path.split(path)
+    commit = ref_target(object)
 
-        assert parts[1][-1] == '\0'
-        parts[1] = parts[1][:-1]
+    info = git_get_object_info(context, commit + ':' + path)
+    if info is None:
+        raise FileNotFoundError("Not such file: " + path)
+    elif info.obj_type != 'blob':
+        raise FileNotFoundError("Not a unique regular file: " + path)
 
-        entry.file_flags = attrs[0]
-        entry.object_type = attrs[1]
-        entry.object_hash = attrs[2]
-        entry.object_size = attrs[3]
-        entry.file_path = parts[1]
+    # the mode is only present in the parent tree
+    parent_tree = git_read_object(context, commit + ':' + parent_path)
+    if parent_tree is None:
+        raise RuntimeError("File lookup failed")
 
-        return entry
+    for mode, name, object_hash in parse_tree(parent_tree, len(info.obj_name) // 2):
+        if name == file_name:
+            entry = TreeEntry()
+            entry.file_flags = mode
+            entry.object_type = info.obj_type
+            entry.object_hash = object_hash
+            entry.object_size = str(info.obj_size)
+            entry.file_path = path
+            return entry
 
+    raise RuntimeError("File lookup failed")
 
-def get_file_entry_contents(context: RepoContext, tree_entry: TreeEntry):
-    returncode, out, err = git(context, *['cat-file', 'blob', tree_entry.object_hash])
 
-    return out if returncode == os.EX_OK else None
+def get_file_entry_contents(context: RepoContext, tree_entry: TreeEntry):
+    return git_read_object(context, tree_entry.object_hash)
 
 
 def get_file_contents(context: RepoContext, commit_object: Union[Object, str], file_path: str):
@@ -671,3 +1950,241 @@ def get_file_contents(context: RepoContext, commit_object: Union[Object, str], f
         return None
 
     return get_file_entry_contents(context, entry)
+
+
+def git_hash_object(context: RepoContext, contents: bytes) -> Optional[str]:
+    """
+    Writes a blob to the object database.
+    :returns the hash of the blob
+    """
+    return get_backend(context).hash_object(contents)
+
+
+def git_mktree(context: RepoContext, entries: typing.List[typing.Tuple[str, str, str]]) -> Optional[str]:
+    """
+    Writes a tree object to the object database.
+    :param entries: (mode, name, hash) triples as returned by parse_tree()
+    :returns the hash of the tree
+    """
+    return get_backend(context).mktree(entries)
+
+
+def git_update_tree(context: RepoContext, tree: Optional[str], path: str, blob: str, mode: str = None) -> Optional[str]:
+    """
+    Writes a copy of a tree with the blob at path added or replaced, without using an index or a working tree.
+    Only the trees along the path are rewritten.
+    :param tree: the tree to update or None to start with an empty tree
+    :param mode: the file mode, defaults to the mode of the replaced file or 100644
+    :returns the hash of the new tree
+    """
+    name, sep, sub_path = path.strip('/').partition('/')
+
+    entries = list()
+    if tree is not None:
+        tree_contents = get_backend(context).read_object(tree)
+        if tree_contents is None or tree_contents[0].obj_type != 'tree':
+            return None
+        entries.extend(parse_tree(tree_contents[1], len(tree_contents[0].obj_name) // 2))
+
+    existing_entry = next((entry for entry in entries if entry[1] == name), None)
+    if len(sub_path):
+        sub_tree = existing_entry[2] \
+            if existing_entry is not None and TREE_ENTRY_TYPES.get(existing_entry[0]) == 'tree' \
+            else None
+        new_entry = ('40000', name, git_update_tree(context, sub_tree, sub_path, blob, mode))
+        if new_entry[2] is None:
+            return None
+    else:
+        if mode is None:
+            mode = existing_entry[0] \
+                if existing_entry is not None and TREE_ENTRY_TYPES.get(existing_entry[0], 'blob') == 'blob' \
+                else '100644'
+        new_entry = (mode, name, blob)
+
+    entries = [entry for entry in entries if entry[1] != name]
+    entries.append(new_entry)
+    return git_mktree(context, entries)
+
+
+class GitBackend(ABC):
+    """
+    The operations on the object database and the refs of a repository, that do not depend on a working tree.
+    Implementations are bound to a context and may be called from multiple threads.
+    """
+
+    context: RepoContext = None
+
+    def __init__(self, context: RepoContext):
+        self.context = context
+
+    @abstractmethod
+    def get_git_dirs(self) -> typing.Tuple[Optional[str], Optional[str]]:
+        """
+        :returns the absolute paths of the git directory of the worktree and the common git directory
+        """
+        pass
+
+    @abstractmethod
+    def list_refs(self, *args) -> List[Ref]:
+        """
+        :param args: git for-each-ref arguments
+        """
+        pass
+
+    @abstractmethod
+    def list_history(self, commits: List[str], excluded_commits: List[str]) \
+            -> Optional[List[typing.Tuple[str, int, List[str]]]]:
+        """
+        :returns (commit, commit time, parents) of the history of commits, that is not reachable from
+        excluded_commits, parents first or None, if a commit does not exist
+        """
+        pass
+
+    @abstractmethod
+    def merge_base(self, base: str, ref: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def get_object_info(self, object_name: str) -> Optional[ObjectInfo]:
+        """
+        :param object_name: an object hash, a ref name or <commit>:<path>
+        """
+        pass
+
+    @abstractmethod
+    def read_object(self, object_name: str) -> Optional[typing.Tuple[ObjectInfo, bytes]]:
+        pass
+
+    @abstractmethod
+    def hash_object(self, contents: bytes) -> Optional[str]:
+        """
+        Writes a blob to the object database.
+        """
+        pass
+
+    @abstractmethod
+    def mktree(self, entries: typing.List[typing.Tuple[str, str, str]]) -> Optional[str]:
+        """
+        Writes a tree to the object database.
+        :param entries: (mode, name, hash) triples as returned by parse_tree()
+        """
+        pass
+
+    @abstractmethod
+    def tag(self, tag_name: str, object_name: str) -> bool:
+        """
+        Creates a lightweight tag, unless it exists.
+        """
+        pass
+
+    @abstractmethod
+    def push(self, remote: str, refspecs: List[str], leases: typing.Dict[str, str],
+             atomic: bool, dry_run: bool, verbose: bool) -> int:
+        pass
+
+    def close(self):
+        pass
+
+
+class SubprocessBackend(GitBackend):
+    """
+    Runs git for each operation, object reads are answered by long-lived git cat-file processes.
+    """
+
+    def get_git_dirs(self) -> typing.Tuple[Optional[str], Optional[str]]:
+        lines = git_for_lines(self.context, 'rev-parse', '--absolute-git-dir', '--git-common-dir')
+        if lines is None or len(lines) != 2:
+            return None, None
+        return lines[0], os.path.realpath(os.path.join(self.context.dir, lines[1]))
+
+    def list_refs(self, *args) -> List[Ref]:
+        returncode, out, err = git(self.context, 'for-each-ref', '--format', REF_FORMAT, *args)
+        return list(parse_refs(returncode, out))
+
+    def list_history(self, commits: List[str], excluded_commits: List[str]) \
+            -> Optional[List[typing.Tuple[str, int, List[str]]]]:
+        rev_list_input = list(commits)
+        rev_list_input.extend('^' + commit for commit in excluded_commits)
+
+        returncode, out, err = git_with_input(self.context, ('\n'.join(rev_list_input) + '\n').encode('utf-8'),
+                                              'rev-list', '--parents', '--timestamp', '--topo-order', '--reverse',
+                                              '--stdin')
+        if returncode != os.EX_OK:
+            return None
+
+        history = list()
+        for line in out.decode('utf-8').splitlines():
+            fields = line.split()
+            history.append((fields[1], int(fields[0]), fields[2:]))
+        return history
+
+    def merge_base(self, base: str, ref: str) -> Optional[str]:
+        return git_for_line(self.context, 'merge-base', base, ref)
+
+    def get_object_info(self, object_name: str) -> Optional[ObjectInfo]:
+        return get_object_info_reader(self.context).get_info(object_name)
+
+    def read_object(self, object_name: str) -> Optional[typing.Tuple[ObjectInfo, bytes]]:
+        return get_object_reader(self.context).get_contents(object_name)
+
+    def hash_object(self, contents: bytes) -> Optional[str]:
+        returncode, out, err = git_with_input(self.context, contents, 'hash-object', '-w', '--stdin')
+        lines = out.decode('utf-8').split()
+        return lines[0] if returncode == os.EX_OK and len(lines) == 1 else None
+
+    def mktree(self, entries: typing.List[typing.Tuple[str, str, str]]) -> Optional[str]:
+        tree_input = b''.join((mode + ' ' + TREE_ENTRY_TYPES.get(mode, 'blob') + ' ' + obj_hash + '\t' + name + '\0')
+                              .encode('utf-8', 'surrogateescape')
+                              for mode, name, obj_hash in entries)
+        returncode, out, err = git_with_input(self.context, tree_input, 'mktree', '-z')
+        lines = out.decode('utf-8').split()
+        return lines[0] if returncode == os.EX_OK and len(lines) == 1 else None
+
+    def tag(self, tag_name: str, object_name: str) -> bool:
+        returncode, out, err = git(self.context, 'tag', tag_name, object_name)
+        return returncode == os.EX_OK
+
+    def push(self, remote: str, refspecs: List[str], leases: typing.Dict[str, str],
+             atomic: bool, dry_run: bool, verbose: bool) -> int:
+        command = ['push']
+        if atomic:
+            command.append('--atomic')
+        if dry_run:
+            command.append('--dry-run')
+        if verbose:
+            command.append('--verbose')
+        command.extend('--force-with-lease=' + ref + ':' + expected for ref, expected in leases.items())
+        command.append(remote)
+        command.extend(refspecs)
+
+        returncode, out, err = git(self.context, *command)
+        return returncode
+
+
+def create_backend(context: RepoContext) -> GitBackend:
+    """
+    :returns the backend named by the context or the environment, the subprocess backend, if it is not available
+    """
+    backend_name = context.backend_name or os.environ.get(const.GIT_BACKEND_ENV) or const.GIT_BACKEND_SUBPROCESS
+
+    if backend_name == const.GIT_BACKEND_DULWICH:
+        try:
+            from gitflow import dulwich_backend
+        except ImportError:
+            dulwich_backend = None
+        backend = dulwich_backend.create_backend(context) if dulwich_backend is not None else None
+        if backend is not None:
+            return backend
+        if context.verbose >= const.DEBUG_VERBOSITY:
+            cli.eprint("git backend " + repr(backend_name) + " not available, using git subprocesses")
+    elif backend_name != const.GIT_BACKEND_SUBPROCESS:
+        if context.verbose >= const.DEBUG_VERBOSITY:
+            cli.eprint("unknown git backend " + repr(backend_name) + ", using git subprocesses")
+
+    return SubprocessBackend(context)
+
+
+def get_backend(context: RepoContext) -> GitBackend:
+    if context.backend is None:
+        context.backend = create_backend(context)
+    return context.backend
@@ -0,0 +1,250 @@
+"""
+Timing of commands, git invocations including clones and pushes, build steps and version change actions.
+Spans are recorded only after enable() has been called, otherwise span() returns a shared no-op.
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+
+# frames of these modules are skipped when determining the procedure, that issued a span
+INTERNAL_MODULES = {
+    __name__,
+    'gitflow.repotools',
+    'contextlib',
+}
+# thin git wrappers, whose frames are skipped as well
+INTERNAL_FUNCTIONS = {
+    ('gitflow.procedures.common', 'git'),
+    ('gitflow.procedures.common', 'git_or_fail'),
+    ('gitflow.procedures.common', 'git_for_line_or_fail'),
+}
+
+# the number of calls listed in the summary
+SLOWEST_CALL_COUNT = 10
+# the maximum length of a command line in the summary
+MAX_COMMAND_LENGTH = 100
+# the package of the event loop, the frames of asynchronous calls lead into
+EVENT_LOOP_MODULE = 'asyncio'
+# the track ids of concurrent asynchronous spans are offset by this value to keep them apart from thread ids
+ASYNC_TRACK_OFFSET = 1 << 16
+
+
+class Span(object):
+    recorder: 'Recorder' = None
+    name: str = None
+    category: str = None
+    procedure: str = None
+    """the function, that issued the span, as module:function"""
+    thread_id: int = None
+    """the track of the span, the thread or, for concurrent asynchronous spans, a track of their own"""
+    concurrent = False
+    async_track: int = None
+    start: int = None
+    """nanoseconds since the recorder has been enabled"""
+    duration: int = None
+    args: dict = None
+
+    def __enter__(self):
+        if self.concurrent:
+            self.async_track = self.recorder.acquire_async_track()
+            self.thread_id = ASYNC_TRACK_OFFSET + self.async_track
+        self.start = time.perf_counter_ns() - self.recorder.start
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter_ns() - self.recorder.start - self.start
+        self.recorder.spans.append(self)
+        if self.concurrent:
+            self.recorder.release_async_track(self.async_track)
+
+
+class NoSpan(object):
+    args: dict = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class Recorder(object):
+    start: int = None
+    spans: List[Span] = None
+    """completed spans, appended concurrently"""
+    fork_count = 0
+    fork_lock = threading.Lock()
+    async_tracks: set = None
+    """the tracks of the asynchronous spans in progress"""
+
+    def __init__(self):
+        self.start = time.perf_counter_ns()
+        self.spans = list()
+        self.async_tracks = set()
+
+    def acquire_async_track(self) -> int:
+        with self.fork_lock:
+            track = next(track for track in range(len(self.async_tracks) + 1) if track not in self.async_tracks)
+            self.async_tracks.add(track)
+            return track
+
+    def release_async_track(self, track: int):
+        with self.fork_lock:
+            self.async_tracks.discard(track)
+
+
+__recorder: Optional[Recorder] = None
+__no_span = NoSpan()
+# the procedure, that started the event loop of the running asynchronous calls
+__loop_procedure = contextvars.ContextVar('loop_procedure', default=None)
+
+
+def enable():
+    global __recorder
+    __recorder = Recorder()
+
+
+def disable():
+    global __recorder
+    __recorder = None
+
+
+def is_enabled() -> bool:
+    return __recorder is not None
+
+
+def get_procedure(depth: int = 2) -> Optional[str]:
+    """
+    :param depth: the number of frames to skip, by default those of this function and its caller
+    """
+    frame = sys._getframe(depth)
+    while frame is not None:
+        module_name = frame.f_globals.get('__name__')
+        if (module_name or '').partition('.')[0] == EVENT_LOOP_MODULE:
+            # coroutines are resumed by the event loop, not by the procedure, that created them
+            return __loop_procedure.get()
+        if module_name not in INTERNAL_MODULES \
+                and (module_name, frame.f_code.co_name) not in INTERNAL_FUNCTIONS:
+            return module_name + ':' + frame.f_code.co_name
+        frame = frame.f_back
+    return None
+
+
+def set_loop_procedure(procedure: Optional[str]):
+    """
+    Attributes the spans of asynchronous calls in the current context and the tasks created from it to a procedure.
+    """
+    __loop_procedure.set(procedure)
+
+
+def span(name: str, category: str, **args):
+    """
+    :returns a context manager, that records the time spent in its body
+    """
+    if __recorder is None:
+        return __no_span
+
+    result = Span()
+    result.recorder = __recorder
+    result.name = name
+    result.category = category
+    result.procedure = get_procedure()
+    result.thread_id = threading.get_ident()
+    result.args = args
+    return result
+
+
+def async_span(name: str, category: str, procedure: Optional[str], **args):
+    """
+    :param procedure: the procedure, that issued the call, determined before the first await
+    :returns a context manager like span(), on a track of its own, as asynchronous spans may overlap
+    """
+    if __recorder is None:
+        return __no_span
+
+    result = Span()
+    result.recorder = __recorder
+    result.name = name
+    result.category = category
+    result.procedure = procedure
+    result.concurrent = True
+    result.args = args
+    return result
+
+
+def count_fork():
+    if __recorder is not None:
+        with __recorder.fork_lock:
+            __recorder.fork_count += 1
+
+
+def get_sub_command(args: list) -> str:
+    """
+    :returns the first argument, that is not an option, or the first argument, if all are options
+    """
+    return next((arg for arg in args if isinstance(arg, str) and not arg.startswith('-')),
+                args[0] if len(args) and isinstance(args[0], str) else '')
+
+
+def write_trace(path: str):
+    """
+    Writes the recorded spans in the Chrome trace event format.
+    """
+    import json
+
+    events = list()
+    for recorded_span in sorted(__recorder.spans, key=lambda item: item.start):
+        args = dict(recorded_span.args)
+        if recorded_span.procedure is not None:
+            args['procedure'] = recorded_span.procedure
+        events.append({
+            'name': recorded_span.name,
+            'cat': recorded_span.category,
+            'ph': 'X',
+            'ts': recorded_span.start / 1000,
+            'dur': recorded_span.duration / 1000,
+            'pid': os.getpid(),
+            'tid': recorded_span.thread_id,
+            'args': args,
+        })
+
+    with open(path, 'w', encoding='utf-8') as trace_file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
+
+
+def get_summary() -> List[str]:
+    """
+    :returns the lines of a summary of the recorded git invocations
+    """
+    wall_time = time.perf_counter_ns() - __recorder.start
+    git_spans = [recorded_span for recorded_span in __recorder.spans if recorded_span.category == 'git']
+
+    lines = ['forks: {count}'.format(count=__recorder.fork_count),
+             'wall time: {time:.3f}s'.format(time=wall_time / 1e9),
+             'git time by subcommand:']
+
+    sub_command_times = dict()
+    for git_span in git_spans:
+        count, duration = sub_command_times.get(git_span.name, (0, 0))
+        sub_command_times[git_span.name] = count + 1, duration + git_span.duration
+    for name, (count, duration) in sorted(sub_command_times.items(), key=lambda item: item[1][1], reverse=True):
+        lines.append('  {name:<28} {count:>6} calls {time:>9.3f}s'.format(name=name, count=count,
+                                                                           time=duration / 1e9))
+
+    lines.append('slowest calls:')
+    calls = [recorded_span for recorded_span in __recorder.spans if recorded_span.category != 'command']
+    for recorded_span in sorted(calls, key=lambda item: item.duration, reverse=True)[:SLOWEST_CALL_COUNT]:
+        command = ' '.join(str(arg) for arg in recorded_span.args.get('command') or [recorded_span.name])
+        command = command.replace('\n', ' ')
+        if len(command) > MAX_COMMAND_LENGTH:
+            command = command[:MAX_COMMAND_LENGTH - 3] + '...'
+        lines.append('  {time:>9.3f}s {category}: {command} ({procedure})'.format(
+            time=recorded_span.duration / 1e9,
+            category=recorded_span.category,
+            command=command,
+            procedure=recorded_span.procedure or '-'))
+
+    return lines
@@ -1,8 +1,9 @@
+import functools
 import itertools
 import os
 import re
 import string
-from typing import Union, List, Optional, Dict
+from typing import Union, List, Optional, Dict, Iterable, Callable
 
 import semver
 
@@ -18,11 +19,14 @@ class VersionConfig(object):
 
 
 class Version(object):
-    major = None
-    minor = None
-    patch = None
-    prerelease = None
-    build = None
+    __slots__ = ('major', 'minor', 'patch', 'prerelease', 'build')
+
+    def __init__(self):
+        self.major = None
+        self.minor = None
+        self.patch = None
+        self.prerelease = None
+        self.build = None
 
     def __repr__(self):
         return format_version(self)
@@ -75,6 +79,45 @@ class VersionDelta(object):
         return result
 
 
+class VersionColumns(object):
+    """
+    Version fields of a sequence of strings, stored column by column.
+    The fields of strings, that do not match, are None.
+    """
+    names: List[str] = None
+    valid: bytearray = None
+    """1 for strings, that match"""
+    major: List[Optional[int]] = None
+    minor: List[Optional[int]] = None
+    patch: List[Optional[int]] = None
+    prerelease_type: List[Optional[str]] = None
+    prerelease_version: List[Optional[int]] = None
+    unique_code: List[Optional[int]] = None
+    unique_code_strings: List[Optional[str]] = None
+    """the unique codes as matched, including leading zeros"""
+    versions: List[Optional[str]] = None
+    """the formatted versions"""
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.valid = bytearray(len(names))
+        self.major = [None] * len(names)
+        self.minor = [None] * len(names)
+        self.patch = [None] * len(names)
+        self.prerelease_type = [None] * len(names)
+        self.prerelease_version = [None] * len(names)
+        self.unique_code = [None] * len(names)
+        self.unique_code_strings = [None] * len(names)
+        self.versions = [None] * len(names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+# the maximum number of sort keys memoized by a version matcher
+MAX_VERSION_KEY_COUNT = 16384
+
+
 class VersionMatcher(object):
     pattern = None
     group_major = None
@@ -88,9 +131,10 @@ class VersionMatcher(object):
     ref_name_infixes: List[str] = None
     ref_name_infix: str = None
     __format = None
+    __line_pattern = None
 
-    comparator = None
-    key_func = None
+    key: Callable[[str], Optional[tuple]] = None
+    """the memoized sort key of a string, bounded, as matchers outlive ref snapshots in the daemon"""
 
     def __init__(self, ref_roots: list, ref_name_infixes: Union[List[str], str, None], pattern: str,
                  format: str = None):
@@ -132,11 +176,18 @@ class VersionMatcher(object):
 
         self.__format = format
 
-        self.comparator = lambda tag_ref_a, tag_ref_b: semver.compare(
-            self.format(tag_ref_a.name),
-            self.format(tag_ref_b.name)
-        )
-        self.key_func = utils.cmp_to_key(self.comparator)
+        # matches the strings in a newline separated list in a single pass
+        self.__line_pattern = re.compile('^(?:' + full_pattern + ')$', re.MULTILINE)
+
+        self.key = functools.lru_cache(maxsize=MAX_VERSION_KEY_COUNT)(self.__key)
+
+    def __key(self, string: str) -> Optional[tuple]:
+        """
+        :returns a sort key of the version extracted from the input string, ordered like semver.compare(),
+        or None, if the string does not match
+        """
+        version = self.format(string)
+        return get_version_key(version) if version is not None else None
 
     def to_version(self, string: str) -> Version:
         version_str = self.format(string)
@@ -163,8 +214,9 @@ class VersionMatcher(object):
         match = self.pattern.fullmatch(string)
         if match is None:
             return None
-        fields = match.groupdict()
+        return self.__format_fields(match.groupdict())
 
+    def __format_fields(self, fields: Dict[str, str]) -> str:
         if self.__format is not None:
             return self.__format.format(**fields)
         else:
@@ -199,6 +251,47 @@ class VersionMatcher(object):
                 build=build,
             )
 
+    def parse_many(self, strings: Iterable[str]) -> 'VersionColumns':
+        """
+        Extracts the version fields of many strings at once.
+        :returns the fields in columns parallel to the input strings
+        """
+        columns = VersionColumns(list(strings))
+
+        positions = dict()
+        offset = 0
+        for index, string in enumerate(columns.names):
+            positions[offset] = index
+            offset += len(string) + 1
+
+        matches = [(positions[match.start()], match)
+                   for match in self.__line_pattern.finditer('\n'.join(columns.names))]
+        if any('\n' in match.group(0) for index, match in matches):
+            # the pattern is not confined to a single line, such as [^/]+, fall back to matching one by one
+            matches = [(index, match) for index, match in ((index, self.pattern.fullmatch(string))
+                                                           for index, string in enumerate(columns.names))
+                       if match is not None]
+
+        for index, match in matches:
+            columns.valid[index] = 1
+            columns.major[index] = self.__int_group(match, self.group_major)
+            columns.minor[index] = self.__int_group(match, self.group_minor)
+            columns.patch[index] = self.__int_group(match, self.group_patch) or 0
+            if self.group_prerelease_type is not None:
+                columns.prerelease_type[index] = match.group(self.group_prerelease_type)
+            columns.prerelease_version[index] = self.__int_group(match, self.group_prerelease_version)
+            if self.group_unique_code is not None:
+                unique_code = columns.unique_code_strings[index] = match.group(self.group_unique_code)
+                columns.unique_code[index] = int(unique_code) if unique_code is not None else None
+            columns.versions[index] = self.__format_fields(match.groupdict())
+
+        return columns
+
+    @staticmethod
+    def __int_group(match, group: Optional[int]) -> Optional[int]:
+        value = match.group(group) if group is not None else None
+        return int(value) if value is not None else None
+
     def to_version_info(self, string: str):
         version = self.format(string)
         if version is not None:
@@ -462,6 +555,22 @@ def determine_version_delta(a: Version, b: Version, prerelase_keywords_list: lis
     return delta
 
 
+def get_version_key(version_string: str) -> tuple:
+    """
+    :returns a sort key, that orders version strings like semver.compare()
+    """
+    version_info = semver.parse(version_string)
+    prerelease = version_info['prerelease']
+    if prerelease:
+        # numeric identifiers precede alphanumeric ones
+        prerelease_key = (0, tuple((0, int(token), '') if token.isdigit() else (1, 0, token)
+                                   for token in prerelease.split('.')))
+    else:
+        # a release follows its pre-releases
+        prerelease_key = (1,)
+    return version_info['major'], version_info['minor'], version_info['patch'], prerelease_key
+
+
 def compare_version_info(a: semver.VersionInfo, b: semver.VersionInfo):
     # TODO avoid superfluous conversions
     return semver.compare(format_version_info(a), format_version_info(b))
@@ -28,6 +28,10 @@ setup(name='gitflow',
       packages=determine_module_names('gitflow'),
       package_data={'gitflow': ['config.ini']},
       install_requires=load_requirements('requirements.txt'),
+      extras_require={
+          # in-process git backend, selected with GITFLOW_GIT_BACKEND=dulwich
+          'dulwich': ['dulwich>=0.20.6'],
+      },
       tests_require=load_requirements('test_requirements.txt'),
       zip_safe=False,
       entry_points={
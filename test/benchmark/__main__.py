@@ -0,0 +1,213 @@
+"""
+gitflow benchmark - Times git-flow commands on a synthetic repository
+Runs from the package root with python -m test.benchmark.
+
+Usage:
+ benchmark
+        [--release-branches=N] [--tags-per-branch=N] [--commits-per-branch=N] [--work-branches=N]
+        [--sequential] [--repeat=N] [--output=FILE] [--baseline=FILE] [--tolerance=FACTOR]
+ benchmark (-h|--help)
+
+Options:
+ -h --help                  Shows this screen.
+
+Repository Options:
+ --release-branches=N       The number of release branches [default: 10].
+ --tags-per-branch=N        The number of version tags along each release branch [default: 10].
+ --commits-per-branch=N     The number of commits on each release branch [default: 20].
+ --work-branches=N          The number of work branches [default: 10].
+ --sequential               Uses the semverWithSeq versioning scheme.
+
+Measurement Options:
+ --repeat=N                 The number of runs per command, the first one with a cold cache [default: 5].
+
+Report Options:
+ --output=FILE              Writes the report to FILE instead of stdout.
+ --baseline=FILE            Compares the median times against a previous report.
+                            Exits with a non-zero code, if a command regressed or its exit code changed.
+ --tolerance=FACTOR         The maximum ratio of a median time to its baseline [default: 1.25].
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from tempfile import TemporaryDirectory
+from typing import List, Optional
+
+import docopt
+
+from gitflow import const
+from test.benchmark.repogen import RepoSpec, generate_repo, git
+
+# the version of the report format, incremented on incompatible changes
+REPORT_FORMAT = 1
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Scenario(object):
+    name: str = None
+    args: List[str] = None
+    input: Optional[str] = None
+    """written to stdin, as git does for hooks"""
+
+    def __init__(self, name: str, args: List[str], input: str = None):
+        self.name = name
+        self.args = args
+        self.input = input
+
+
+def get_scenarios(spec: RepoSpec, working_copy: str) -> List[Scenario]:
+    latest_branch = 'release/1.' + str(spec.release_branches - 1)
+    head = git('-C', working_copy, 'rev-parse', 'HEAD').decode('utf-8').strip()
+    next_version = '1.' + str(spec.release_branches - 1) + '.' + str(spec.tags_per_branch) + '-alpha.1'
+
+    scenarios = [
+        Scenario('status', ['-B', 'status', '--all']),
+        Scenario('bump-major', ['-B', 'bump-major', '--dry-run', '--assume-yes']),
+        Scenario('bump-minor', ['-B', 'bump-minor', '--dry-run', '--assume-yes']),
+    ]
+    for command in ['bump-patch', 'bump-prerelease-type', 'bump-prerelease', 'bump-to-release']:
+        scenarios.append(Scenario(command, ['-B', command, '--dry-run', '--assume-yes', latest_branch]))
+    if not spec.sequential:
+        # explicit versions are not supported by semverWithSeq
+        scenarios.append(Scenario('bump-to', ['-B', 'bump-to', '--dry-run', '--assume-yes', next_version,
+                                              latest_branch]))
+    scenarios.extend([
+        Scenario('start', ['-B', 'start', '--dry-run', '--assume-yes', 'dev', 'feature', 'benchmark']),
+        Scenario('finish', ['-B', 'finish', '--dry-run', '--assume-yes', 'dev', 'feature', 'benchmark-0']),
+        Scenario('hook-pre-commit', ['--hook=pre-commit']),
+        Scenario('hook-pre-push', ['--hook=pre-push'],
+                 ' '.join(['refs/heads/master', head, 'refs/heads/master', head]) + '\n'),
+        Scenario('assemble', ['-B', 'assemble', '--inplace']),
+        Scenario('test', ['-B', 'test', '--inplace']),
+    ])
+    return scenarios
+
+
+def run_scenario(scenario: Scenario, working_copy: str, env: dict, repeat: int) -> dict:
+    exit_code = None
+    runs = list()
+    for index in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(args=[sys.executable, '-m', 'gitflow'] + scenario.args,
+                              input=scenario.input.encode('utf-8') if scenario.input is not None else None,
+                              cwd=working_copy, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        runs.append(round(time.perf_counter() - start, 6))
+        exit_code = proc.returncode
+
+    return {
+        'name': scenario.name,
+        'args': scenario.args,
+        'exit_code': exit_code,
+        'runs': runs,
+        'cold': runs[0],
+        'min': min(runs),
+        'median': round(statistics.median(runs), 6),
+    }
+
+
+def get_git_version() -> str:
+    return subprocess.run(args=['git', '--version'], stdout=subprocess.PIPE).stdout.decode('utf-8').strip()
+
+
+def run(spec: RepoSpec, repeat: int) -> dict:
+    with TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        working_copy = generate_repo(spec, temp_dir)
+        generation_time = round(time.perf_counter() - start, 6)
+
+        env = dict(os.environ)
+        env['PYTHONPATH'] = PACKAGE_ROOT
+        env[const.NO_DAEMON_ENV] = '1'
+        env.setdefault('GIT_AUTHOR_NAME', 'gitflow-benchmark')
+        env.setdefault('GIT_AUTHOR_EMAIL', 'benchmark@gitflow.void')
+        env.setdefault('GIT_COMMITTER_NAME', 'gitflow-benchmark')
+        env.setdefault('GIT_COMMITTER_EMAIL', 'benchmark@gitflow.void')
+
+        results = list()
+        for scenario in get_scenarios(spec, working_copy):
+            # a private cache per command, so that its first run starts cold
+            env['XDG_CACHE_HOME'] = os.path.join(temp_dir, 'cache', scenario.name)
+            results.append(run_scenario(scenario, working_copy, env, repeat))
+
+    return {
+        'format': REPORT_FORMAT,
+        'gitflow_version': const.VERSION,
+        'python_version': '.'.join(str(part) for part in sys.version_info[:3]),
+        'git_version': get_git_version(),
+        'repo': spec.to_dict(),
+        'repeat': repeat,
+        'generation_time': generation_time,
+        'results': results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    :returns a message for each command, that regressed against the baseline
+    """
+    regressions = list()
+    if baseline.get('format') != REPORT_FORMAT:
+        regressions.append('incompatible baseline format: ' + repr(baseline.get('format')))
+        return regressions
+    if baseline.get('repo') != report['repo']:
+        regressions.append('the baseline was measured on a different repository: ' + repr(baseline.get('repo')))
+        return regressions
+
+    baseline_results = {result['name']: result for result in baseline['results']}
+    for result in report['results']:
+        baseline_result = baseline_results.get(result['name'])
+        if baseline_result is None:
+            continue
+        if result['exit_code'] != baseline_result['exit_code']:
+            regressions.append('{name}: exit code {exit_code}, was {baseline_exit_code}'.format(
+                name=result['name'],
+                exit_code=result['exit_code'],
+                baseline_exit_code=baseline_result['exit_code']))
+        ratio = result['median'] / baseline_result['median'] if baseline_result['median'] else 1.0
+        if ratio > tolerance:
+            regressions.append('{name}: median {median:.3f}s, was {baseline_median:.3f}s ({ratio:.2f}x)'.format(
+                name=result['name'],
+                median=result['median'],
+                baseline_median=baseline_result['median'],
+                ratio=ratio))
+    return regressions
+
+
+def main(argv: list = sys.argv) -> int:
+    args = docopt.docopt(argv=argv[1:], doc=__doc__)
+
+    spec = RepoSpec()
+    spec.release_branches = int(args['--release-branches'])
+    spec.tags_per_branch = int(args['--tags-per-branch'])
+    spec.commits_per_branch = int(args['--commits-per-branch'])
+    spec.work_branches = int(args['--work-branches'])
+    spec.sequential = bool(args['--sequential'])
+
+    report = run(spec, max(1, int(args['--repeat'])))
+
+    report_data = json.dumps(report, indent=2, sort_keys=True) + '\n'
+    if args['--output'] is not None:
+        with open(args['--output'], 'w', encoding='utf-8') as report_file:
+            report_file.write(report_data)
+    else:
+        sys.stdout.write(report_data)
+
+    if args['--baseline'] is not None:
+        with open(args['--baseline'], 'r', encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(report, baseline, float(args['--tolerance']))
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if len(regressions):
+            return os.EX_DATAERR
+
+    return os.EX_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import json
+import os
+import subprocess
+from typing import List
+
+from gitflow import const
+
+AUTHOR = 'gitflow-benchmark <benchmark@gitflow.void>'
+
+# commit times start here and advance by one second per commit, which keeps the generated hashes stable
+EPOCH = 1500000000
+
+
+class RepoSpec(object):
+    """
+    The shape of a synthetic repository.
+    """
+    release_branches = 10
+    tags_per_branch = 10
+    commits_per_branch = 20
+    work_branches = 10
+    sequential = False
+    """whether the repository uses the semverWithSeq scheme"""
+
+    def to_dict(self) -> dict:
+        return {
+            'release_branches': self.release_branches,
+            'tags_per_branch': self.tags_per_branch,
+            'commits_per_branch': self.commits_per_branch,
+            'work_branches': self.work_branches,
+            'sequential': self.sequential,
+        }
+
+
+def get_config(spec: RepoSpec) -> dict:
+    config = {
+        const.CONFIG_VERSIONING_SCHEME: 'semverWithSeq' if spec.sequential else 'semver',
+        const.CONFIG_PROJECT_PROPERTY_FILE: 'project.properties',
+        const.CONFIG_VERSION_PROPERTY: 'version',
+        const.CONFIG_VERSION_TAG_PREFIX: '',
+        const.CONFIG_BUILD: {
+            'stages': {
+                'assemble': [['true']],
+                'test': [['true']],
+            }
+        }
+    }
+    if spec.sequential:
+        config[const.CONFIG_SEQUENCE_NUMBER_PROPERTY] = 'seq'
+    else:
+        config[const.CONFIG_VERSION_TYPES] = ['alpha', 'beta', 'rc']
+    return config
+
+
+class FastImportWriter(object):
+    """
+    Writes a git fast-import stream of commits with consecutive marks and commit times.
+    """
+    lines: List[bytes] = None
+    mark = 0
+
+    def __init__(self):
+        self.lines = list()
+
+    def data(self, data: bytes):
+        self.lines.append(b'data ' + str(len(data)).encode('utf-8'))
+        self.lines.append(data)
+
+    def commit(self, ref: str, parent: int, message: str, files: dict) -> int:
+        """
+        :param parent: the mark of the parent commit or 0 for a root commit
+        :param files: the file contents by path
+        :returns the mark of the commit
+        """
+        self.mark += 1
+        self.lines.append(('commit ' + ref).encode('utf-8'))
+        self.lines.append(('mark :' + str(self.mark)).encode('utf-8'))
+        self.lines.append(('committer ' + AUTHOR + ' ' + str(EPOCH + self.mark) + ' +0000').encode('utf-8'))
+        self.data(message.encode('utf-8'))
+        if parent:
+            self.lines.append(('from :' + str(parent)).encode('utf-8'))
+        for path, contents in sorted(files.items()):
+            self.lines.append(('M 644 inline ' + path).encode('utf-8'))
+            self.data(contents)
+        return self.mark
+
+    def reset(self, ref: str, mark: int):
+        self.lines.append(('reset ' + ref).encode('utf-8'))
+        self.lines.append(('from :' + str(mark)).encode('utf-8'))
+
+    def getvalue(self) -> bytes:
+        return b'\n'.join(self.lines) + b'\n'
+
+
+def create_history(spec: RepoSpec) -> bytes:
+    """
+    :returns a fast-import stream of master with a release branch per minor version, version tags along each
+    release branch and work branches off master
+    """
+    writer = FastImportWriter()
+
+    config_data = json.dumps(get_config(spec), indent=2).encode('utf-8')
+    head = writer.commit('refs/heads/master', 0, 'initial commit: gitflow config file',
+                         {const.DEFAULT_CONFIG_FILE: config_data})
+
+    tag_interval = max(1, spec.commits_per_branch // max(1, spec.tags_per_branch))
+    sequence_number = 0
+
+    for branch_index in range(spec.release_branches):
+        head = writer.commit('refs/heads/master', head, 'master #' + str(branch_index),
+                             {'master.txt': str(branch_index).encode('utf-8')})
+
+        branch_version = '1.' + str(branch_index)
+        branch_ref = 'refs/heads/release/' + branch_version
+        branch_head = head
+        tag_count = 0
+        for commit_index in range(spec.commits_per_branch):
+            branch_head = writer.commit(branch_ref, branch_head, branch_version + ' #' + str(commit_index),
+                                        {'release.txt': str(commit_index).encode('utf-8')})
+
+            if tag_count < spec.tags_per_branch and commit_index % tag_interval == 0:
+                if spec.sequential:
+                    sequence_number += 1
+                    tag_name = branch_version + '.' + str(tag_count) + '-' + str(sequence_number)
+                else:
+                    tag_name = branch_version + '.' + str(tag_count) + '-alpha.1'
+                writer.reset('refs/tags/' + tag_name, branch_head)
+                tag_count += 1
+
+    # bumps on master require a commit after the latest branch point
+    head = writer.commit('refs/heads/master', head, 'master #' + str(spec.release_branches),
+                         {'master.txt': str(spec.release_branches).encode('utf-8')})
+
+    for work_index in range(spec.work_branches):
+        writer.commit('refs/heads/dev/feature/benchmark-' + str(work_index), head,
+                      'feature #' + str(work_index), {'feature.txt': str(work_index).encode('utf-8')})
+
+    # the head of master is committed last
+    writer.reset('refs/heads/master', head)
+
+    return writer.getvalue()
+
+
+def git(*args: str, input: bytes = None):
+    proc = subprocess.run(args=['git'] + list(args), input=input,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != os.EX_OK:
+        raise RuntimeError('git ' + ' '.join(args) + ' failed:\n' + proc.stderr.decode('utf-8'))
+    return proc.stdout
+
+
+def generate_repo(spec: RepoSpec, parent_dir: str) -> str:
+    """
+    Creates an origin repository with the history described by spec and a clone of it.
+    :returns the path of the working copy
+    """
+    origin = os.path.join(parent_dir, 'origin.git')
+    working_copy = os.path.join(parent_dir, 'working_copy')
+
+    git('init', '--quiet', '--bare', origin)
+    git('-C', origin, 'fast-import', '--quiet', input=create_history(spec))
+    # HEAD of origin is master, regardless of the initial branch name configured
+    git('-C', origin, 'symbolic-ref', 'HEAD', 'refs/heads/master')
+
+    git('clone', '--quiet', origin, working_copy)
+    git('-C', working_copy, 'config', 'user.name', 'gitflow-benchmark')
+    git('-C', working_copy, 'config', 'user.email', 'benchmark@gitflow.void')
+    git('-C', working_copy, 'config', 'push.default', 'current')
+    if spec.work_branches:
+        # finish operates on a local work branch
+        git('-C', working_copy, 'branch', '--quiet', '--track', 'dev/feature/benchmark-0',
+            'origin/dev/feature/benchmark-0')
+
+    return working_copy
@@ -5,7 +5,7 @@ from io import StringIO
 from tempfile import TemporaryDirectory
 from typing import Tuple, Optional, Union, List
 
-from gitflow import __main__
+from gitflow import __main__, const, filesystem
 from gitflow.properties import PropertyIO
 
 
@@ -76,15 +76,32 @@ class SetDiffer(object):
 class TestInTempDir(object):
     tempdir: TemporaryDirectory = None
     orig_cwd: str = None
+    orig_cache_home: str = None
+    orig_get_cache_root_dir = None
 
     def setup_method(self, method):
         self.orig_cwd = os.getcwd()
         self.tempdir = TemporaryDirectory()
 
+        # keep caches, worktrees and the daemon socket out of the cache directory of the user,
+        # the environment variable applies to subprocesses as well
+        cache_home = os.path.join(self.tempdir.name, 'cache')
+        cache_root_dir = os.path.join(cache_home, const.NAME)
+        self.orig_cache_home = os.environ.get('XDG_CACHE_HOME')
+        os.environ['XDG_CACHE_HOME'] = cache_home
+        self.orig_get_cache_root_dir = filesystem.get_cache_root_dir
+        filesystem.get_cache_root_dir = lambda: cache_root_dir
+
         # switch to the working copy
         os.chdir(self.tempdir.name)
 
     def teardown_method(self, method):
+        filesystem.get_cache_root_dir = self.orig_get_cache_root_dir
+        if self.orig_cache_home is not None:
+            os.environ['XDG_CACHE_HOME'] = self.orig_cache_home
+        else:
+            os.environ.pop('XDG_CACHE_HOME', None)
+
         self.tempdir.cleanup()
         os.chdir(self.orig_cwd)
 
@@ -232,6 +249,22 @@ class TestFlowBase(TestInTempDir):
         exit_code = self.git('push', *args)
         assert exit_code == os.EX_OK
 
+    def pull(self):
+        exit_code = self.git('pull', '--ff-only')
+        assert exit_code == os.EX_OK
+
+    def commit_on_branches(self, *branches: str):
+        """
+        Pushes a commit to each of the branches and returns to the current branch.
+        """
+        current_head = self.current_head()
+        for branch in branches:
+            self.checkout(branch)
+            self.pull()
+            self.commit()
+            self.push()
+        self.checkout(current_head[len('refs/heads/'):])
+
     def checkout(self, branch: str):
         exit_code = self.git('checkout', branch)
         assert exit_code == os.EX_OK
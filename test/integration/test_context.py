@@ -0,0 +1,82 @@
+import os
+
+from gitflow import const, context, filesystem
+from gitflow.common import Result
+from gitflow.context import Context
+from gitflow.properties import PropertyIO
+from test.integration.base import TestInTempDir
+
+
+class TestContext(TestInTempDir):
+    def create_context(self, root: str, parent: Context = None) -> Context:
+        return Context.create({
+            '--root': root,
+            '--config': None,
+            '--batch': True,
+            '--verbose': 0,
+            '--pretty': False,
+        }, Result(), parent)
+
+    def write_config(self, root: str, config: dict):
+        os.makedirs(root, exist_ok=True)
+        PropertyIO.write_file(os.path.join(root, const.DEFAULT_CONFIG_FILE), config)
+
+    def test_parse_config(self):
+        data = b'releaseBranchBase: trunk\nbuild:\n  stages:\n    1: []\n'
+
+        config = context.parse_config('.gitflow.yml', data)
+        assert config == {'releaseBranchBase': 'trunk', 'build': {'stages': {1: []}}}
+        assert context.parse_config('.gitflow.yml', data) is config
+
+        # not stored, as integer keys do not survive the JSON round trip
+        cache_file_path = os.path.join(filesystem.get_cache_dir('config'),
+                                       context.get_config_hash('.gitflow.yml', data) + '.json')
+        assert not os.path.exists(cache_file_path)
+
+        data = b'{"releaseBranchBase": "trunk"}'
+        assert context.parse_config('.gitflow.json', data) == {'releaseBranchBase': 'trunk'}
+        cache_file_path = os.path.join(filesystem.get_cache_dir('config'),
+                                       context.get_config_hash('.gitflow.json', data) + '.json')
+        assert os.path.isfile(cache_file_path)
+
+    def test_config_cache_pruning(self, monkeypatch):
+        monkeypatch.setattr(context, 'MAX_CACHED_CONFIG_COUNT', 2)
+        cache_dir = filesystem.get_cache_dir('config')
+
+        data = [('{"releaseBranchBase": "%d"}' % index).encode('utf-8') for index in range(3)]
+        cache_file_paths = [os.path.join(cache_dir, context.get_config_hash('.gitflow.json', config_data) + '.json')
+                            for config_data in data]
+        for index, config_data in enumerate(data):
+            context.parse_config('.gitflow.json', config_data)
+            os.utime(cache_file_paths[index], ns=(index * 10 ** 9, index * 10 ** 9))
+
+        assert [os.path.isfile(path) for path in cache_file_paths] == [False, True, True]
+
+    def test_shared_config(self):
+        config = {
+            const.CONFIG_PROJECT_PROPERTY_FILE: 'project.properties',
+            const.CONFIG_BUILD: {
+                'stages': {
+                    'test': [['true']],
+                    'assemble': [['true']],
+                }
+            }
+        }
+        self.write_config('parent', config)
+        self.write_config('clone', config)
+
+        parent_context = self.create_context('parent')
+        assert [stage.type for stage in parent_context.config.build_stages] == ['assemble', 'test']
+
+        clone_context = self.create_context('clone', parent_context)
+        assert clone_context.version_tag_matcher is parent_context.version_tag_matcher
+        assert clone_context.config.build_stages is parent_context.config.build_stages
+        assert clone_context.config.property_file == os.path.join('clone', 'project.properties')
+        assert parent_context.config.property_file == os.path.join('parent', 'project.properties')
+
+        config[const.CONFIG_RELEASE_BRANCH_BASE] = 'trunk'
+        self.write_config('clone', config)
+
+        clone_context = self.create_context('clone', parent_context)
+        assert clone_context.version_tag_matcher is not parent_context.version_tag_matcher
+        assert clone_context.config.release_branch_base == 'trunk'
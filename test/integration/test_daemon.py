@@ -0,0 +1,117 @@
+import os
+import subprocess
+import sys
+import time
+
+import docopt
+
+from gitflow import const, daemon, __main__
+from gitflow.properties import PropertyIO
+from test.integration.base import TestFlowBase
+
+
+class TestDaemon(TestFlowBase):
+    daemon_proc: subprocess.Popen = None
+    prev_env: dict = None
+
+    def setup_method(self, method):
+        self.prev_env = dict(os.environ)
+        TestFlowBase.setup_method(self, method)
+
+        config_file = os.path.join(self.git_working_copy, const.DEFAULT_CONFIG_FILE)
+        PropertyIO.write_file(config_file, {
+            const.CONFIG_VERSIONING_SCHEME: 'semver',
+            const.CONFIG_VERSION_TYPES: ['alpha', 'beta', 'rc'],
+        })
+        self.add(config_file)
+        self.commit('initial commit: gitflow config file')
+        self.push()
+
+        socket_path = os.path.join(self.tempdir.name, 'daemon.sock')
+        os.environ[const.DAEMON_SOCKET_ENV] = socket_path
+
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__main__.__file__)))
+        self.daemon_proc = subprocess.Popen(args=[sys.executable, '-m', 'gitflow', 'daemon'],
+                                            env=dict(os.environ, PYTHONPATH=package_root),
+                                            stdout=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + 30
+        while not os.path.exists(socket_path):
+            assert self.daemon_proc.poll() is None
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+    def teardown_method(self, method):
+        try:
+            TestFlowBase.teardown_method(self, method)
+        finally:
+            self.daemon_proc.terminate()
+            self.daemon_proc.wait()
+            os.environ.clear()
+            os.environ.update(self.prev_env)
+
+    def git_flow_locally_for_lines(self, *args):
+        os.environ[const.NO_DAEMON_ENV] = '1'
+        try:
+            return self.git_flow_for_lines(*args)
+        finally:
+            del os.environ[const.NO_DAEMON_ENV]
+
+    def test_status(self):
+        args = docopt.docopt(argv=['-B', 'status'], doc=__main__.__doc__)
+        assert daemon.forward(args) == os.EX_OK
+
+        exit_code = self.git_flow('bump-major', '--assume-yes')
+        assert exit_code == os.EX_OK
+
+        # reloaded after the ref update
+        exit_code, out_lines = self.git_flow_for_lines('status', '--all')
+        assert exit_code == os.EX_OK
+        assert any('release/1.0' in line for line in out_lines)
+        assert (exit_code, out_lines) == self.git_flow_locally_for_lines('status', '--all')
+
+    def test_dry_run(self):
+        exit_code, out_lines = self.git_flow_for_lines('bump-major', '--dry-run', '--assume-yes')
+        assert exit_code == os.EX_OK
+        assert out_lines[-1] == "dry run succeeded"
+        assert 'new_version         : 1.0.0-alpha.1' in out_lines
+        assert exit_code == self.git_flow_locally_for_lines('bump-major', '--dry-run', '--assume-yes')[0]
+
+        self.assert_refs({
+            'refs/heads/master',
+            'refs/remotes/origin/master'
+        })
+
+    def test_interactive_dry_run(self):
+        args = docopt.docopt(argv=['bump-major', '--dry-run'], doc=__main__.__doc__)
+        assert not daemon.is_forwarded(args)
+
+        args = docopt.docopt(argv=['bump-major', '--dry-run', '--assume-yes'], doc=__main__.__doc__)
+        assert daemon.is_forwarded(args)
+
+        args = docopt.docopt(argv=['-B', 'bump-major', '--dry-run'], doc=__main__.__doc__)
+        assert daemon.is_forwarded(args)
+
+    def test_ref_stamp(self, monkeypatch):
+        git_dir = os.path.join(self.git_working_copy, '.git')
+        heads_dir = os.path.join(git_dir, 'refs', 'heads')
+
+        # modified by the setup just now
+        assert daemon.get_ref_stamp(git_dir, git_dir) is None
+
+        monkeypatch.setattr(daemon, 'RACY_STAMP_INTERVAL', 0)
+        os.utime(heads_dir, ns=(0, 0))
+        ref_stamp = daemon.get_ref_stamp(git_dir, git_dir)
+        assert ref_stamp is not None
+        assert daemon.get_ref_stamp(git_dir, git_dir) == ref_stamp
+
+        assert self.git('commit', '--allow-empty', '-m', 'ref update') == os.EX_OK
+        assert daemon.get_ref_stamp(git_dir, git_dir) != ref_stamp
+
+    def test_unreachable(self):
+        self.daemon_proc.terminate()
+        self.daemon_proc.wait()
+
+        args = docopt.docopt(argv=['-B', 'status'], doc=__main__.__doc__)
+        assert daemon.forward(args) is None
+        assert self.git_flow('status') == os.EX_OK
@@ -0,0 +1,542 @@
+import importlib.util
+import os
+import subprocess
+
+import pytest
+
+from gitflow import repotools, tracing
+from test.integration.base import TestInTempDir
+
+
+class TestRepoTools(TestInTempDir):
+    repo: repotools.RepoContext = None
+
+    def setup_method(self, method):
+        super().setup_method(method)
+
+        self.git('init', '.')
+        self.git('config', 'user.name', 'gitflow')
+        self.git('config', 'user.email', 'gitflow@test.void')
+
+        self.repo = repotools.RepoContext()
+        self.repo.dir = self.tempdir.name
+
+    def teardown_method(self, method):
+        self.repo.close()
+        super().teardown_method(method)
+
+    def git(self, *args) -> str:
+        proc = subprocess.Popen(args=['git'] + [*args], stdout=subprocess.PIPE)
+        out, err = proc.communicate()
+        assert proc.returncode == os.EX_OK
+        return out.decode('utf-8').strip()
+
+    def write_file(self, path: str, contents: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(contents)
+        self.git('add', path)
+
+    def commit(self, message: str = 'commit') -> str:
+        self.git('commit', '--allow-empty', '-m', message)
+        return self.git('rev-parse', 'HEAD')
+
+    def test_get_file_contents(self):
+        self.write_file('project.properties', 'version=1.0.0\n')
+        self.write_file('sub/dir/file.txt', 'nested\n')
+        commit = self.commit()
+
+        assert repotools.get_file_contents(self.repo, commit, 'project.properties') == b'version=1.0.0\n'
+        assert repotools.get_file_contents(self.repo, commit, 'sub/dir/file.txt') == b'nested\n'
+
+        entry = repotools.get_file_entry(self.repo, commit, 'sub/dir/file.txt')
+        assert entry.file_flags == '100644'
+        assert entry.object_type == 'blob'
+        assert entry.object_hash == self.git('rev-parse', commit + ':sub/dir/file.txt')
+
+        with pytest.raises(FileNotFoundError):
+            repotools.get_file_contents(self.repo, commit, 'missing.properties')
+        with pytest.raises(FileNotFoundError):
+            repotools.get_file_contents(self.repo, commit, 'sub/dir')
+
+    def test_get_file_contents_with_space(self):
+        self.write_file('sub/my file.txt', 'spaced\n')
+        commit = self.commit()
+
+        assert repotools.get_file_contents(self.repo, commit, 'sub/my file.txt') == b'spaced\n'
+        assert repotools.git_get_object_info(self.repo, commit + ':sub/missing file.txt') is None
+        with pytest.raises(FileNotFoundError):
+            repotools.get_file_contents(self.repo, commit, 'sub/missing file.txt')
+
+    def test_object_reader_is_reused(self):
+        self.write_file('a.txt', 'a\n')
+        first_commit = self.commit()
+        self.write_file('a.txt', 'b\n')
+        second_commit = self.commit()
+
+        assert repotools.get_file_contents(self.repo, first_commit, 'a.txt') == b'a\n'
+        reader_proc = self.repo.object_reader.proc
+        assert repotools.get_file_contents(self.repo, second_commit, 'a.txt') == b'b\n'
+        assert self.repo.object_reader.proc is reader_proc
+
+        self.repo.close()
+        assert reader_proc.returncode is not None
+
+    def test_ref_snapshot(self):
+        commit = self.commit()
+        self.git('branch', 'release/1.0')
+        self.git('branch', 'release/1.0-fix')
+        self.git('branch', 'releases')
+        self.git('tag', '1.0.0')
+        self.git('tag', '-a', '-m', 'annotated', '1.0.1')
+
+        def list_ref_names(*patterns):
+            return [ref.name for ref in repotools.git_list_refs(self.repo, *patterns)]
+
+        def for_each_ref(*patterns):
+            out = self.git('for-each-ref', '--format=%(refname)', *patterns)
+            return out.splitlines() if len(out) else []
+
+        for patterns in [(),
+                         ('refs/heads/release',),
+                         ('refs/heads/release/',),
+                         ('refs/heads/release/1.0',),
+                         ('refs/heads/rel',),
+                         ('refs/tags', 'refs/heads/releases'),
+                         ('refs/heads/release/*',)]:
+            assert list_ref_names(*patterns) == for_each_ref(*patterns)
+
+        annotated_tag = repotools.get_ref_by_name(self.repo, 'refs/tags/1.0.1')
+        assert annotated_tag.obj_type == 'tag'
+        assert annotated_tag.target.obj_name == commit
+        assert [ref.name for ref in repotools.git_get_tags_by_referred_object(self.repo, commit)] \
+               == ['refs/tags/1.0.0', 'refs/tags/1.0.1']
+
+        snapshot = repotools.get_ref_snapshot(self.repo)
+        assert repotools.get_ref_snapshot(self.repo) is snapshot
+
+        assert repotools.git_tag(self.repo, '1.0.2', commit)
+        assert repotools.get_ref_snapshot(self.repo) is not snapshot
+        assert repotools.get_ref_by_name(self.repo, 'refs/tags/1.0.2') is not None
+
+    def test_first_parent_set(self):
+        base = self.commit('base')
+        self.git('checkout', '-b', 'topic')
+        topic_commit = self.commit('topic')
+        self.git('checkout', '-')
+        main_commit = self.commit('main')
+        self.git('merge', '--no-ff', '-m', 'merge', 'topic')
+        merge_commit = self.git('rev-parse', 'HEAD')
+
+        first_parent_set = repotools.git_get_first_parent_set(self.repo, merge_commit)
+        assert first_parent_set == {base, main_commit, merge_commit}
+        assert topic_commit not in first_parent_set
+
+        assert repotools.git_get_first_parent_set(self.repo, 'topic') == {base, topic_commit}
+        assert repotools.git_get_first_parent_set(self.repo, merge_commit) is first_parent_set
+
+    def test_update_tree(self):
+        self.write_file('project.properties', 'version=1.0.0\n')
+        self.write_file('sub/dir/file.txt', 'nested\n')
+        self.git('update-index', '--chmod=+x', 'sub/dir/file.txt')
+        commit = self.commit()
+
+        blob = repotools.git_hash_object(self.repo, b'version=1.0.1\n')
+        assert self.git('cat-file', '-p', blob) == 'version=1.0.1'
+
+        tree = repotools.git_update_tree(self.repo, commit + '^{tree}', 'project.properties', blob)
+        assert self.git('cat-file', '-p', tree + ':project.properties') == 'version=1.0.1'
+        assert self.git('rev-parse', tree + ':sub') == self.git('rev-parse', commit + ':sub')
+
+        tree = repotools.git_update_tree(self.repo, tree, 'sub/dir/file.txt', blob)
+        assert self.git('ls-tree', tree, 'sub/dir/file.txt').split()[0] == '100755'
+        assert self.git('rev-parse', tree + ':sub/dir/file.txt') == blob
+
+        tree = repotools.git_update_tree(self.repo, tree, 'new/file.txt', blob)
+        assert self.git('ls-tree', '-r', '--name-only', tree).splitlines() \
+               == ['new/file.txt', 'project.properties', 'sub/dir/file.txt']
+
+        # names, that are not valid UTF-8, are preserved
+        tree_input = b'100644 blob ' + blob.encode('ascii') + b'\tlatin-\xe9.txt\0'
+        tree = subprocess.run(['git', 'mktree', '-z'], cwd=self.repo.dir, input=tree_input,
+                              stdout=subprocess.PIPE, check=True).stdout.decode('ascii').strip()
+        tree = repotools.git_update_tree(self.repo, tree, 'file.txt', blob)
+        assert subprocess.run(['git', 'ls-tree', '-z', '--name-only', tree], cwd=self.repo.dir,
+                              stdout=subprocess.PIPE, check=True).stdout.split(b'\0')[:-1] \
+               == [b'file.txt', b'latin-\xe9.txt']
+
+    def test_list_commits(self):
+        commits = [self.commit(str(index)) for index in range(5)]
+
+        listed_commits = repotools.git_list_commits(self.repo, None, commits[-1])
+        assert [commit.obj_name for commit in listed_commits] == list(reversed(commits))
+
+        listed_commits = repotools.git_list_commits(self.repo, commits[1], commits[-1], reverse=True)
+        assert [commit.obj_name for commit in listed_commits] == commits[1:]
+
+        listed_commits = repotools.git_list_commits(self.repo, None, commits[-1])
+        assert next(listed_commits).parents == [commits[-2]]
+        listed_commits.close()
+
+    def test_list_commits_compact(self):
+        commits = [self.commit(str(index)) for index in range(3)]
+
+        # bypass the commit graph to list commits from rev-list output
+        self.repo.use_commit_graph = False
+        listed_commits = list(repotools.git_list_commits(self.repo, None, commits[-1]))
+        assert not hasattr(listed_commits[0], '__dict__')
+        assert listed_commits[0].parents[0] is listed_commits[1].obj_name
+        assert listed_commits[-1].parents == []
+
+    def test_persistent_first_parent_set(self):
+        def first_parent_set_in_new_run(tip: str):
+            repo = repotools.RepoContext()
+            repo.dir = self.repo.dir
+            try:
+                return repotools.git_get_first_parent_set(repo, tip)
+            finally:
+                repo.close()
+
+        def rev_list_first_parents(tip: str):
+            return set(self.git('rev-list', '--first-parent', tip).splitlines())
+
+        base = self.commit('base')
+        self.git('branch', '-M', 'trunk')
+        assert first_parent_set_in_new_run('trunk') == {base}
+
+        # extended incrementally
+        self.git('checkout', '-b', 'topic')
+        topic_commit = self.commit('topic')
+        self.git('checkout', 'trunk')
+        self.commit('trunk')
+        self.git('merge', '--no-ff', '-m', 'merge', 'topic')
+        self.commit('trunk')
+        assert first_parent_set_in_new_run('trunk') == rev_list_first_parents('trunk')
+        assert topic_commit not in first_parent_set_in_new_run('trunk')
+
+        # rebuilt after moving the tip backwards
+        self.git('reset', '--hard', base)
+        assert first_parent_set_in_new_run('trunk') == {base}
+
+    def test_commit_graph(self):
+        base = self.commit('base')
+        self.git('checkout', '-b', 'topic')
+        self.commit('topic')
+        self.git('checkout', '-')
+        main_commit = self.commit('main')
+
+        assert repotools.git_merge_base(self.repo, main_commit, 'topic') == base
+        assert [commit.obj_name for commit in repotools.git_list_commits(self.repo, None, 'topic')] \
+               == self.git('rev-list', 'topic').splitlines()
+
+        self.git('merge', '--no-ff', '-m', 'merge', 'topic')
+        merge_commit = self.git('rev-parse', 'HEAD')
+
+        # extended incrementally and persisted
+        repo = repotools.RepoContext()
+        repo.dir = self.repo.dir
+        try:
+            assert repotools.git_merge_base(repo, merge_commit, 'topic') == self.git('rev-parse', 'topic')
+            assert [commit.obj_name for commit in repotools.git_list_commits(repo, base, merge_commit)] \
+                   == self.git('rev-list', base + '..' + merge_commit).splitlines() + [base]
+            assert len(repo.commit_graph) == 4
+        finally:
+            repo.close()
+
+    def test_merge_base_memo(self, monkeypatch):
+        base = self.commit('base')
+        self.git('checkout', '-b', 'topic')
+        topic_commit = self.commit('topic')
+        self.git('checkout', '-')
+        main_commit = self.commit('main')
+
+        assert repotools.git_merge_bases(self.repo, [(main_commit, 'topic'), ('topic', base)]) == [base, base]
+        assert list(self.repo.merge_bases.keys()) == [(main_commit, topic_commit, False),
+                                                      (topic_commit, base, False)]
+
+        monkeypatch.setattr(repotools, 'MERGE_BASE_CACHE_SIZE', 2)
+        assert repotools.git_merge_base(self.repo, main_commit, topic_commit) == base
+        assert repotools.git_merge_base(self.repo, main_commit, main_commit) == main_commit
+        assert list(self.repo.merge_bases.keys()) == [(main_commit, topic_commit, False),
+                                                      (main_commit, main_commit, False)]
+
+    def test_merge_base_of_criss_cross_merges(self):
+        self.commit('base')
+        main_branch = self.git('symbolic-ref', '--short', 'HEAD')
+        self.git('checkout', '-b', 'topic')
+        self.commit('topic')
+        self.git('checkout', main_branch)
+        self.commit('main')
+        self.git('checkout', 'topic')
+        self.git('merge', '--no-edit', main_branch + '~0')
+        self.git('checkout', main_branch)
+        self.git('merge', '--no-edit', 'topic~1')
+        self.git('checkout', 'topic')
+        topic_commit = self.commit('topic 2')
+        self.git('checkout', main_branch)
+        main_commit = self.commit('main 2')
+
+        self.repo.use_commit_graph = False
+        assert len(self.git('merge-base', '--all', main_commit, topic_commit).splitlines()) == 2
+        assert repotools.git_merge_base(self.repo, main_commit, topic_commit) \
+               == self.git('merge-base', main_commit, topic_commit)
+
+    def test_async_queries(self, monkeypatch):
+        import asyncio
+
+        base = self.commit('base')
+        self.git('checkout', '-b', 'topic')
+        topic_commit = self.commit('topic')
+        self.git('checkout', '-')
+        main_commit = self.commit('main')
+        self.git('tag', '1.0.0', base)
+
+        running = [0, 0]
+        create_subprocess_exec = asyncio.create_subprocess_exec
+
+        async def counting_create_subprocess_exec(*args, **kwargs):
+            running[0] += 1
+            running[1] = max(running)
+            try:
+                return await create_subprocess_exec(*args, **kwargs)
+            finally:
+                await asyncio.sleep(0.01)
+                running[0] -= 1
+
+        monkeypatch.setattr(asyncio, 'create_subprocess_exec', counting_create_subprocess_exec)
+        self.repo.git_concurrency = 2
+
+        merge_base, topic_ref, tags, commits, missing = repotools.run_concurrently(
+            repotools.git_merge_base_async(self.repo, main_commit, 'topic'),
+            repotools.git_rev_parse_async(self.repo, '--verify', 'topic'),
+            repotools.git_list_refs_async(self.repo, 'refs/tags'),
+            repotools.git_for_lines_async(self.repo, 'rev-list', 'topic'),
+            repotools.git_rev_parse_async(self.repo, '--verify', '--quiet', 'missing'),
+        )
+
+        assert merge_base == base
+        assert topic_ref == topic_commit
+        assert [(ref.name, ref.obj_name) for ref in tags] == [('refs/tags/1.0.0', base)]
+        assert commits == [topic_commit, base]
+        assert missing is None
+        assert running[1] == 2
+
+        # ref updates invalidate the snapshot loaded concurrently
+        assert self.repo.ref_snapshot is not None
+        repotools.run_concurrently(repotools.git_async(self.repo, 'tag', '1.1.0', main_commit))
+        assert self.repo.ref_snapshot is None
+        assert [ref.name for ref in repotools.git_list_refs(self.repo, 'refs/tags')] \
+               == ['refs/tags/1.0.0', 'refs/tags/1.1.0']
+
+    def test_list_ref_patterns(self):
+        commit = self.commit()
+        for ref_name in ['refs/heads/release/1.0', 'refs/heads/release/1.1/fix', 'refs/heads/release-1.1',
+                         'refs/heads/a/b/c/release', 'refs/tags/1.0.0', 'refs/tags/v/1.0.0', 'refs/tags/x',
+                         'refs/tags/x-y']:
+            self.git('update-ref', ref_name, commit)
+
+        patterns = ['refs/heads/release', 'refs/heads/release/*', 'refs/heads/*', 'refs/heads/**', 'refs/**/release',
+                    'refs/heads/**/c/*', 'refs/*/1.0.0', 'refs/tags/?.0.0', 'refs/tags/[0-9].*', 'refs/tags/[!0-9]*',
+                    'refs/tags/[[:alpha:]]', 'refs/tags/\\x', 'refs/tags/[x]', 'refs/tags/[x', 'refs/heads/release*',
+                    'refs/tags/x[-]y', 'refs/tags/[^[:digit:]]-y', 'refs/tags/v/']
+        snapshot = repotools.get_ref_snapshot(self.repo)
+        for pattern in patterns:
+            assert [ref.name for ref in snapshot.list(pattern)] \
+                   == [ref.name for ref in repotools.get_backend(self.repo).list_refs(pattern)], pattern
+
+    def test_merge_bases_without_commit_graph(self, monkeypatch):
+        import asyncio
+
+        forks = [0]
+        create_subprocess_exec = asyncio.create_subprocess_exec
+
+        async def counting_create_subprocess_exec(*args, **kwargs):
+            forks[0] += 1
+            return await create_subprocess_exec(*args, **kwargs)
+
+        monkeypatch.setattr(asyncio, 'create_subprocess_exec', counting_create_subprocess_exec)
+
+        self.check_merge_bases_without_commit_graph()
+        # merge bases are determined by concurrent git processes and memoized
+        assert forks[0] == 4
+
+    def check_merge_bases_without_commit_graph(self):
+        base = self.commit('base')
+        main_branch = self.git('symbolic-ref', '--short', 'HEAD')
+        branch_commits = list()
+        for index in range(3):
+            self.git('checkout', '-b', 'release/1.' + str(index), base)
+            branch_commits.append(self.commit('release ' + str(index)))
+        self.git('checkout', main_branch)
+        main_commit = self.commit('main')
+
+        self.repo.use_commit_graph = False
+        pairs = [(main_commit, branch_commit) for branch_commit in branch_commits] + [(main_commit, base)]
+        assert repotools.git_merge_bases(self.repo, pairs) == [base] * 4
+        assert repotools.git_merge_bases(self.repo, pairs) == [base] * 4
+
+    def test_async_tracing(self):
+        import json
+
+        commit = self.commit('base')
+
+        trace_file = os.path.join(self.tempdir.name, 'trace.json')
+        tracing.enable()
+        try:
+            repotools.run_concurrently(*[repotools.git_rev_parse_async(self.repo, '--verify', commit)
+                                         for _ in range(3)])
+            tracing.write_trace(trace_file)
+        finally:
+            tracing.disable()
+
+        with open(trace_file) as file:
+            events = json.load(file)['traceEvents']
+        assert len(events) == 3
+        for event in events:
+            assert event['args']['procedure'] == 'test.integration.test_repotools:test_async_tracing'
+
+        # overlapping spans are placed on different tracks
+        for event in events:
+            for other_event in events:
+                if event is not other_event and event['tid'] == other_event['tid']:
+                    assert event['ts'] + event['dur'] <= other_event['ts'] \
+                           or other_event['ts'] + other_event['dur'] <= event['ts']
+
+    def test_read_refs(self, monkeypatch):
+        commit = self.commit()
+        self.git('branch', 'release/1.0')
+        self.git('tag', '1.0.0')
+        self.git('tag', '-a', '-m', 'annotated', '1.0.1')
+        self.git('tag', '-a', '-m', 'nested', 'nested', '1.0.1')
+        self.git('tag', '-a', '-m', 'tree', 'tree', 'HEAD^{tree}')
+        self.git('update-ref', 'refs/remotes/origin/release/1.0', commit)
+        self.git('symbolic-ref', 'refs/remotes/origin/HEAD', 'refs/remotes/origin/release/1.0')
+        self.git('config', 'remote.origin.url', 'https://example.void/repo.git')
+        self.git('config', 'remote.origin.fetch', '+refs/heads/*:refs/remotes/origin/*')
+        self.git('branch', '--set-upstream-to', 'origin/release/1.0', 'release/1.0')
+        self.git('config', 'branch.master.remote', '.')
+        self.git('config', 'branch.master.merge', 'refs/heads/release/1.0')
+        self.git('pack-refs', '--all')
+
+        # loose refs on top of the packed ones
+        self.git('tag', '-a', '-m', 'annotated', '1.0.2')
+        self.git('tag', '1.0.3')
+        self.git('branch', 'release/1.1')
+
+        def list_refs(use_native_refs: bool):
+            repo = repotools.RepoContext()
+            repo.dir = self.repo.dir
+            repo.use_native_refs = use_native_refs
+            try:
+                return [(ref.name, ref.obj_type, ref.obj_name, ref.target.obj_type, ref.target.obj_name,
+                         ref.upstream_name)
+                        for ref in repotools.git_list_refs(repo)]
+            finally:
+                repo.close()
+
+        refs = list_refs(True)
+        assert refs == list_refs(False)
+        assert ('refs/heads/master', 'commit', commit, 'commit', commit, 'refs/heads/release/1.0') in refs
+        assert ('refs/remotes/origin/HEAD', 'commit', commit, 'commit', commit, None) in refs
+        assert {(ref[0], ref[1], ref[3]) for ref in refs if ref[0] in ('refs/tags/nested', 'refs/tags/tree')} \
+               == {('refs/tags/nested', 'tag', 'tag'), ('refs/tags/tree', 'tag', 'tree')}
+
+        monkeypatch.setattr(repotools, 'PACKED_REFS_MMAP_SIZE', 1)
+        assert list_refs(True) == refs
+
+        # branch config in the global config file
+        global_config_path = os.path.join(self.tempdir.name, 'global.config')
+        monkeypatch.setenv('GIT_CONFIG_GLOBAL', global_config_path)
+        self.git('config', '--global', 'branch.release/1.1.remote', '.')
+        self.git('config', '--global', 'branch.release/1.1.merge', 'refs/heads/release/1.0')
+        refs = list_refs(True)
+        assert refs == list_refs(False)
+        assert ('refs/heads/release/1.1', 'commit', commit, 'commit', commit, 'refs/heads/release/1.0') in refs
+
+        monkeypatch.setenv('GIT_CONFIG_PARAMETERS', "'branch.release/1.1.merge'='refs/heads/master'")
+        assert repotools.read_refs(self.repo) is None
+        monkeypatch.delenv('GIT_CONFIG_PARAMETERS')
+        monkeypatch.delenv('GIT_CONFIG_GLOBAL')
+
+        # unsupported layouts
+        self.git('config', 'include.path', 'included.config')
+        assert repotools.read_refs(self.repo) is None
+        self.git('config', '--unset', 'include.path')
+        assert repotools.read_refs(self.repo) is not None
+
+        packed_refs_path = os.path.join(self.repo.dir, '.git', 'packed-refs')
+        with open(packed_refs_path, 'r') as packed_refs_file:
+            packed_refs = packed_refs_file.read()
+        with open(packed_refs_path, 'w') as packed_refs_file:
+            packed_refs_file.write(packed_refs[packed_refs.index('\n') + 1:])
+        assert repotools.read_refs(self.repo) is None
+
+    def test_backend_selection(self, monkeypatch):
+        assert type(repotools.get_backend(self.repo)) is repotools.SubprocessBackend
+
+        for backend_name in ['unknown', 'dulwich']:
+            monkeypatch.setenv('GITFLOW_GIT_BACKEND', backend_name)
+            repo = repotools.RepoContext()
+            repo.dir = self.repo.dir
+            try:
+                backend = repotools.get_backend(repo)
+                if backend_name == 'dulwich' and importlib.util.find_spec('dulwich') is not None:
+                    assert type(backend).__name__ == 'DulwichBackend'
+                else:
+                    assert type(backend) is repotools.SubprocessBackend
+            finally:
+                repo.close()
+
+        class IncompleteBackend(repotools.GitBackend):
+            def get_git_dirs(self):
+                return None, None
+
+        with pytest.raises(TypeError):
+            IncompleteBackend(self.repo)
+
+    def test_push(self):
+        remote_dir = os.path.join(self.tempdir.name, 'remote.git')
+        subprocess.run(['git', 'init', '--quiet', '--bare', remote_dir], check=True)
+        self.git('remote', 'add', 'origin', remote_dir)
+        commit = self.commit()
+
+        assert repotools.git_push(self.repo, 'origin', [commit + ':refs/tags/1.0.0'],
+                                  {'refs/tags/1.0.0': ''}, atomic=True, dry_run=True) == os.EX_OK
+        assert self.git('ls-remote', '--tags', 'origin') == ''
+
+        assert repotools.git_push(self.repo, 'origin', [commit + ':refs/heads/release/1.0',
+                                                         commit + ':refs/tags/1.0.0'],
+                                  {'refs/tags/1.0.0': ''}, atomic=True) == os.EX_OK
+        assert self.git('ls-remote', 'origin', 'refs/tags/1.0.0') == commit + '\trefs/tags/1.0.0'
+
+        # the tag exists and none of the refs are pushed
+        next_commit = self.commit()
+        assert repotools.git_push(self.repo, 'origin', [next_commit + ':refs/heads/release/1.1',
+                                                         next_commit + ':refs/tags/1.0.0'],
+                                  {'refs/tags/1.0.0': ''}, atomic=True) != os.EX_OK
+        assert self.git('ls-remote', 'origin', 'refs/heads/release/1.1') == ''
+
+
+class TestDulwichBackend(TestRepoTools):
+    """
+    Runs the repository tests against the in-process backend.
+    """
+
+    def setup_method(self, method):
+        pytest.importorskip('dulwich')
+        super().setup_method(method)
+        self.repo.backend_name = 'dulwich'
+
+    def test_backend_selection(self, monkeypatch):
+        assert type(repotools.get_backend(self.repo)).__name__ == 'DulwichBackend'
+
+    def test_object_reader_is_reused(self):
+        self.write_file('a.txt', 'a\n')
+        commit = self.commit()
+
+        assert repotools.get_file_contents(self.repo, commit, 'a.txt') == b'a\n'
+        assert self.repo.object_reader is None
+
+    def test_merge_bases_without_commit_graph(self, monkeypatch):
+        # determined in-process
+        self.check_merge_bases_without_commit_graph()
@@ -1,4 +1,5 @@
 import itertools
+import json
 import os
 
 from gitflow import const
@@ -8,6 +9,7 @@ from test.integration.base import TestFlowBase
 
 class TestFlow(TestFlowBase):
     version_tag_prefix: str = const.DEFAULT_VERSION_TAG_PREFIX
+    workspace: str = const.DEFAULT_WORKSPACE
 
     def setup_method(self, method):
         TestFlowBase.setup_method(self, method)
@@ -20,7 +22,8 @@ class TestFlow(TestFlowBase):
             const.CONFIG_PROJECT_PROPERTY_FILE: self.project_property_file,
             const.CONFIG_VERSION_PROPERTY: 'version',
             const.CONFIG_VERSION_TYPES: ['alpha', 'beta', 'rc'],
-            const.CONFIG_VERSION_TAG_PREFIX: ''
+            const.CONFIG_VERSION_TAG_PREFIX: '',
+            const.CONFIG_WORKSPACE: self.workspace
         }
 
         PropertyIO.write_file(config_file, config)
@@ -42,6 +45,77 @@ class TestFlow(TestFlowBase):
         exit_code = self.git_flow('status')
         assert exit_code == os.EX_OK
 
+    def test_status_all(self):
+        for index in range(3):
+            exit_code = self.git_flow('bump-minor', '--assume-yes')
+            assert exit_code == os.EX_OK
+            self.commit()
+            self.push()
+
+        exit_code, out_lines = self.git_flow_for_lines('status', '--all', '--jobs=1')
+        assert exit_code == os.EX_OK
+        assert [line for line in out_lines if line.startswith('version: ')] == [
+            'version: 1.0 [origin/release/1.0]',
+            'version: 1.1 [origin/release/1.1]',
+            'version: 1.2 [origin/release/1.2]',
+        ]
+
+        # same order, when analyzed concurrently
+        assert self.git_flow_for_lines('status', '--all', '--jobs=8') == (exit_code, out_lines)
+
+        exit_code = self.git_flow('status', '--all', '--jobs=0')
+        assert exit_code == os.EX_USAGE
+
+    def test_status_json_lines(self):
+        exit_code = self.git_flow('bump-minor', '--assume-yes')
+        assert exit_code == os.EX_OK
+
+        exit_code, out_lines = self.git_flow_for_lines('status', '--all', '--format=json-lines')
+        assert exit_code == os.EX_OK
+
+        records = [json.loads(line) for line in out_lines]
+        assert records == [
+            {
+                'type': 'branch',
+                'branch': 'refs/remotes/origin/release/1.0',
+                'version': '1.0',
+                'local': [],
+                'upstream': 'refs/remotes/origin/release/1.0',
+                'discontinued': False,
+                'version_tags': [{
+                    'tag': 'refs/tags/' + self.version_tag_prefix + '1.0.0-alpha.1',
+                    'commit': self.git_get_hash('refs/tags/' + self.version_tag_prefix + '1.0.0-alpha.1^{commit}'),
+                    'version': '1.0.0-alpha.1',
+                    'code': None,
+                    'valid': True,
+                }],
+                'errors': [],
+            },
+            {
+                'type': 'summary',
+                'errors': [],
+                'gaps': [],
+            }
+        ]
+
+        exit_code = self.git_flow('status', '--format=xml')
+        assert exit_code == os.EX_USAGE
+
+    def test_trace(self):
+        trace_file_path = os.path.join(self.tempdir.name, 'trace.json')
+
+        exit_code = self.git_flow('--trace=' + trace_file_path, 'bump-minor', '--assume-yes')
+        assert exit_code == os.EX_OK
+
+        with open(trace_file_path, 'r') as trace_file:
+            events = json.load(trace_file)['traceEvents']
+
+        assert {event['cat'] for event in events} >= {'command', 'git'}
+        assert [event['name'] for event in events if event['cat'] == 'command'] == ['bump-minor']
+        push_events = [event for event in events if event['name'] == 'git push']
+        assert len(push_events) == 1
+        assert push_events[0]['args']['procedure'] == 'gitflow.procedures.create_version:create_version_branch'
+
     def test_log(self):
         exit_code = self.git_flow('log')
         assert exit_code == os.EX_OK
@@ -207,6 +281,115 @@ class TestFlow(TestFlowBase):
             'version': '1.1.0-alpha.1'
         })
 
+    def test_bump_patch_on_multiple_branches(self):
+        refs = {
+            'refs/heads/master',
+            'refs/remotes/origin/master'
+        }
+
+        for minor in range(3):
+            exit_code = self.git_flow('bump-minor', '--assume-yes')
+            assert exit_code == os.EX_OK
+            self.commit()
+            self.push()
+        refs.update({
+            'refs/remotes/origin/release/1.0',
+            'refs/remotes/origin/release/1.1',
+            'refs/remotes/origin/release/1.2',
+            'refs/tags/' + self.version_tag_prefix + '1.0.0-alpha.1',
+            'refs/tags/' + self.version_tag_prefix + '1.1.0-alpha.1',
+            'refs/tags/' + self.version_tag_prefix + '1.2.0-alpha.1',
+        })
+        self.assert_refs(refs)
+
+        self.commit_on_branches('release/1.0', 'release/1.1', 'release/1.2')
+        refs.update({
+            'refs/heads/release/1.0',
+            'refs/heads/release/1.1',
+            'refs/heads/release/1.2',
+        })
+
+        exit_code = self.git_flow('bump-patch', '--assume-yes', '1.0', '1.2')
+        assert exit_code == os.EX_OK
+        self.assert_refs(refs, added={
+            'refs/tags/' + self.version_tag_prefix + '1.0.1-alpha.1',
+            'refs/tags/' + self.version_tag_prefix + '1.2.1-alpha.1',
+        })
+
+        # the same branch can not be bumped twice
+        exit_code = self.git_flow('bump-patch', '--assume-yes', '1.0', 'release/1.0')
+        assert exit_code == os.EX_USAGE
+        self.assert_refs(refs)
+
+        exit_code = self.git_flow('discontinue', '--assume-yes', '--no-reintegrate', '1.1')
+        assert exit_code == os.EX_OK
+        self.assert_refs(refs, added={
+            'refs/tags/discontinued/1.1',
+        })
+
+        self.commit_on_branches('release/1.0', 'release/1.2')
+
+        exit_code = self.git_flow('bump-patch', '--assume-yes', '--all-active')
+        assert exit_code == os.EX_OK
+        self.assert_refs(refs, added={
+            'refs/tags/' + self.version_tag_prefix + '1.0.2-alpha.1',
+            'refs/tags/' + self.version_tag_prefix + '1.2.2-alpha.1',
+        })
+
+        self.checkout('release/1.0')
+        self.pull()
+        self.assert_project_properties_contain({
+            'version': '1.0.2-alpha.1'
+        })
+        self.checkout('release/1.2')
+        self.pull()
+        self.assert_project_properties_contain({
+            'version': '1.2.2-alpha.1'
+        })
+
+    def test_bump_patch_on_multiple_branches_with_actions(self):
+        config_file = os.path.join(self.git_working_copy, const.DEFAULT_CONFIG_FILE)
+        config = PropertyIO.get_instance_by_filename(config_file).from_file(config_file)
+        config[const.CONFIG_ON_VERSION_CHANGE] = [['git', 'status', '--short']]
+        PropertyIO.write_file(config_file, config)
+        self.add(config_file)
+        self.commit('add a version change action')
+        self.push()
+
+        for minor in range(2):
+            exit_code = self.git_flow('bump-minor', '--assume-yes')
+            assert exit_code == os.EX_OK
+            self.commit()
+            self.push()
+        refs = {
+            'refs/heads/master',
+            'refs/remotes/origin/master',
+            'refs/remotes/origin/release/1.0',
+            'refs/remotes/origin/release/1.1',
+            'refs/tags/' + self.version_tag_prefix + '1.0.0-alpha.1',
+            'refs/tags/' + self.version_tag_prefix + '1.1.0-alpha.1',
+        }
+        self.assert_refs(refs)
+
+        self.commit_on_branches('release/1.0', 'release/1.1')
+        refs.update({
+            'refs/heads/release/1.0',
+            'refs/heads/release/1.1',
+        })
+
+        exit_code = self.git_flow('bump-patch', '--assume-yes', '1.0', '1.1')
+        assert exit_code == os.EX_OK
+        self.assert_refs(refs, added={
+            'refs/tags/' + self.version_tag_prefix + '1.0.1-alpha.1',
+            'refs/tags/' + self.version_tag_prefix + '1.1.1-alpha.1',
+        })
+
+        self.checkout('release/1.1')
+        self.pull()
+        self.assert_project_properties_contain({
+            'version': '1.1.1-alpha.1'
+        })
+
     def test_bump_prerelease_type(self):
         refs = {
             'refs/heads/master',
@@ -634,3 +817,7 @@ class TestFlow(TestFlowBase):
         self.assert_refs(refs, added={
             'refs/heads/release/2.0'
         })
+
+
+class TestFlowInWorktree(TestFlow):
+    workspace: str = const.WORKSPACE_WORKTREE
@@ -1,4 +1,5 @@
 import itertools
+import json
 import os
 
 from gitflow import const
@@ -43,6 +44,38 @@ class TestFlow(TestFlowBase):
         exit_code = self.git_flow('status')
         assert exit_code == os.EX_OK
 
+    def test_status_sequence(self):
+        for index in range(2):
+            exit_code = self.git_flow('bump-minor', '--assume-yes')
+            assert exit_code == os.EX_OK
+            self.commit()
+            self.push()
+
+        exit_code, out_lines = self.git_flow_for_lines('status', '--all', '--format=json-lines')
+        assert exit_code == os.EX_OK
+        assert json.loads(out_lines[-1]) == {'type': 'summary', 'errors': [], 'gaps': []}
+
+        # the index is updated with the new tags
+        self.git('tag', self.version_tag_prefix + '1.1.0-4', 'origin/release/1.1')
+
+        exit_code, out_lines = self.git_flow_for_lines('status', '--all', '--format=json-lines')
+        assert exit_code == os.EX_OK
+        assert json.loads(out_lines[-1]) == {'type': 'summary', 'errors': [], 'gaps': [3]}
+
+        self.git('tag', self.version_tag_prefix + '1.0.0-4', 'origin/release/1.0')
+
+        exit_code, out_lines = self.git_flow_for_lines('status', '--all', '--format=json-lines')
+        assert exit_code == os.EX_DATAERR
+        assert json.loads(out_lines[-1]) == {
+            'type': 'summary',
+            'errors': [{'message': 'Version 4 breaks the sequence.', 'reason': None}],
+            'gaps': [3]
+        }
+
+        exit_code = self.git_flow('bump-prerelease', '--assume-yes', 'release/1.1')
+        assert exit_code == os.EX_OK
+        assert 'refs/tags/' + self.version_tag_prefix + '1.1.0-5' in self.get_ref_set()
+
     def test_log(self):
         exit_code = self.git_flow('log')
         assert exit_code == os.EX_OK
@@ -168,6 +201,33 @@ class TestFlow(TestFlowBase):
 
         self.assert_refs(refs)
 
+    def test_bump_patch_on_multiple_branches(self):
+        refs = {
+            'refs/heads/master',
+            'refs/remotes/origin/master',
+        }
+
+        for minor in range(2):
+            exit_code = self.git_flow('bump-minor', '--assume-yes')
+            assert exit_code == os.EX_OK
+            self.commit()
+            self.push()
+        self.commit_on_branches('release/1.0', 'release/1.1')
+        refs.update({
+            'refs/heads/release/1.0',
+            'refs/heads/release/1.1',
+            'refs/remotes/origin/release/1.0',
+            'refs/remotes/origin/release/1.1',
+            'refs/tags/' + self.version_tag_prefix + '1.0.0-1',
+            'refs/tags/' + self.version_tag_prefix + '1.1.0-2',
+        })
+        self.assert_refs(refs)
+
+        # sequence numbers are incremented on the latest release branch only
+        exit_code = self.git_flow('bump-patch', '--assume-yes', '--all-active')
+        assert exit_code == os.EX_USAGE
+        self.assert_refs(refs)
+
     def test_bump_patch_on_untagged_branch(self):
         refs = {
             'refs/heads/master',
@@ -0,0 +1,68 @@
+import os
+from tempfile import TemporaryDirectory
+
+from gitflow.commitgraph import CommitGraph
+
+
+def create_graph() -> CommitGraph:
+    #   a - b - c - f - g
+    #        \     /
+    #         d - e
+    graph = CommitGraph()
+    for commit, timestamp, parents in [('a', 1, []),
+                                       ('b', 2, ['a']),
+                                       ('c', 3, ['b']),
+                                       ('d', 3, ['b']),
+                                       ('e', 4, ['d']),
+                                       ('f', 5, ['c', 'e']),
+                                       ('g', 6, ['f'])]:
+        graph.add(commit.encode('utf-8').hex() * 20, timestamp, [parent.encode('utf-8').hex() * 20
+                                                                  for parent in parents])
+    return graph
+
+
+def commit_names(commits) -> list:
+    return [bytes.fromhex(commit[:2]).decode('utf-8') for commit in commits]
+
+
+def commit(name: str) -> str:
+    return name.encode('utf-8').hex() * 20
+
+
+def test_generations():
+    graph = create_graph()
+    assert list(graph.generations) == [1, 2, 3, 3, 4, 5, 6]
+    assert commit_names(graph.get_head_hashes()) == ['g']
+    assert commit_names(graph.first_parent_chain(commit('g'))) == ['g', 'f', 'c', 'b', 'a']
+
+
+def test_merge_bases():
+    graph = create_graph()
+    assert commit_names(graph.merge_bases(commit('c'), commit('e'))) == ['b']
+    assert commit_names(graph.merge_bases(commit('g'), commit('e'))) == ['e']
+    assert commit_names(graph.merge_bases(commit('a'), commit('a'))) == ['a']
+
+
+def test_walk():
+    graph = create_graph()
+    assert commit_names(commit for commit, parents in graph.walk(commit('g'))) \
+           == ['g', 'f', 'e', 'c', 'd', 'b', 'a']
+    assert commit_names(commit for commit, parents in graph.walk(commit('g'), first_parent=True)) \
+           == ['g', 'f', 'c', 'b', 'a']
+    assert commit_names(commit for commit, parents in graph.walk(commit('g'), commit('c'))) \
+           == ['g', 'f', 'e', 'd']
+
+
+def test_read_write():
+    graph = create_graph()
+    with TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, 'graph')
+        graph.write(path)
+        read_graph = CommitGraph.read(path)
+
+    assert read_graph.hashes == graph.hashes
+    assert read_graph.parent_offsets == graph.parent_offsets
+    assert read_graph.parent_positions == graph.parent_positions
+    assert read_graph.generations == graph.generations
+    assert read_graph.timestamps == graph.timestamps
+    assert read_graph.heads == graph.heads
@@ -1,3 +1,8 @@
+import itertools
+
+import semver
+
+from gitflow import version
 from gitflow.const import VersioningScheme
 from gitflow.procedures.scheme import scheme_procedures
 from gitflow.version import VersionConfig
@@ -45,3 +50,55 @@ def test_increment_to_release():
     assert scheme_procedures.version_bump_to_release(config, None, None).value is None
     assert scheme_procedures.version_bump_to_release(config, "1.0.0-alpha.4", None).value == "1.0.0"
     assert scheme_procedures.version_bump_to_release(config, "1.0.0", None).value is None
+
+
+def test_version_key():
+    versions = ["1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta", "1.0.0-beta", "1.0.0-beta.2", "1.0.0-beta.11",
+                "1.0.0-rc.1", "1.0.0", "1.0.1-alpha.1", "1.1.0", "2.0.0-1", "2.0.0-a-1", "2.0.0", "10.0.0"]
+
+    for version_a, version_b in itertools.product(versions, repeat=2):
+        key_a = version.get_version_key(version_a)
+        key_b = version.get_version_key(version_b)
+        assert ((key_a > key_b) - (key_a < key_b)) == semver.compare(version_a, version_b)
+
+
+def test_version_matcher_key():
+    matcher = version.VersionMatcher(['refs/tags'], None, r'(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patch>\d+)'
+                                                          r'(?:-(?P<prerelease_type>[a-z]+)\.(?P<prerelease_version>\d+))?')
+
+    tag_names = ['refs/tags/1.10.0', 'refs/tags/1.2.0', 'refs/tags/1.2.0-rc.1', 'refs/tags/1.2.0-alpha.10',
+                 'refs/tags/1.2.0-alpha.9']
+    assert sorted(tag_names, key=matcher.key) == ['refs/tags/1.2.0-alpha.9', 'refs/tags/1.2.0-alpha.10',
+                                                  'refs/tags/1.2.0-rc.1', 'refs/tags/1.2.0', 'refs/tags/1.10.0']
+    assert matcher.key('refs/tags/v1.2.0') is None
+    assert matcher.key.cache_info().maxsize == version.MAX_VERSION_KEY_COUNT
+
+
+def test_version_matcher_parse_many():
+    matcher = version.VersionMatcher(['refs/tags'], None, r'(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patch>\d+)'
+                                                          r'(?:-(?P<prerelease_type>[a-z]+)\.(?P<prerelease_version>\d+))?')
+
+    tag_names = ['refs/tags/1.2.0-alpha.3', 'refs/tags/other', 'refs/tags/1.10.4', 'refs/tags/1.2']
+    columns = matcher.parse_many(tag_names)
+    assert len(columns) == 4
+    assert list(columns.valid) == [1, 0, 1, 0]
+    assert columns.major == [1, None, 1, None]
+    assert columns.minor == [2, None, 10, None]
+    assert columns.patch == [0, None, 4, None]
+    assert columns.prerelease_type == ['alpha', None, None, None]
+    assert columns.prerelease_version == [3, None, None, None]
+    assert columns.versions == [matcher.format(tag_name) for tag_name in tag_names]
+
+    # patterns, that may span multiple lines, are matched one by one
+    matcher = version.VersionMatcher(['refs/tags'], None, r'[^/]*?(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patch>\d+)')
+
+    columns = matcher.parse_many(['refs/tags/v', '1.2.3', 'refs/tags/v1.2.3'])
+    assert columns.versions == [None, None, '1.2.3']
+
+    # unique codes are kept as matched for display
+    matcher = version.VersionMatcher(['refs/tags'], None, r'(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patch>\d+)'
+                                                          r'(?:-(?P<unique_code>\d+))?')
+
+    columns = matcher.parse_many(['refs/tags/1.2.3-0042', 'refs/tags/1.2.4', 'refs/tags/other'])
+    assert columns.unique_code == [42, None, None]
+    assert columns.unique_code_strings == ['0042', None, None]
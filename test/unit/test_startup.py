@@ -0,0 +1,68 @@
+import os
+import statistics
+import subprocess
+import sys
+
+# the cumulative import time of the entry point in microseconds, as reported by python -X importtime
+IMPORT_TIME_BUDGET = 150000
+# the median of this number of runs is compared to the budget, to be robust against load peaks
+IMPORT_TIME_RUNS = 5
+
+# modules, that are imported by the dispatched commands only
+DEFERRED_MODULES = [
+    'docopt',
+    'semver',
+    'yaml',
+    'colors',
+    'appdirs',
+    'gitflow.context',
+    'gitflow.repotools',
+    'gitflow.procedures',
+]
+
+
+def get_package_root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def measure_import_time() -> int:
+    """
+    :returns the cumulative import time of the entry point in microseconds
+    """
+    proc = subprocess.run(args=[sys.executable, '-X', 'importtime', '-c', 'import gitflow.__main__'],
+                          env=dict(os.environ, PYTHONPATH=get_package_root()),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert proc.returncode == os.EX_OK
+
+    for line in proc.stderr.decode('utf-8').splitlines():
+        tokens = line.split('|')
+        if len(tokens) == 3 and tokens[2].strip() == 'gitflow.__main__':
+            return int(tokens[1])
+    assert False, "gitflow.__main__ is missing in the import time report"
+
+
+def import_entry_point() -> set:
+    """
+    :returns the names of the modules loaded by importing the entry point in a fresh interpreter
+    """
+    proc = subprocess.run(args=[sys.executable, '-c',
+                                'import sys, gitflow.__main__; print("\\n".join(sys.modules))'],
+                          env=dict(os.environ, PYTHONPATH=get_package_root()),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert proc.returncode == os.EX_OK
+
+    return set(proc.stdout.decode('utf-8').splitlines())
+
+
+def test_deferred_imports():
+    modules = import_entry_point()
+
+    assert 'gitflow.__main__' in modules
+    for module_name in DEFERRED_MODULES:
+        assert module_name not in modules
+        assert not any(module.startswith(module_name + '.') for module in modules)
+
+
+def test_import_time_budget():
+    import_time = statistics.median(measure_import_time() for _ in range(IMPORT_TIME_RUNS))
+    assert import_time <= IMPORT_TIME_BUDGET
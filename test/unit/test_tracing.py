@@ -0,0 +1,26 @@
+from gitflow import tracing
+
+
+def test_disabled():
+    with tracing.span('git status', 'git', command=['status']) as span:
+        assert span.args is None
+
+
+def test_summary():
+    tracing.enable()
+    try:
+        for index in range(3):
+            with tracing.span('git ' + tracing.get_sub_command(['--no-pager', 'status']), 'git', command=['status']):
+                pass
+        with tracing.span('assemble:app', 'build', command=['make']):
+            pass
+        tracing.count_fork()
+
+        summary = tracing.get_summary()
+    finally:
+        tracing.disable()
+
+    assert summary[0] == 'forks: 1'
+    assert summary[3].split()[:4] == ['git', 'status', '3', 'calls']
+    # issued by this test function
+    assert summary[-1].endswith('(test.unit.test_tracing:test_summary)')